@@ -40,6 +40,7 @@ bool sd_available = false;
 // Sampling defaults (modifiable over serial)
 int N_samples = 10;
 int samplingInterval = 20; // ms between samples
+bool raw_bursts = false;    // RAW=1: also stream every sample of a reading ($BURST line)
 
 unsigned long lastSampleTime = 0;
 
@@ -75,6 +76,58 @@ int16_t readDO(uint32_t voltage_mv, uint8_t temperature_c) {
   #endif
 }
 
+// ----- Raw bursts -----
+// $BURST,<rtc unixtime>,<N>,<T ms>,<crc16 hex>,<base64 payload>
+// payload (little endian, one channel after the other):
+//   pH ADC u16[N] | DO ADC u16[N] | Temp*100 i16[N] | Pressure mbar*100 i32[N]
+// crc16 = CCITT-FALSE (init 0xFFFF) over the payload bytes
+#define BURST_SAMPLE_BYTES 10
+
+const char BASE64_CHARS[] = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/";
+
+uint16_t crc16_ccitt(const uint8_t* data, size_t len) {
+  uint16_t crc = 0xFFFF;
+  for (size_t i = 0; i < len; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (int b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+void printBase64(const uint8_t* data, size_t len) {
+  uint8_t out[4];
+  for (size_t i = 0; i < len; i += 3) {
+    uint32_t v = (uint32_t)data[i] << 16;
+    if (i + 1 < len) v |= (uint32_t)data[i + 1] << 8;
+    if (i + 2 < len) v |= data[i + 2];
+    out[0] = BASE64_CHARS[(v >> 18) & 63];
+    out[1] = BASE64_CHARS[(v >> 12) & 63];
+    out[2] = (i + 1 < len) ? BASE64_CHARS[(v >> 6) & 63] : '=';
+    out[3] = (i + 2 < len) ? BASE64_CHARS[v & 63] : '=';
+    Serial.write(out, 4);
+  }
+}
+
+void sendRawBurst(int N, const DateTime& when, const int* ph, const uint32_t* dox,
+                  const float* temp, const float* pres) {
+  static uint8_t payload[MAX_SAMPLES * BURST_SAMPLE_BYTES];
+  uint8_t* p = payload;
+  for (int i = 0; i < N; ++i) { uint16_t v = (uint16_t)ph[i];  memcpy(p, &v, 2); p += 2; }
+  for (int i = 0; i < N; ++i) { uint16_t v = (uint16_t)dox[i]; memcpy(p, &v, 2); p += 2; }
+  for (int i = 0; i < N; ++i) { int16_t v = (int16_t)lround(temp[i] * 100.0f); memcpy(p, &v, 2); p += 2; }
+  for (int i = 0; i < N; ++i) { int32_t v = (int32_t)lround(pres[i] * 100.0f); memcpy(p, &v, 4); p += 4; }
+  size_t len = p - payload;
+
+  char head[64];
+  snprintf(head, sizeof(head), "$BURST,%lu,%d,%d,%04X,", (unsigned long)when.unixtime(),
+           N, samplingInterval, crc16_ccitt(payload, len));
+  Serial.print(head);
+  printBase64(payload, len);
+  Serial.println();
+}
+
 // ----- Serial commands -----
 void sendSDFileOverSerial(const char *filename) {
   if (!sd_available) {
@@ -119,6 +172,10 @@ void handleSerialCommands() {
     samplingInterval = v;
     Serial.print("samplingInterval = "); Serial.println(samplingInterval);
 
+  } else if (cmd.startsWith("RAW=")) {
+    raw_bursts = cmd.substring(4).toInt() != 0;
+    Serial.print("raw_bursts = "); Serial.println(raw_bursts ? 1 : 0);
+
   } else if (cmd.equalsIgnoreCase("SEND")) {
     sendSDFileOverSerial("datalog.txt");
 
@@ -157,7 +214,7 @@ void handleSerialCommands() {
     Serial.print("RTC set to: "); Serial.println(now.timestamp());
 
   } else {
-    Serial.println("Commands: N=<num> T=<ms> NOW SEND STATUS SETTIME TIME=YYYY-MM-DD HH:MM:SS");
+    Serial.println("Commands: N=<num> T=<ms> RAW=0|1 NOW SEND STATUS SETTIME TIME=YYYY-MM-DD HH:MM:SS");
   }
 }
 
@@ -265,6 +322,11 @@ void performSamplingAndLog(int N) {
   Serial.print("Pressure:   "); Serial.print(pres_avg, 2); Serial.println(" mbar");
   Serial.println("========================================\n");
 
+  // Raw samples for host-side health analysis (bursts.py), after the block
+  if (raw_bursts) {
+    sendRawBurst(N, now, ph_samples, do_samples, temp_samples, pres_samples);
+  }
+
   // Save to SD card in human-readable multi-line format
   if (sd_available) {
     File f = SD.open("datalog.txt", FILE_WRITE);
@@ -365,7 +427,7 @@ void setup() {
   Serial.println("⏰ RTC alarm set for 30 minutes from now.");
 
   Serial.println("Device will now go to deep sleep until next alarm.");
-  Serial.println("Commands available when awake: STATUS NOW SEND N=<num> T=<ms>\n");
+  Serial.println("Commands available when awake: STATUS NOW SEND N=<num> T=<ms> RAW=0|1\n");
 
   // Prepare digital snooze block to wake on falling edge of RTC INT (pin 16)
   digital.pinMode(CLOCK_INTERRUPT_PIN, INPUT_PULLUP, FALLING);
@@ -3,6 +3,14 @@
 #   Real-time display, sleep detection, CSV logging,
 #   interval sampling, SD card download (fixed protocol),
 #   clean GUI layout.
+#
+#   NOTE: this script has no GUI setup section - root, the value
+#   labels, text_box and the buttons are defined nowhere, so the
+#   root.mainloop() at the end fails until that section is
+#   restored. connect_teensy() / disconnect_teensy() are the
+#   handlers its Connect / Disconnect buttons need; nothing in
+#   the serial path (open_serial_link, dialect binding, STATUS,
+#   RAW=1, clock sync) runs before then.
 ###############################################################
 
 import tkinter as tk
@@ -13,17 +21,40 @@ import threading
 import time
 import csv
 import serial.tools.list_ports
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time as dtime
 from tkcalendar import Calendar
 import sys
 import re
+from dataclasses import replace
+from calibration import CalibrationManager, device_id_for_port
+from sensor_logging import setup_logging, get_logger, RateLimiter
+from port_discovery import PortDiscovery
+from serial_link import SerialLink
+from telemetry import StreamDecoder
+from console_blocks import BlockAssembler
+from dialects import DialectDetector, USB_CHECK
+from device_commands import CommandClient
+from bursts import BurstArchive, BURST_PREFIX, parse_burst, device_datetime
+from clock_sync import host_clock, format_stamp, DriftModel, ClockSync
+from ui_frames import frames
+from sampling_scheduler import SamplingScheduler, SamplingPlan, DailyWindow, BoundarySelector
 
 # -------------------- CONFIG --------------------
 BAUD = 57600
 SERIAL_TIMEOUT = 1.0
+RAW_BURSTS = True              # ask the logger for every raw sample ($BURST lines, see bursts.py)
+BURST_FILE = "bursts.bin"
+
+# -------------------- Logging --------------------
+setup_logging("USB_CHECK")
+serial_log = get_logger("serial")
+rx_log = get_logger("rx")
+store_log = get_logger("store")
+ui_error_limiter = RateLimiter()   # repeated [SERIAL ERROR]/[READ ERROR] lines in the text box
 
 # -------------------- Global Variables --------------------
 ser = None
+port_discovery = PortDiscovery()   # remembers which logger we connected to last
 sensor_data_list = []
 sampling_interval = 1
 custom_datetime = None
@@ -33,6 +64,28 @@ csv_file = None
 continuous_csv_file = None
 continuous_csv_writer = None
 
+# Multi-line reading blocks -> one reading each (reader thread only)
+block_assembler = BlockAssembler()
+
+# Firmware dialect: detected from the first lines, then its parser is bound (reader thread only)
+dialect_detector = DialectDetector()
+line_parser = None
+
+# Device commands (N= T= NOW SEND STATUS SETTIME TIME=) with their replies matched
+command_client = None
+
+# Device clock vs host clock, fitted from STATUS exchanges (see clock_sync); maps the
+# RTC stamps of readings and archived bursts onto the host clock
+device_clock = DriftModel()
+clock_sync = None
+
+# Raw burst samples, one fixed-width record per reading
+burst_archive = BurstArchive(BURST_FILE)
+
+# Calibration profiles (loaded once, applied per reading; rebound per device in open_serial_link)
+calibration = CalibrationManager()
+active_calibration = calibration.active()
+
 # runtime flags / thread handles
 is_reading = False
 read_thread = None
@@ -53,32 +106,220 @@ start_time_set = "00:00:00"
 end_time_set = "23:59:59"
 within_time_window = False
 
+# Interval boundaries fire on the scheduler thread; the reader keeps the
+# first reading after each one (or the NOW reading it triggered)
+sampling_scheduler = SamplingScheduler()
+reading_selector = BoundarySelector()
+sampling_job = None
+SAMPLING_JOB = "usb_check"
+
 # -------------------- Find Teensy Port --------------------
 def find_teensy_port():
-    """Automatically detect Teensy port"""
-    ports = serial.tools.list_ports.comports()
-    print("\n🔍 Scanning for Teensy...")
-    for port in ports:
-        print(f"  📍 {port.device} - {port.description}")
-        desc = (port.description or "").lower()
-        dev = (port.device or "").lower()
-        if "teensy" in desc or "teensy" in dev:
-            print(f"  ✅ Found Teensy!")
-            return port.device
-        if "usbmodem" in dev or "ttyacm" in dev or "usbserial" in dev:
-            print(f"  ✅ Found USB Serial Device!")
-            return port.device
-        if getattr(port, "vid", None) == 0x16C0:
-            print(f"  ✅ Found Teensy by VID!")
-            return port.device
-    print("  ❌ No Teensy found")
-    return None
+    """Detect the Teensy logger (cached VID/PID/serial identity, see port_discovery)"""
+    port = port_discovery.find()
+    if port:
+        serial_log.info("✅ Found Teensy on %s", port)
+    else:
+        serial_log.warning("  ❌ No Teensy found")
+    return port
+
+# -------------------- Serial Link --------------------
+def open_serial_link(port):
+    """Open the Teensy port under the connection supervisor (reconnects itself)"""
+    global dialect_detector, line_parser, command_client, clock_sync, active_calibration
+    # This logger's own profile; bind_dialect hands it to the parser
+    active_calibration = calibration.active(device_id_for_port(port))
+    # The baud of the dialect last detected on this logger (see bind_dialect)
+    baud = port_discovery.identity.get("baud", BAUD)
+    link = SerialLink(port, baud, timeout=SERIAL_TIMEOUT, find_port=find_teensy_port,
+                      on_disconnect=on_link_lost, on_reconnect=on_link_restored).open()
+    dialect_detector = DialectDetector()
+    line_parser = None
+    block_assembler.reset()
+    if command_client:
+        command_client.cancel_all("reconnected to a new port")
+    command_client = CommandClient(link)
+    device_clock.reset()
+    clock_sync = ClockSync(command_client, device_clock)
+    # A sleeping 25_USB_CHECK answers STATUS right away (also identifies the dialect
+    # and gives the first device clock sample)
+    run_device_command("STATUS", clock_sync.request(force=True), report_errors=False)
+    if RAW_BURSTS:
+        # Older firmware rejects RAW= - it then just keeps sending averaged blocks
+        run_device_command("RAW=1", command_client.set_raw_bursts(True), report_errors=False)
+    return link
+
+def run_device_command(label, future, report_errors=True):
+    """Report a CommandClient future in the text box once it resolves"""
+    def report(f):
+        try:
+            result = f.result()
+            if isinstance(result, list):
+                result = f"{len(result)} lines"
+            message, tag = f"📟 {label}: {result}", "cyan"
+        except Exception as e:
+            serial_log.warning("%s failed: %s", label, e)
+            if not report_errors:
+                return
+            message, tag = f"❌ {label} failed: {e}", "red"
+        show_link_message(message, tag)
+    future.add_done_callback(report)
+    return future
+
+def bind_dialect(dialect):
+    """Parse with this firmware's parser from now on (reader thread)"""
+    global line_parser
+    line_parser = block_assembler if dialect is USB_CHECK else dialect.make_parser(active_calibration)
+    port_discovery.remember_dialect(dialect.name, dialect.baud)
+    serial_log.info("🧬 Firmware dialect: %s (%s, %d baud)", dialect.name, dialect.firmware, dialect.baud)
+    show_link_message(f"🧬 Firmware detected: {dialect.firmware} ({dialect.name})", "cyan")
+
+def on_link_lost(error):
+    block_assembler.reset()
+    show_link_message(f"⚠️ Link lost ({error}) - reconnecting...", "red")
+
+def on_link_restored(port, seconds_down):
+    show_link_message(f"✅ Reconnected to {port} after {seconds_down:.1f} s "
+                      f"(reconnects: {ser.reconnects}, total downtime: {ser.total_downtime():.1f} s)", "green")
+
+def show_link_message(message, tag):
+    """Any thread: the line is painted on the next UI frame"""
+    frames.log(text_box, message + "\n", tag)
+
+# -------------------- Connect / Disconnect --------------------
+def connect_teensy():
+    """Connect button: open the link (STATUS, RAW=1, clock sync) and start the read thread"""
+    global ser, is_reading, read_thread, continuous_csv_file, continuous_csv_writer
+
+    if ser and getattr(ser, "is_open", False):
+        messagebox.showinfo("Already Connected", "✅ Already connected to Teensy!")
+        return
+
+    port = find_teensy_port()
+    if not port:
+        port = simpledialog.askstring("Teensy Not Found",
+            "⚠️ Could not find Teensy!\n\nEnter port (e.g., COM3, /dev/ttyACM0):")
+        if not port:
+            frames.log(text_box, "❌ No port provided. Connect aborted.\n", "red")
+            return
+
+    try:
+        continuous_csv_path = f"usb_check_readings_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        continuous_csv_file = open(continuous_csv_path, 'w', newline='')
+        continuous_csv_writer = csv.DictWriter(continuous_csv_file,
+                                               fieldnames=["timestamp", "pH", "DO", "Temperature", "Pressure",
+                                                           "device_time"])
+        continuous_csv_writer.writeheader()
+
+        frames.log(text_box, f"🔌 Connecting to {port}...\n", "white")
+        ser = open_serial_link(port)
+        port_discovery.remember(port)
+
+        is_reading = True
+        read_thread_stop.clear()
+        read_thread = threading.Thread(target=read_serial_data, daemon=True)
+        read_thread.start()
+
+        frames.log(text_box, f"✅ CONNECTED to {port} at {ser.baud} baud\n", "green")
+        frames.log(text_box, f"📁 CSV file: {continuous_csv_path}\n", "yellow")
+    except Exception as e:
+        frames.log(text_box, f"❌ Connection failed: {e}\n", "red")
+        messagebox.showerror("Connection Error", f"Failed to connect to {port}\n\n{e}")
+
+def disconnect_teensy():
+    """Disconnect button: stop sampling and the read thread, close the link and CSV"""
+    global ser, is_reading, read_thread, command_client, clock_sync, continuous_csv_file, continuous_csv_writer
+
+    stop_time_sampling()
+    is_reading = False
+    read_thread_stop.set()
+    if read_thread and read_thread.is_alive():
+        read_thread.join(timeout=1.0)
+    read_thread = None
+
+    if command_client:
+        command_client.cancel_all("disconnected")
+    command_client = clock_sync = None
+    if ser:
+        try:
+            ser.close()
+        except Exception:
+            pass
+    ser = None
+
+    if continuous_csv_file:
+        continuous_csv_file.close()
+    continuous_csv_file = continuous_csv_writer = None
+    frames.log(text_box, "\n⚠️ DISCONNECTED\n\n", "red")
 
 # -------------------- Serial Reading Thread --------------------
+def dispatch_lines(lines, arrival):
+    """Reader thread: `arrival` is time.monotonic() when these bytes were read"""
+    for line in lines:
+        rx_log.debug("📥 RECEIVED: %s", line)
+        if line_parser is None:
+            dialect = dialect_detector.feed(line)
+            if dialect is not None:
+                bind_dialect(dialect)
+        if command_client and command_client.feed_line(line, arrival):
+            continue                # reply to a device command, not live data
+        if line.startswith(BURST_PREFIX):
+            store_burst(line)
+            continue
+        parser = line_parser or block_assembler
+        partial = block_assembler.partial
+        consumed, reading = parser.feed(line)
+        if block_assembler.partial != partial:
+            rx_log.warning("⚠️ Incomplete reading block discarded (%d so far)", block_assembler.partial)
+            show_link_message(f"⚠️ Incomplete reading block discarded ({block_assembler.partial} so far)",
+                              "goldenrod")
+        if reading is not None:
+            # Stamped when the bytes landed, not when Tk gets round to it; the logger's
+            # RTC stamp is kept next to it, mapped onto the host clock
+            reading = replace(reading, timestamp=host_clock.to_datetime(arrival),
+                              device_time=device_host_time(reading.device_time))
+            selected = sampling_job is not None and reading_selector.offer(arrival)
+            frames.post(lambda r=reading, s=selected: show_reading(r, s))
+            if reading.saved and clock_sync:
+                clock_sync.request()    # the logger stays awake for a few seconds after a reading
+        elif consumed:
+            continue
+        elif line_parser is not None:
+            # Known firmware: anything its parser does not take is a status message
+            frames.post(lambda l=line: show_raw_line(l))
+        else:
+            stamp = host_clock.to_datetime(arrival)
+            frames.post(lambda l=line, t=stamp: update_display(l, save_data=False, stamp=t))
+
+def device_host_time(device_time):
+    """Logger RTC datetime on the host clock (device_clock fit); None before the first exchange"""
+    if device_time is None or not device_clock.ready:
+        return None
+    return device_clock.to_host(device_time)
+
+def store_burst(line):
+    """Archive the raw samples printed after a reading block (reader thread)"""
+    try:
+        burst = parse_burst(line)
+    except ValueError as e:
+        rx_log.warning("⚠️ Raw burst dropped: %s", e)
+        show_link_message(f"⚠️ Raw burst dropped: {e}", "goldenrod")
+        return
+    host_time = device_host_time(device_datetime(burst["device_time"]))
+    if host_time is not None:
+        burst["host_time"] = host_time.timestamp()
+    try:
+        count = burst_archive.append(burst)
+    except OSError as e:
+        store_log.error("Error writing %s: %s", BURST_FILE, e)
+        return
+    store_log.info("🔬 Raw burst of %d samples archived (%d total)", burst["n"], count)
+
 def read_serial_data():
     """Continuously read data from Teensy and update display"""
     global ser, is_reading, read_thread_stop
-    print("📡 Serial reading thread started")
+    serial_log.info("📡 Serial reading thread started")
+    decoder = StreamDecoder()
     try:
         while not read_thread_stop.is_set() and is_reading:
 
@@ -89,48 +330,49 @@ def read_serial_data():
                 continue
 
             try:
-                if getattr(ser, "in_waiting", 0) > 0:
-                    raw = ser.readline()
-                    if not raw:
-                        continue
-                    try:
-                        line = raw.decode("utf-8", errors="ignore").strip()
-                    except Exception:
-                        line = raw.decode("latin-1", errors="ignore").strip()
-                    if line:
-                        print(f"📥 RECEIVED: {line}")
-                        root.after(0, lambda l=line: update_display(l, save_data=False))
+                # While the port is gone (USB glitch / re-enumeration) this
+                # retries it with backoff instead of spinning on a dead handle
+                raw = ser.read_available()
+                if raw:
+                    dispatch_lines(decoder.feed(raw), time.monotonic())
                 else:
                     # Teensy might be in deep sleep → no data
+                    if command_client:
+                        command_client.poll()
                     time.sleep(0.02)
 
             except (serial.SerialException, OSError) as e:
-                print(f"❌ Serial Exception in read loop: {e}")
-                # DO NOT DISCONNECT — Teensy might be sleeping
-                text_box.insert(tk.END, f"[SERIAL ERROR] {e}\n", "red")
-                text_box.see(tk.END)
-                time.sleep(0.5)
+                serial_log.error("❌ Serial exception in read loop: %s", e)
+                # A line cut off by the disconnect is incomplete; SerialLink reconnects on its own
+                partial = decoder.flush()
+                if partial:
+                    serial_log.warning("✂️ Discarded %d byte(s) cut off by the disconnect: %r",
+                                       len(partial), partial[:80])
+                allowed, repeats = ui_error_limiter.allow("SERIAL ERROR")
+                if allowed:
+                    note = f" (+{repeats} repeats)" if repeats else ""
+                    frames.log(text_box, f"[SERIAL ERROR] {e}{note}\n", "red")
                 continue
 
             except Exception as e:
-                print(f"❌ Unexpected read error: {e}")
-                try:
-                    text_box.insert(tk.END, f"[READ ERROR] {e}\n", "red")
-                    text_box.see(tk.END)
-                except:
-                    pass
+                serial_log.error("❌ Unexpected read error: %s", e)
+                allowed, repeats = ui_error_limiter.allow("READ ERROR")
+                if allowed:
+                    note = f" (+{repeats} repeats)" if repeats else ""
+                    frames.log(text_box, f"[READ ERROR] {e}{note}\n", "red")
                 time.sleep(0.2)
 
     finally:
-        print("📴 Serial reading thread exiting")
+        serial_log.info("📴 Serial reading thread exiting")
 
 # -------------------- Update Display with Synchronized Output --------------------
-def update_display(line, save_data=True):
-    """Parse incoming data and update GUI labels with CORRECT sensor values"""
+def update_display(line, save_data=True, stamp=None):
+    """Parse incoming data and update GUI labels with CORRECT sensor values
+    (stamp: arrival time of the line, see dispatch_lines)"""
     global current_ph, current_do, current_temp, current_pressure
 
     try:
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        current_time = format_stamp(stamp or datetime.now())
         updated = False
 
         # ========== FORMAT 1: $Params,pH*100,DO*10,Temp*50,Pressure*1000 ==========
@@ -138,31 +380,26 @@ def update_display(line, save_data=True):
             parts = line.split(',')
             if len(parts) >= 5:
                 try:
-                    current_ph = float(parts[1]) / 100.0
-                    current_do = float(parts[2]) / 10.0
-                    current_temp = float(parts[3]) / 50.0
-                    current_pressure = float(parts[4]) / 1000.0
+                    current_ph, current_do, current_temp, current_pressure = active_calibration.apply(parts[1:5])
                     
-                ph_label.config(text=f"🌊 pH: {current_ph:.2f}")
-                do_label.config(text=f"💧 DO: {current_do:.2f} mg/L")
-                temp_label.config(text=f"🔥 Temperature: {current_temp:.2f}°C")
-                pressure_label.config(text=f"🌡️ Pressure: {current_pressure:.2f} bar")
+                    frames.set(ph_label, text=f"🌊 pH: {current_ph:.2f}")
+                    frames.set(do_label, text=f"💧 DO: {current_do:.2f} mg/L")
+                    frames.set(temp_label, text=f"🔥 Temperature: {current_temp:.2f}°C")
+                    frames.set(pressure_label, text=f"🌡️ Pressure: {current_pressure:.2f} mbar")
 
                     if save_data:
                         save_sensor_data(current_time, current_ph, current_do, current_temp, current_pressure)
-                        text_box.insert(tk.END, f"[{current_time}] ✅ SAVED TO SD CARD:\n", "green")
+                        frames.log(text_box, f"[{current_time}] ✅ SAVED TO SD CARD:\n", "green")
                     else:
-                        text_box.insert(tk.END, f"[{current_time}] 📡 LIVE READING:\n", "cyan")
+                        frames.log(text_box, f"[{current_time}] 📡 LIVE READING:\n", "cyan")
                     
-                    text_box.insert(tk.END, f"  🌊 pH: {current_ph:.2f}\n", "blue")
-                    text_box.insert(tk.END, f"  💧 DO: {current_do:.2f} mg/L\n", "green")
-                    text_box.insert(tk.END, f"  🔥 Temp: {current_temp:.2f}°C\n", "red")
-                    text_box.insert(tk.END, f"  🌡️ Press: {current_pressure:.2f} bar\n\n", "goldenrod")
-                    text_box.see(tk.END)
+                    frames.log(text_box, f"  🌊 pH: {current_ph:.2f}\n", "blue")
+                    frames.log(text_box, f"  💧 DO: {current_do:.2f} mg/L\n", "green")
+                    frames.log(text_box, f"  🔥 Temp: {current_temp:.2f}°C\n", "red")
+                    frames.log(text_box, f"  🌡️ Press: {current_pressure:.2f} mbar\n\n", "goldenrod")
                     updated = True
                 except ValueError as e:
-                    text_box.insert(tk.END, f"[PARSE ERR] {e}\n", "red")
-                    text_box.see(tk.END)
+                    frames.log(text_box, f"[PARSE ERR] {e}\n", "red")
 
         # ========== FORMAT 2: $PH,value ==========
         elif "$PH" in line or "$ph" in line:
@@ -170,17 +407,15 @@ def update_display(line, save_data=True):
             if len(parts) >= 2:
                 try:
                     current_ph = float(parts[1])
-                    ph_label.config(text=f"🌊 pH: {current_ph:.2f}")
+                    frames.set(ph_label, text=f"🌊 pH: {current_ph:.2f}")
                     if save_data:
                         save_sensor_data(current_time, current_ph, current_do, current_temp, current_pressure)
-                        text_box.insert(tk.END, f"[{current_time}] ✅ SAVED pH: {current_ph:.2f}\n", "green")
+                        frames.log(text_box, f"[{current_time}] ✅ SAVED pH: {current_ph:.2f}\n", "green")
                     else:
-                        text_box.insert(tk.END, f"[{current_time}] 📡 pH: {current_ph:.2f}\n", "blue")
-                    text_box.see(tk.END)
+                        frames.log(text_box, f"[{current_time}] 📡 pH: {current_ph:.2f}\n", "blue")
                     updated = True
                 except ValueError as e:
-                    text_box.insert(tk.END, f"[PH ERR] {e}\n", "red")
-                    text_box.see(tk.END)
+                    frames.log(text_box, f"[PH ERR] {e}\n", "red")
 
         # ========== FORMAT 3: $DO,value ==========
         elif "$DO" in line or "$do" in line:
@@ -188,17 +423,15 @@ def update_display(line, save_data=True):
             if len(parts) >= 2:
                 try:
                     current_do = float(parts[1])
-                    do_label.config(text=f"💧 DO: {current_do:.2f} mg/L")
+                    frames.set(do_label, text=f"💧 DO: {current_do:.2f} mg/L")
                     if save_data:
                         save_sensor_data(current_time, current_ph, current_do, current_temp, current_pressure)
-                        text_box.insert(tk.END, f"[{current_time}] ✅ SAVED DO: {current_do:.2f} mg/L\n", "green")
+                        frames.log(text_box, f"[{current_time}] ✅ SAVED DO: {current_do:.2f} mg/L\n", "green")
                     else:
-                        text_box.insert(tk.END, f"[{current_time}] 📡 DO: {current_do:.2f} mg/L\n", "green")
-                    text_box.see(tk.END)
+                        frames.log(text_box, f"[{current_time}] 📡 DO: {current_do:.2f} mg/L\n", "green")
                     updated = True
                 except ValueError as e:
-                    text_box.insert(tk.END, f"[DO ERR] {e}\n", "red")
-                    text_box.see(tk.END)
+                    frames.log(text_box, f"[DO ERR] {e}\n", "red")
 
         # ========== FORMAT 4: $TEMP or $Temp,value ==========
         elif "$TEMP" in line or "$Temp" in line or "$temp" in line:
@@ -206,34 +439,30 @@ def update_display(line, save_data=True):
             if len(parts) >= 2:
                 try:
                     current_temp = float(parts[1])
-                    temp_label.config(text=f"🔥 Temperature: {current_temp:.2f}°C")
+                    frames.set(temp_label, text=f"🔥 Temperature: {current_temp:.2f}°C")
                     if save_data:
                         save_sensor_data(current_time, current_ph, current_do, current_temp, current_pressure)
-                        text_box.insert(tk.END, f"[{current_time}] ✅ SAVED Temp: {current_temp:.2f}°C\n", "red")
+                        frames.log(text_box, f"[{current_time}] ✅ SAVED Temp: {current_temp:.2f}°C\n", "red")
                     else:
-                        text_box.insert(tk.END, f"[{current_time}] 📡 Temp: {current_temp:.2f}°C\n", "red")
-                    text_box.see(tk.END)
+                        frames.log(text_box, f"[{current_time}] 📡 Temp: {current_temp:.2f}°C\n", "red")
                     updated = True
                 except ValueError as e:
-                    text_box.insert(tk.END, f"[TEMP ERR] {e}\n", "red")
-                    text_box.see(tk.END)
+                    frames.log(text_box, f"[TEMP ERR] {e}\n", "red")
         # ========== FORMAT 5: $PRESS or $Pressure,value ==========
         elif "$PRESS" in line or "$Pressure" in line or "$press" in line:
             parts = line.split(',')
             if len(parts) >= 2:
                 try:
                     current_pressure = float(parts[1])
-                    pressure_label.config(text=f"🌡️ Pressure: {current_pressure:.2f} bar")
+                    frames.set(pressure_label, text=f"🌡️ Pressure: {current_pressure:.2f} mbar")
                     if save_data:
                         save_sensor_data(current_time, current_ph, current_do, current_temp, current_pressure)
-                        text_box.insert(tk.END, f"[{current_time}] ✅ SAVED Pressure: {current_pressure:.2f} bar\n", "goldenrod")
+                        frames.log(text_box, f"[{current_time}] ✅ SAVED Pressure: {current_pressure:.2f} mbar\n", "goldenrod")
                     else:
-                        text_box.insert(tk.END, f"[{current_time}] 📡 Pressure: {current_pressure:.2f} bar\n", "goldenrod")
-                    text_box.see(tk.END)
+                        frames.log(text_box, f"[{current_time}] 📡 Pressure: {current_pressure:.2f} mbar\n", "goldenrod")
                     updated = True
                 except ValueError as e:
-                    text_box.insert(tk.END, f"[PRESS ERR] {e}\n", "red")
-                    text_box.see(tk.END)
+                    frames.log(text_box, f"[PRESS ERR] {e}\n", "red")
 
         # ========== FORMAT 6: Simple CSV (pH,DO,Temp,Pressure) ==========
         elif ',' in line and not line.startswith('$'):
@@ -245,26 +474,24 @@ def update_display(line, save_data=True):
                     current_temp = float(parts[2])
                     current_pressure = float(parts[3])
                     
-                    ph_label.config(text=f"🌊 pH: {current_ph:.2f}")
-                    do_label.config(text=f"💧 DO: {current_do:.2f} mg/L")
-                    temp_label.config(text=f"🔥 Temperature: {current_temp:.2f}°C")
-                    pressure_label.config(text=f"🌡️ Pressure: {current_pressure:.2f} bar")
+                    frames.set(ph_label, text=f"🌊 pH: {current_ph:.2f}")
+                    frames.set(do_label, text=f"💧 DO: {current_do:.2f} mg/L")
+                    frames.set(temp_label, text=f"🔥 Temperature: {current_temp:.2f}°C")
+                    frames.set(pressure_label, text=f"🌡️ Pressure: {current_pressure:.2f} mbar")
                     
                     if save_data:
                         save_sensor_data(current_time, current_ph, current_do, current_temp, current_pressure)
-                        text_box.insert(tk.END, f"[{current_time}] ✅ SAVED TO SD CARD:\n", "green")
+                        frames.log(text_box, f"[{current_time}] ✅ SAVED TO SD CARD:\n", "green")
                     else:
-                        text_box.insert(tk.END, f"[{current_time}] 📡 LIVE READING:\n", "cyan")
+                        frames.log(text_box, f"[{current_time}] 📡 LIVE READING:\n", "cyan")
                     
-                    text_box.insert(tk.END, f"  🌊 pH: {current_ph:.2f}\n", "blue")
-                    text_box.insert(tk.END, f"  💧 DO: {current_do:.2f} mg/L\n", "green")
-                    text_box.insert(tk.END, f"  🔥 Temp: {current_temp:.2f}°C\n", "red")
-                    text_box.insert(tk.END, f"  🌡️ Press: {current_pressure:.2f} bar\n\n", "goldenrod")
-                    text_box.see(tk.END)
+                    frames.log(text_box, f"  🌊 pH: {current_ph:.2f}\n", "blue")
+                    frames.log(text_box, f"  💧 DO: {current_do:.2f} mg/L\n", "green")
+                    frames.log(text_box, f"  🔥 Temp: {current_temp:.2f}°C\n", "red")
+                    frames.log(text_box, f"  🌡️ Press: {current_pressure:.2f} mbar\n\n", "goldenrod")
                     updated = True
                 except ValueError as e:
-                    text_box.insert(tk.END, f"[CSV ERR] {e}\n", "red")
-                    text_box.see(tk.END)
+                    frames.log(text_box, f"[CSV ERR] {e}\n", "red")
 
         # ========== FORMAT 7: Multi-line formatted readings ==========
         if not updated:
@@ -273,13 +500,12 @@ def update_display(line, save_data=True):
                 match = re.search(r"PH [Vv]alue:\s*([-+]?\d*\.?\d+)", line)
                 if match:
                     current_ph = float(match.group(1))
-                    ph_label.config(text=f"🌊 pH: {current_ph:.2f}")
+                    frames.set(ph_label, text=f"🌊 pH: {current_ph:.2f}")
                     if save_data:
                         save_sensor_data(current_time, current_ph, current_do, current_temp, current_pressure)
-                        text_box.insert(tk.END, f"[{current_time}] ✅ SAVED pH: {current_ph:.2f}\n", "green")
+                        frames.log(text_box, f"[{current_time}] ✅ SAVED pH: {current_ph:.2f}\n", "green")
                     else:
-                        text_box.insert(tk.END, f"[{current_time}] 📡 pH: {current_ph:.2f}\n", "blue")
-                    text_box.see(tk.END)
+                        frames.log(text_box, f"[{current_time}] 📡 pH: {current_ph:.2f}\n", "blue")
                     updated = True
 
             # DO Value: "DO Value:   963 ug/L"
@@ -287,13 +513,12 @@ def update_display(line, save_data=True):
                 match = re.search(r"DO [Vv]alue:\s*([-+]?\d*\.?\d+)", line)
                 if match:
                     current_do = float(match.group(1))
-                    do_label.config(text=f"💧 DO: {current_do:.2f} mg/L")
+                    frames.set(do_label, text=f"💧 DO: {current_do:.2f} mg/L")
                     if save_data:
                         save_sensor_data(current_time, current_ph, current_do, current_temp, current_pressure)
-                        text_box.insert(tk.END, f"[{current_time}] ✅ SAVED DO: {current_do:.2f} mg/L\n", "green")
+                        frames.log(text_box, f"[{current_time}] ✅ SAVED DO: {current_do:.2f} mg/L\n", "green")
                     else:
-                        text_box.insert(tk.END, f"[{current_time}] 📡 DO: {current_do:.2f} mg/L\n", "green")
-                    text_box.see(tk.END)
+                        frames.log(text_box, f"[{current_time}] 📡 DO: {current_do:.2f} mg/L\n", "green")
                     updated = True
 
             # Temperature: "Temp: 27.53 °C"
@@ -301,13 +526,12 @@ def update_display(line, save_data=True):
                 match = re.search(r"[Tt]emp:\s*([-+]?\d*\.?\d+)", line)
                 if match:
                     current_temp = float(match.group(1))
-                    temp_label.config(text=f"🔥 Temperature: {current_temp:.2f}°C")
+                    frames.set(temp_label, text=f"🔥 Temperature: {current_temp:.2f}°C")
                     if save_data:
                         save_sensor_data(current_time, current_ph, current_do, current_temp, current_pressure)
-                        text_box.insert(tk.END, f"[{current_time}] ✅ SAVED Temp: {current_temp:.2f}°C\n", "red")
+                        frames.log(text_box, f"[{current_time}] ✅ SAVED Temp: {current_temp:.2f}°C\n", "red")
                     else:
-                        text_box.insert(tk.END, f"[{current_time}] 📡 Temp: {current_temp:.2f}°C\n", "red")
-                    text_box.see(tk.END)
+                        frames.log(text_box, f"[{current_time}] 📡 Temp: {current_temp:.2f}°C\n", "red")
                     updated = True
 
             # Pressure: "Pressure: 953.07 mbar"
@@ -315,27 +539,55 @@ def update_display(line, save_data=True):
                 match = re.search(r"[Pp]ressure:\s*([-+]?\d*\.?\d+)", line)
                 if match:
                     current_pressure = float(match.group(1))
-                    pressure_label.config(text=f"🌡️ Pressure: {current_pressure:.2f} bar")
+                    frames.set(pressure_label, text=f"🌡️ Pressure: {current_pressure:.2f} mbar")
                     if save_data:
                         save_sensor_data(current_time, current_ph, current_do, current_temp, current_pressure)
-                        text_box.insert(tk.END, f"[{current_time}] ✅ SAVED Pressure: {current_pressure:.2f} bar\n", "goldenrod")
+                        frames.log(text_box, f"[{current_time}] ✅ SAVED Pressure: {current_pressure:.2f} mbar\n", "goldenrod")
                     else:
-                        text_box.insert(tk.END, f"[{current_time}] 📡 Pressure: {current_pressure:.2f} bar\n", "goldenrod")
-                    text_box.see(tk.END)
+                        frames.log(text_box, f"[{current_time}] 📡 Pressure: {current_pressure:.2f} mbar\n", "goldenrod")
                     updated = True
 
         # ========== FORMAT 8: Raw fallback ==========
         if not updated:
             if line.strip() and "---" not in line and "===" not in line:
-                text_box.insert(tk.END, f"[{current_time}] RAW: {line}\n", "white")
-                text_box.see(tk.END)
+                frames.log(text_box, f"[{current_time}] RAW: {line}\n", "white")
 
     except Exception as e:
-        text_box.insert(tk.END, f"ERROR in update_display: {e}\n", "red")
-        text_box.see(tk.END)
+        frames.log(text_box, f"ERROR in update_display: {e}\n", "red")
+
+# -------------------- Complete Reading --------------------
+def show_reading(reading, selected=False):
+    """One complete reading (assembled block / dialect parser): one label refresh, one stored row
+    (selected: first reading after an interval boundary -> also the interval CSV)"""
+    global current_ph, current_do, current_temp, current_pressure
+    current_ph, current_do, current_temp, current_pressure = reading.values
+    stamp = format_stamp(reading.timestamp)
+
+    frames.set(ph_label, text=f"🌊 pH: {current_ph:.2f}")
+    frames.set(do_label, text=f"💧 DO: {current_do:.2f} mg/L")
+    frames.set(temp_label, text=f"🔥 Temperature: {current_temp:.2f}°C")
+    frames.set(pressure_label, text=f"🌡️ Pressure: {current_pressure:.2f} mbar")
+
+    if reading.saved:
+        save_sensor_data(stamp, current_ph, current_do, current_temp, current_pressure,
+                         format_stamp(reading.device_time) if reading.device_time else "")
+        frames.log(text_box, f"[{stamp}] ✅ READING:\n", "green")
+    else:
+        frames.log(text_box, f"[{stamp}] 📡 LIVE READING:\n", "cyan")
+    if selected:
+        save_interval_data(stamp, current_ph, current_do, current_temp, current_pressure)
+        frames.log(text_box, f"[{stamp}] ⏱️ INTERVAL SAMPLE\n", "cyan")
+    frames.log(text_box, f"  🌊 pH: {current_ph:.2f}\n", "blue")
+    frames.log(text_box, f"  💧 DO: {current_do:.2f} mg/L\n", "green")
+    frames.log(text_box, f"  🔥 Temp: {current_temp:.2f}°C\n", "red")
+    frames.log(text_box, f"  🌡️ Press: {current_pressure:.2f} mbar\n\n", "goldenrod")
+
+def show_raw_line(line):
+    if line.strip() and "---" not in line and "===" not in line:
+        frames.log(text_box, f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] RAW: {line}\n", "white")
 
 # -------------------- Save Sensor Data --------------------
-def save_sensor_data(timestamp, ph, do, temp, pressure):
+def save_sensor_data(timestamp, ph, do, temp, pressure, device_time=""):
     global csv_file, csv_writer, continuous_csv_file, continuous_csv_writer
     
     sensor_data_list.append({
@@ -357,13 +609,19 @@ def save_sensor_data(timestamp, ph, do, temp, pressure):
                 "pH": f"{ph:.2f}",
                 "DO": f"{do:.2f}",
                 "Temperature": f"{temp:.2f}",
-                "Pressure": f"{pressure:.2f}"
+                "Pressure": f"{pressure:.2f}",
+                "device_time": device_time
             })
             continuous_csv_file.flush()
     except Exception as e:
-        print(f"Error writing continuous CSV: {e}")
+        store_log.error("Error writing continuous CSV: %s", e)
+
+    frames.set(data_count_label, text=f"📊 Stored Readings: {len(sensor_data_list)}")
 
-    # Interval CSV
+def save_interval_data(timestamp, ph, do, temp, pressure):
+    """Interval CSV: only the readings picked at the sampling boundaries"""
+    global last_sample_time
+    last_sample_time = timestamp
     try:
         if csv_file and csv_writer:
             csv_writer.writerow({
@@ -375,9 +633,7 @@ def save_sensor_data(timestamp, ph, do, temp, pressure):
             })
             csv_file.flush()
     except Exception as e:
-        print(f"Error writing interval CSV: {e}")
-
-    data_count_label.config(text=f"📊 Stored Readings: {len(sensor_data_list)}")
+        store_log.error("Error writing interval CSV: %s", e)
 
 # -------------------------------------------
 # TIME SAMPLING DIALOG (VERY LARGE)
@@ -508,7 +764,106 @@ def open_time_sampling_dialog():
     seconds_spinbox.delete(0, tk.END)
     seconds_spinbox.insert(0, "0")
 
+    # ---------------- TRIGGER ----------------
+    mode_frame = tk.LabelFrame(
+        sampling_window, text="📟 At each boundary",
+        font=("Arial", 11, "bold"), bg="#f0f0f0", fg="#007A99"
+    )
+    mode_frame.pack(pady=10, padx=20, fill="x")
+    mode_var = tk.StringVar(value="select")
+    tk.Radiobutton(mode_frame, text="📥 Keep the next incoming reading", variable=mode_var,
+                   value="select", bg="#f0f0f0").pack(anchor="w", padx=10)
+    tk.Radiobutton(mode_frame, text="📟 Send NOW (logger must be awake)", variable=mode_var,
+                   value="now", bg="#f0f0f0").pack(anchor="w", padx=10)
+
+    status_text = tk.Label(sampling_window, text=describe_sampling(), font=("Arial", 9),
+                           bg="#f0f0f0", fg="#333", justify="left")
+    status_text.pack(pady=5)
+
     # -------------------------------------------------
     # BUTTONS: START / STOP SAMPLING
     # -------------------------------------------------
+    def read_time(hour, minute, second):
+        return dtime(int(hour.get()), int(minute.get()), int(second.get()))
+
+    def on_start():
+        try:
+            window = DailyWindow(read_time(start_hour_spinbox, start_minute_spinbox, start_second_spinbox),
+                                 read_time(end_hour_spinbox, end_minute_spinbox, end_second_spinbox))
+            plan = SamplingPlan(int(minutes_spinbox.get()) * 60 + int(seconds_spinbox.get()), (window,))
+        except ValueError as e:
+            messagebox.showerror("Time-Based Sampling", f"Invalid settings: {e}", parent=sampling_window)
+            return
+        if start_time_sampling(plan, mode_var.get()):
+            status_text.config(text=describe_sampling())
+
+    def on_stop():
+        stop_time_sampling()
+        status_text.config(text=describe_sampling())
+
+    button_frame = tk.Frame(sampling_window, bg="#f0f0f0")
+    button_frame.pack(pady=15)
+    tk.Button(button_frame, text="▶️ Start Sampling", command=on_start, bg="#28a745", fg="white",
+              font=("Arial", 10, "bold"), width=16).grid(row=0, column=0, padx=10)
+    tk.Button(button_frame, text="⏹️ Stop Sampling", command=on_stop, bg="#dc3545", fg="white",
+              font=("Arial", 10, "bold"), width=16).grid(row=0, column=1, padx=10)
+
+def start_time_sampling(plan, mode):
+    """Open the interval CSV and schedule the plan's boundaries (Tk thread)"""
+    global sampling_job, sampling_enabled, sampling_interval_seconds, start_time_set, end_time_set
+    global csv_file, csv_writer, csv_file_path
+    path = filedialog.asksaveasfilename(parent=sampling_window, title="Interval CSV",
+                                        defaultextension=".csv", filetypes=[("CSV", "*.csv")],
+                                        initialfile=f"interval_{datetime.now():%Y%m%d_%H%M%S}.csv")
+    if not path:
+        return False
+    stop_time_sampling()
+    try:
+        csv_file = open(path, "w", newline="", encoding="utf-8")
+    except OSError as e:
+        messagebox.showerror("Time-Based Sampling", f"Cannot open {path}: {e}", parent=sampling_window)
+        return False
+    csv_file_path = path
+    csv_writer = csv.DictWriter(csv_file, fieldnames=["timestamp", "pH", "DO", "Temperature", "Pressure"])
+    csv_writer.writeheader()
+
+    window = plan.windows[0]
+    sampling_enabled = True
+    sampling_interval_seconds = plan.interval_s
+    start_time_set, end_time_set = window.start.strftime("%H:%M:%S"), window.end.strftime("%H:%M:%S")
+    reading_selector.clear()
+    sampling_job = sampling_scheduler.add(SAMPLING_JOB, plan, lambda b, l: on_sampling_boundary(b, l, mode))
+    show_link_message(f"⏱️ Interval sampling every {plan.interval_s:g} s between {start_time_set} "
+                      f"and {end_time_set} -> {path}", "cyan")
+    return True
+
+def stop_time_sampling():
+    global sampling_job, sampling_enabled, csv_file, csv_writer
+    if sampling_job is None:
+        return
+    sampling_scheduler.cancel(SAMPLING_JOB)
+    sampling_job, sampling_enabled = None, False
+    reading_selector.clear()
+    if csv_file:
+        csv_file.close()
+    csv_file = csv_writer = None
+    show_link_message(f"⏹️ Interval sampling stopped ({reading_selector.selected} samples, "
+                      f"{reading_selector.missed} boundaries without a reading)", "goldenrod")
+
+def on_sampling_boundary(boundary, lateness, mode):
+    """Scheduler thread: keep it short, never touch widgets here"""
+    reading_selector.mark()
+    if mode == "now" and command_client:
+        run_device_command("NOW", command_client.sample_now())
+    stamp = boundary.strftime("%H:%M:%S")
+    show_link_message(f"⏱️ Sampling boundary {stamp} ({lateness * 1000:.1f} ms late)", "white")
+
+def describe_sampling():
+    if sampling_job is None:
+        return "Not sampling"
+    next_at = sampling_job.boundary.strftime("%Y-%m-%d %H:%M:%S") if sampling_job.boundary else "never"
+    return (f"Sampling every {sampling_interval_seconds:g} s, {start_time_set} - {end_time_set}\n"
+            f"Next boundary: {next_at}   fired: {sampling_job.fired}   skipped: {sampling_job.missed}")
+
+frames.attach(root)
 root.mainloop()
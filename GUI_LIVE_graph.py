@@ -8,25 +8,96 @@ import csv
 import serial.tools.list_ports
 from datetime import datetime, timedelta
 import sys
+import os
 import re
+import numpy as np
+from calibration import CalibrationManager, device_id_for_port
+from sensor_logging import setup_logging, get_logger, RateLimiter
+from port_discovery import PortDiscovery
+from sensor_store import SensorStore, LazyRangeLoader, CHANNELS, from_epoch
+from export_jobs import ExportJob, available_formats
+from figure_export import FigureExporter, build_sensor_figure, snapshot_from_figure
+from instrumentation import metrics
+from serial_link import SerialLink
+from reading_bus import ReadingBus, Reading, DROP_OLDEST, DROP_NEWEST
+from session_replay import SessionRecorder, ReplayLink, SPEEDS
+from telemetry import StreamDecoder, CMD_BINARY, ACK_PREFIX
+from calibration import reprocess
+from ingest import Ingest, frame_readings
+from datalog import DatalogFile, array_raw_fields
+from clock_sync import host_clock, format_stamp
+from ui_frames import frames
+from event_log import EventLog, parse_event, range_start, KINDS, KIND_LABELS, RANGES, READING, SLEEP, WAKE, OK, FAIL
 import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
 import matplotlib.dates as mdates
 
 # -------------------- CONFIG --------------------
 BAUD = 115200
 SERIAL_TIMEOUT = 1.0
+REQUEST_BINARY_TELEMETRY = True   # ask the firmware for binary $Params frames at connect
+DISPLAY_INTERVAL_MS = 100         # how often the display subscriber drains the bus
+CSV_QUEUE = 100000                # readings the CSV writer may fall behind before new ones are dropped
+HISTORY_ROWS = 10000              # newest saved readings kept in memory (the count keeps going)
+RECORD_SESSIONS = True            # keep the raw serial traffic of every connection for replay
+SESSION_DIR = "sessions"
+
+# -------------------- Logging --------------------
+setup_logging("GUI_LIVE_graph")
+serial_log = get_logger("serial")
+rx_log = get_logger("rx")
+sd_log = get_logger("sd")
+store_log = get_logger("store")
+ui_error_limiter = RateLimiter()   # repeated [SERIAL ERROR]/[READ ERROR] lines in the text box
 
 # -------------------- Global Variables --------------------
 ser = None
+port_discovery = PortDiscovery()   # remembers which logger we connected to last
 sensor_data_list = []
+saved_reading_count = 0            # SAVED readings this session (sensor_data_list is bounded)
 csv_file_path = None
 csv_writer = None
 csv_file = None
 continuous_csv_file = None
 continuous_csv_writer = None
 
+# Calibration profiles (loaded once, applied per reading)
+calibration = CalibrationManager()
+active_calibration = calibration.active()
+
+# Reading history (persists across sessions; graphs query it by time range)
+sensor_store = SensorStore()
+live_store = sensor_store        # swapped for an in-memory store while replaying
+
+# Raw session recording (this connection)
+session_recorder = None
+
+# Off-thread, cached 300 dpi figure export
+figure_exporter = FigureExporter()
+
+# Serial stream decoding (text lines + binary $Params frames)
+stream_decoder = StreamDecoder()
+telemetry_mode = "TEXT"
+
+# Reading bus: display, CSV writer and graph windows subscribe to it
+reading_bus = ReadingBus()
+csv_lock = threading.Lock()      # CSV subscriber thread vs connect/disconnect opening/closing files
+
+# Sequence gap / duplicate detection, SAVED reading storage and SD backfill (see ingest.py)
+def send_command(data):
+    """Backfill requests are not queued while the link is down: ingest re-issues them"""
+    ser.write(data, queue=False)
+    ser.flush()
+
+def backfill_ready():
+    """A DOWNLOAD_SD_RANGE may go out: link up, live (not a replay), no user download running"""
+    return (ser is not None and getattr(ser, "connected", False) and not getattr(ser, "replay", False)
+            and not sd_download_active)
+
+ingest = Ingest(sensor_store, reading_bus.publish, send_command, backfill_ready, profile=active_calibration,
+                notify=lambda text, tag: frames.log(text_box, text + "\n", tag))
+
 # runtime flags / thread handles
 is_reading = False
 read_thread = None
@@ -45,36 +116,60 @@ last_saved_reading_time = None
 sd_download_active = False
 sd_download_buffer = []
 sd_download_file = None
+sd_download_started = None
+
+# Device status messages (READING #, Sleeping, ✓/✗ ...), indexed for the Events window
+event_log = EventLog()
 
 # Graph window reference
 graph_window = None
+metrics_window = None
+events_window = None
+
+# Hot-path metrics (see instrumentation.py)
+serial_lines = metrics.counter("serial.lines", "Lines received from the Teensy")
+serial_bytes = metrics.counter("serial.bytes", "Bytes received from the Teensy")
+serial_errors = metrics.counter("serial.errors", "Serial read exceptions")
+params_parsed = metrics.counter("params.parsed", "$Params frames parsed")
+params_errors = metrics.counter("params.errors", "$Params frames that failed to parse")
+binary_frames = metrics.counter("params.binary_frames", "Binary $Params frames decoded")
+link_reconnects = metrics.counter("link.reconnects", "Serial port reopened after a disconnect")
+link_downtime = metrics.histogram("link.downtime", "Seconds without a serial port per disconnect",
+                                  buckets=(1, 5, 15, 60, 300, 900, 3600))
+link_connected = metrics.gauge("link.connected", "1 while the serial port is open")
+tk_dispatch_lag = metrics.histogram("tk.dispatch_lag", "Bytes read -> Tk main loop handoff delay")
+sd_lines = metrics.counter("sd.lines", "Lines received during SD downloads")
+sd_download_time = metrics.histogram("sd.download", "Duration of complete SD downloads",
+                                     buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800))
 
 # -------------------- Find Teensy Port --------------------
 def find_teensy_port():
-    """Automatically detect Teensy port"""
-    ports = serial.tools.list_ports.comports()
-    print("\n🔍 Scanning for Teensy...")
-    for port in ports:
-        print(f"  📍 {port.device} - {port.description}")
-        desc = (port.description or "").lower()
-        dev = (port.device or "").lower()
-        if "teensy" in desc or "teensy" in dev:
-            print(f"  ✅ Found Teensy!")
-            return port.device
-        if "usbmodem" in dev or "ttyacm" in dev or "usbserial" in dev:
-            print(f"  ✅ Found USB Serial Device!")
-            return port.device
-        if getattr(port, "vid", None) == 0x16C0:
-            print(f"  ✅ Found Teensy by VID!")
-            return port.device
-    print("  ❌ No Teensy found")
-    return None
+    """Detect the Teensy logger (cached VID/PID/serial identity, see port_discovery)"""
+    port = port_discovery.find()
+    if port:
+        serial_log.info("✅ Found Teensy on %s", port)
+    else:
+        serial_log.warning("  ❌ No Teensy found")
+    return port
 
 # -------------------- Serial Reading Thread --------------------
+def dispatch_items(items, arrival):
+    """Hand decoded text lines / frame runs to the Tk thread
+    (arrival: time.monotonic() when their bytes were read)"""
+    for item in items:
+        if isinstance(item, str):
+            serial_lines.inc()
+            rx_log.debug("📥 RECEIVED: %s", item)
+            frames.post(lambda l=item, t=arrival: dispatch_line(l, t))
+        else:
+            binary_frames.inc(len(item))
+            rx_log.debug("📥 RECEIVED: %d binary frame(s)", len(item))
+            frames.post(lambda f=item, t=arrival: dispatch_frames(f, t))
+
 def read_serial_data():
     """Continuously read data from Teensy and update display"""
     global ser, is_reading, read_thread_stop
-    print("📡 Serial reading thread started")
+    serial_log.info("📡 Serial reading thread started")
     try:
         while not read_thread_stop.is_set() and is_reading:
             if ser is None or not getattr(ser, "is_open", False):
@@ -82,59 +177,175 @@ def read_serial_data():
                 continue
 
             try:
-                if getattr(ser, "in_waiting", 0) > 0:
-                    raw = ser.readline()
-                    if not raw:
-                        continue
-                    try:
-                        line = raw.decode("utf-8", errors="ignore").strip()
-                    except Exception:
-                        line = raw.decode("latin-1", errors="ignore").strip()
-                    if line:
-                        print(f"📥 RECEIVED: {line}")
-                        root.after(0, lambda l=line: update_display(l))
-                else:
+                # Read everything buffered; the decoder splits text lines and binary frames.
+                # While the link is down this retries the port (with backoff) instead.
+                with metrics.timer("serial.read"):
+                    raw = ser.read_available()
+                arrival = time.monotonic()
+                if not raw:
                     time.sleep(0.02)
+                    continue
+                serial_bytes.inc(len(raw))
+                dispatch_items(stream_decoder.feed(raw), arrival)
             except (serial.SerialException, OSError) as e:
-                print(f"❌ Serial Exception in read loop: {e}")
-                try:
-                    text_box.insert(tk.END, f"[SERIAL ERROR] {e}\n", "red")
-                    text_box.see(tk.END)
-                except:
-                    pass
-                is_reading = False
-                read_thread_stop.set()
-                try:
-                    if ser:
-                        ser.close()
-                except:
-                    pass
-                ser = None
-                break
+                # SerialLink has dropped the dead handle and will reconnect
+                serial_errors.inc()
+                serial_log.error("❌ Serial exception in read loop: %s", e)
+                partial = stream_decoder.flush()
+                if partial:
+                    serial_log.warning("✂️ Discarded %d byte(s) cut off by the disconnect: %r",
+                                       len(partial), partial[:80])
+                allowed, repeats = ui_error_limiter.allow("SERIAL ERROR")
+                if allowed:
+                    note = f" (+{repeats} repeats)" if repeats else ""
+                    frames.log(text_box, f"[SERIAL ERROR] {e}{note}\n", "red")
             except Exception as e:
-                print(f"❌ Unexpected read error: {e}")
-                try:
-                    text_box.insert(tk.END, f"[READ ERROR] {e}\n", "red")
-                    text_box.see(tk.END)
-                except:
-                    pass
+                serial_errors.inc()
+                serial_log.error("❌ Unexpected read error: %s", e)
+                allowed, repeats = ui_error_limiter.allow("READ ERROR")
+                if allowed:
+                    note = f" (+{repeats} repeats)" if repeats else ""
+                    frames.log(text_box, f"[READ ERROR] {e}{note}\n", "red")
                 time.sleep(0.2)
     finally:
-        print("📴 Serial reading thread exiting")
+        serial_log.info("📴 Serial reading thread exiting")
+
+# -------------------- Connection Supervisor Callbacks --------------------
+def on_link_lost(error):
+    """Reader thread: the port died; SerialLink is already retrying"""
+    link_connected.set(0)
+    frames.post(lambda: show_link_state(f"⚠️ Link lost ({error}) - reconnecting...", "red"))
+
+def on_link_restored(port, seconds_down):
+    """Reader thread: SerialLink reopened the (possibly renamed) port"""
+    link_reconnects.inc()
+    link_downtime.observe(seconds_down)
+    link_connected.set(1)
+    # The Teensy may have reset: it boots in text mode and forgot any range request
+    if REQUEST_BINARY_TELEMETRY:
+        ser.write(CMD_BINARY)
+        ser.flush()
+    frames.post(lambda: resume_after_reconnect(port, seconds_down))
+
+def show_link_state(message, tag):
+    frames.log(text_box, message + "\n", tag)
+    frames.set(status_label, text="📊 Status: Reconnecting...", fg="#FFA500")
+
+def resume_after_reconnect(port, seconds_down):
+    if ser is None:
+        return          # user disconnected meanwhile
+    show_link_state(f"✅ Reconnected to {port} after {seconds_down:.1f} s "
+                    f"(reconnects: {ser.reconnects}, total downtime: {ser.total_downtime():.1f} s)", "green")
+    frames.set(status_label, text="📊 Status: Connected - Monitoring", fg="#00BFFF")
+    # A cut-off range reply is asked for again (duplicates are ignored by the store)
+    ingest.interrupted()
+    if sd_download_active:
+        update_display("SD_DOWNLOAD_ERROR: connection lost during transfer, please retry")
+    ingest.next_backfill()
+
+# -------------------- Publish Reading --------------------
+def publish_reading(is_saved_reading, reading_id=None, arrival=None):
+    """Store SAVED readings, then publish the current values on the reading bus.
+
+    Display, CSV and graph windows are bus subscribers; nothing here touches them.
+    The reading is stamped with its bytes' arrival time (see dispatch_items).
+    """
+    stamp = host_clock.to_datetime(arrival) if arrival is not None else datetime.now()
+    ingest.accept(Reading(stamp, current_ph, current_do, current_temp, current_pressure,
+                          is_saved_reading, reading_id if is_saved_reading else None))
+
+# -------------------- Display Subscriber --------------------
+def pump_display():
+    """Tk-side consumer of the bus: render whatever arrived since the last pass"""
+    batch = display_sub.drain()
+    if batch:
+        render_readings(batch)
+    root.after(DISPLAY_INTERVAL_MS, pump_display)
+
+def render_readings(batch):
+    """Labels show the newest reading; the text box logs each one"""
+    batch = [r for r in batch if r.source == "live"]    # backfill has its own summary line
+    if not batch:
+        return
+    latest = batch[-1]
+    frames.set(ph_label, text=f"🌊 pH: {latest.ph:.2f}")
+    frames.set(do_label, text=f"💧 DO: {latest.do:.2f} mg/L")
+    frames.set(temp_label, text=f"🔥 Temperature: {latest.temp:.2f}°C")
+    frames.set(pressure_label, text=f"🌡️ Pressure: {latest.pressure:.2f} mbar")
+
+    for reading in batch:
+        current_time = format_stamp(reading.timestamp)
+        if reading.saved:
+            frames.log(text_box, f"\n{'='*70}\n", "white")
+            frames.log(text_box, f"[{current_time}] ✅ SD CARD READING SAVED:\n", "green")
+            frames.log(text_box, f"{'='*70}\n", "white")
+            frames.log(text_box, f"  🌊 pH: {reading.ph:.2f}\n", "blue")
+            frames.log(text_box, f"  💧 DO: {reading.do:.2f} mg/L\n", "green")
+            frames.log(text_box, f"  🔥 Temp: {reading.temp:.2f}°C\n", "red")
+            frames.log(text_box, f"  🌡️ Pressure: {reading.pressure:.2f} mbar\n", "goldenrod")
+            frames.log(text_box, f"  💾 Saved to: SD Card + CSV File\n", "cyan")
+            frames.log(text_box, f"{'='*70}\n\n", "white")
+        else:
+            frames.log(text_box, f"[{current_time}] 💓 Heartbeat - Display Updated\n", "cyan")
+
+    if any(r.saved for r in batch):
+        frames.set(data_count_label, text=f"📊 Saved Readings: {saved_reading_count}")
+        frames.flash(status_label, 3000, {"text": "📊 Status: Connected - Monitoring", "fg": "#00BFFF"},
+                     text="📊 Status: Reading Saved to SD + CSV", fg="#00FF00")
+    else:
+        frames.set(status_label, text="📊 Status: Live Display Update", fg="#00BFFF")
+
+# -------------------- Line / Frame Dispatch --------------------
+def captured_by_download(line):
+    """Is this line part of the running DOWNLOAD_SD? Live $Params lines keep their normal path"""
+    if line.startswith("SD_DOWNLOAD"):
+        return True
+    return "$Params" not in line and "$params" not in line and not line.startswith(ACK_PREFIX)
+
+def dispatch_line(line, arrival):
+    """Runs on the Tk thread for every received line"""
+    tk_dispatch_lag.observe(time.monotonic() - arrival)
+    update_display(line, arrival)
+
+@metrics.timed("update_display.frames", "Calibrate + display one batch of binary frames")
+def dispatch_frames(frames, arrival):
+    """Runs on the Tk thread for every run of binary $Params frames"""
+    global current_ph, current_do, current_temp, current_pressure, last_saved_reading_time
+    tk_dispatch_lag.observe(time.monotonic() - arrival)
+    params_parsed.inc(len(frames))
+    frames = frames[ingest.track(frames["seq"])]
+    if not len(frames):
+        return                              # all re-sent: already shown / stored
+    readings = frame_readings(frames, active_calibration, host_clock.to_datetime(arrival))
+
+    # Every SAVED reading is stored; of the LIVE ones only the newest is shown
+    show = [r for r in readings if r.saved]
+    if not readings[-1].saved:
+        show.append(readings[-1])
+    for reading in show:
+        current_ph, current_do, current_temp, current_pressure = reading.values
+        if reading.saved:
+            last_saved_reading_time = datetime.now()
+        ingest.accept(reading)
 
 # -------------------- Update Display with Synchronized Output --------------------
-def update_display(line):
+@metrics.timed("update_display", "Parse + widget update per received line")
+def update_display(line, arrival=None):
     """Parse incoming data and update GUI labels with sensor values"""
     global current_ph, current_do, current_temp, current_pressure, last_saved_reading_time
-    global sd_download_active, sd_download_buffer, sd_download_file
+    global sd_download_active, sd_download_buffer, sd_download_file, telemetry_mode
 
     try:
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         updated = False
         is_saved_reading = False
 
+        # ========== SD BACKFILL (DOWNLOAD_SD_RANGE reply) ==========
+        if ingest.capture(line):
+            return
+
         # ========== SD DOWNLOAD PROTOCOL ==========
-        if sd_download_active:
+        if sd_download_active and captured_by_download(line):
             if line == "SD_DOWNLOAD_END":
                 # Download complete
                 if sd_download_file:
@@ -142,11 +353,12 @@ def update_display(line):
                     sd_download_file.close()
                     sd_download_file = None
                     
-                text_box.insert(tk.END, f"\n{'='*70}\n", "green")
-                text_box.insert(tk.END, f"✅ SD CARD DOWNLOAD COMPLETE!\n", "green")
-                text_box.insert(tk.END, f"📊 Total lines received: {len(sd_download_buffer)}\n", "cyan")
-                text_box.insert(tk.END, f"{'='*70}\n\n", "green")
-                text_box.see(tk.END)
+                frames.log(text_box, f"\n{'='*70}\n", "green")
+                frames.log(text_box, f"✅ SD CARD DOWNLOAD COMPLETE!\n", "green")
+                frames.log(text_box, f"📊 Total lines received: {len(sd_download_buffer)}\n", "cyan")
+                frames.log(text_box, f"{'='*70}\n\n", "green")
+                if sd_download_started is not None:
+                    sd_download_time.observe(time.perf_counter() - sd_download_started)
                 
                 messagebox.showinfo("Download Complete", 
                     f"✅ SD Card data downloaded successfully!\n\n"
@@ -156,7 +368,8 @@ def update_display(line):
                 sd_download_active = False
                 sd_download_buffer = []
                 download_sd_button.config(state="normal", text="📥 Download SD Card")
-                status_label.config(text="📊 Status: Connected - Monitoring", fg="#00BFFF")
+                frames.set(status_label, text="📊 Status: Connected - Monitoring", fg="#00BFFF")
+                ingest.next_backfill()      # ranges queued during the download
                 return
             
             elif line.startswith("SD_DOWNLOAD_ERROR"):
@@ -165,8 +378,7 @@ def update_display(line):
                     sd_download_file.close()
                     sd_download_file = None
                 
-                text_box.insert(tk.END, f"\n❌ SD DOWNLOAD ERROR: {line}\n\n", "red")
-                text_box.see(tk.END)
+                frames.log(text_box, f"\n❌ SD DOWNLOAD ERROR: {line}\n\n", "red")
                 
                 messagebox.showerror("Download Error", 
                     f"❌ SD Card download failed:\n\n{line}")
@@ -174,144 +386,129 @@ def update_display(line):
                 sd_download_active = False
                 sd_download_buffer = []
                 download_sd_button.config(state="normal", text="📥 Download SD Card")
-                status_label.config(text="📊 Status: Connected - Monitoring", fg="#00BFFF")
+                frames.set(status_label, text="📊 Status: Connected - Monitoring", fg="#00BFFF")
+                ingest.next_backfill()      # ranges queued during the download
                 return
             
             elif line.startswith("SD_DOWNLOAD_PROGRESS"):
                 # Progress update
                 parts = line.split(":")
                 if len(parts) > 1:
-                    text_box.insert(tk.END, f"📥 {parts[1]}\n", "cyan")
-                    text_box.see(tk.END)
+                    frames.log(text_box, f"📥 {parts[1]}\n", "cyan")
                 return
             
             else:
                 # Regular SD data line
                 sd_download_buffer.append(line)
+                sd_lines.inc()
                 
                 # Update progress every 50 lines
                 if len(sd_download_buffer) % 50 == 0:
-                    text_box.insert(tk.END, f"📥 Received {len(sd_download_buffer)} lines...\n", "cyan")
-                    text_box.see(tk.END)
+                    frames.log(text_box, f"📥 Received {len(sd_download_buffer)} lines...\n", "cyan")
                 return
 
+        # ========== TELEMETRY NEGOTIATION: TELEMETRY_MODE:BINARY|TEXT ==========
+        if line.startswith(ACK_PREFIX):
+            telemetry_mode = line[len(ACK_PREFIX):].strip().upper()
+            serial_log.info("Telemetry mode: %s", telemetry_mode)
+            frames.log(text_box, f"📡 Telemetry mode: {telemetry_mode}\n", "cyan")
+            return
+
         # ========== PRIMARY FORMAT: $Params,pH*100,DO*10,Temp*50,Pressure*1000,FLAG ==========
         if "$Params" in line or "$params" in line:
             parts = line.split(',')
             if len(parts) >= 5:
                 try:
-                    current_ph = float(parts[1]) / 100.0
-                    current_do = float(parts[2]) / 10.0
-                    current_temp = float(parts[3]) / 50.0
-                    current_pressure = float(parts[4]) / 1000.0
+                    current_ph, current_do, current_temp, current_pressure = active_calibration.apply(parts[1:5])
+                    params_parsed.inc()
+                    
+                    # Newer firmware appends ,<seq>,<reading id>
+                    reading_id = None
+                    if len(parts) >= 8:
+                        if not ingest.track([int(parts[6])])[0]:
+                            return
+                        reading_id = int(parts[7])
                     
                     if len(parts) >= 6 and "SAVED" in parts[5].upper():
                         is_saved_reading = True
                         last_saved_reading_time = datetime.now()
                     
-                    ph_label.config(text=f"🌊 pH: {current_ph:.2f}")
-                    do_label.config(text=f"💧 DO: {current_do:.2f} mg/L")
-                    temp_label.config(text=f"🔥 Temperature: {current_temp:.2f}°C")
-                    pressure_label.config(text=f"🌡️ Pressure: {current_pressure:.2f} mbar")
-                    
-                    if is_saved_reading:
-                        save_sensor_data(current_time, current_ph, current_do, current_temp, current_pressure)
-                        text_box.insert(tk.END, f"\n{'='*70}\n", "white")
-                        text_box.insert(tk.END, f"[{current_time}] ✅ SD CARD READING SAVED:\n", "green")
-                        text_box.insert(tk.END, f"{'='*70}\n", "white")
-                        text_box.insert(tk.END, f"  🌊 pH: {current_ph:.2f}\n", "blue")
-                        text_box.insert(tk.END, f"  💧 DO: {current_do:.2f} mg/L\n", "green")
-                        text_box.insert(tk.END, f"  🔥 Temp: {current_temp:.2f}°C\n", "red")
-                        text_box.insert(tk.END, f"  🌡️ Pressure: {current_pressure:.2f} mbar\n", "goldenrod")
-                        text_box.insert(tk.END, f"  💾 Saved to: SD Card + CSV File\n", "cyan")
-                        text_box.insert(tk.END, f"{'='*70}\n\n", "white")
-                        
-                        status_label.config(text="📊 Status: Reading Saved to SD + CSV", fg="#00FF00")
-                        root.after(3000, lambda: status_label.config(text="📊 Status: Connected - Monitoring", fg="#00BFFF"))
-                    else:
-                        text_box.insert(tk.END, f"[{current_time}] 💓 Heartbeat - Display Updated\n", "cyan")
-                        status_label.config(text="📊 Status: Live Display Update", fg="#00BFFF")
-                    
-                    text_box.see(tk.END)
+                    publish_reading(is_saved_reading, reading_id, arrival)
                     updated = True
                     
                 except ValueError as e:
-                    text_box.insert(tk.END, f"[PARSE ERR] {e}\n", "red")
-                    text_box.see(tk.END)
+                    params_errors.inc()
+                    frames.log(text_box, f"[PARSE ERR] {e}\n", "red")
+
 
         # ========== Show system messages ==========
         if not updated:
-            if any(keyword in line for keyword in ["READING #", "Time:", "Sleeping", "WAKING UP", 
-                                                    "SD card", "Counter", "Runtime", "Temperature sensor",
-                                                    "Pressure sensor", "Duration"]):
-                if "READING #" in line:
-                    text_box.insert(tk.END, f"\n{'='*70}\n", "yellow")
-                    text_box.insert(tk.END, f"{line}\n", "yellow")
-                    text_box.insert(tk.END, f"{'='*70}\n", "yellow")
-                elif "Sleeping" in line:
-                    text_box.insert(tk.END, f"\n😴 {line}\n", "cyan")
-                    text_box.insert(tk.END, "⏰ Next reading in 30 minutes...\n", "yellow")
-                    text_box.insert(tk.END, "💓 Display will remain updated with heartbeat data\n\n", "cyan")
-                    status_label.config(text="😴 Status: Sleeping (Next reading in 30 min)", fg="#FFA500")
-                elif "WAKING UP" in line:
-                    text_box.insert(tk.END, f"\n⏰ {line}\n", "green")
-                    text_box.insert(tk.END, "📊 Taking scheduled reading...\n\n", "green")
-                    status_label.config(text="⏰ Status: Taking Reading", fg="#00FF00")
-                elif "✓" in line or "✗" in line:
-                    color = "green" if "✓" in line else "red"
-                    text_box.insert(tk.END, f"{line}\n", color)
+            event = parse_event(line, host_clock.to_epoch(arrival) if arrival is not None else None)
+            if event is not None:
+                if not getattr(ser, "replay", False):
+                    event_log.append(event)
+                if event.kind == READING:
+                    frames.log(text_box, f"\n{'='*70}\n", "yellow")
+                    frames.log(text_box, f"{line}\n", "yellow")
+                    frames.log(text_box, f"{'='*70}\n", "yellow")
+                elif event.kind == SLEEP:
+                    frames.log(text_box, f"\n😴 {line}\n", "cyan")
+                    frames.log(text_box, "⏰ Next reading in 30 minutes...\n", "yellow")
+                    frames.log(text_box, "💓 Display will remain updated with heartbeat data\n\n", "cyan")
+                    frames.set(status_label, text="😴 Status: Sleeping (Next reading in 30 min)", fg="#FFA500")
+                elif event.kind == WAKE:
+                    frames.log(text_box, f"\n⏰ {line}\n", "green")
+                    frames.log(text_box, "📊 Taking scheduled reading...\n\n", "green")
+                    frames.set(status_label, text="⏰ Status: Taking Reading", fg="#00FF00")
+                elif event.kind in (OK, FAIL):
+                    frames.log(text_box, f"{line}\n", "green" if event.kind == OK else "red")
                 else:
-                    text_box.insert(tk.END, f"{line}\n", "white")
-                text_box.see(tk.END)
+                    frames.log(text_box, f"{line}\n", "white")
 
     except Exception as e:
-        text_box.insert(tk.END, f"ERROR in update_display: {e}\n", "red")
-        text_box.see(tk.END)
+        frames.log(text_box, f"ERROR in update_display: {e}\n", "red")
 
 # -------------------- Save Sensor Data --------------------
-def save_sensor_data(timestamp, ph, do, temp, pressure):
-    """Store sensor readings and save to BOTH continuous and interval CSV files"""
-    global csv_file, csv_writer, continuous_csv_file, continuous_csv_writer
-    
-    sensor_data_list.append({
-        "timestamp": timestamp,
-        "pH": f"{ph:.2f}",
-        "DO": f"{do:.2f}",
-        "Temperature": f"{temp:.2f}",
-        "Pressure": f"{pressure:.2f}"
-    })
-
-    if len(sensor_data_list) > 10000:
-        sensor_data_list.pop(0)
-
-    try:
-        if continuous_csv_file and continuous_csv_writer:
-            continuous_csv_writer.writerow({
-                "timestamp": timestamp,
-                "pH": f"{ph:.2f}",
-                "DO": f"{do:.2f}",
-                "Temperature": f"{temp:.2f}",
-                "Pressure": f"{pressure:.2f}"
-            })
-            continuous_csv_file.flush()
-    except Exception as e:
-        print(f"Error writing to continuous CSV: {e}")
-
-    data_count_label.config(text=f"📊 Saved Readings: {len(sensor_data_list)}")
+def write_csv_rows(batch):
+    """CSV subscriber (own thread): history list + continuous CSV, one flush per batch"""
+    global saved_reading_count
+    rows = [r.as_row() for r in batch if r.saved and r.source == "live"]
+    if not rows:
+        return
+    with csv_lock:
+        saved_reading_count += len(rows)
+        sensor_data_list.extend(rows)
+        del sensor_data_list[:-HISTORY_ROWS]
+        try:
+            if continuous_csv_file and continuous_csv_writer:
+                with metrics.timer("csv.write_flush"):
+                    continuous_csv_writer.writerows(rows)
+                    continuous_csv_file.flush()
+        except Exception as e:
+            store_log.error("Error writing to continuous CSV: %s", e)
 
 # -------------------- Download SD Card Data --------------------
 def download_sd_card():
     """Request SD card data download from Teensy"""
-    global ser, sd_download_active, sd_download_buffer, sd_download_file
+    global ser, sd_download_active, sd_download_buffer, sd_download_file, sd_download_started
 
     if not ser or not getattr(ser, "is_open", False):
         messagebox.showerror("Not Connected", "⚠️ Please connect to Teensy first!")
         return
 
+    if not getattr(ser, "connected", False):
+        messagebox.showwarning("Reconnecting", "⚠️ Teensy link is down, reconnecting - try again shortly.")
+        return
+
     if sd_download_active:
         messagebox.showwarning("Download Active", "⚠️ SD download already in progress!")
         return
 
+    if ingest.backfill_active:
+        messagebox.showwarning("Backfill Active", "⚠️ Missed readings are being fetched from the SD card - "
+                                                  "try again shortly.")
+        return
+
     # Ask user for save location
     file_path = filedialog.asksaveasfilename(
         defaultextension=".txt",
@@ -327,23 +524,23 @@ def download_sd_card():
         sd_download_file = open(file_path, 'w')
         sd_download_buffer = []
         sd_download_active = True
+        sd_download_started = time.perf_counter()
 
         # Update UI
         download_sd_button.config(state="disabled", text="⏳ Downloading...")
-        status_label.config(text="📥 Status: Downloading SD Card...", fg="#FFA500")
+        frames.set(status_label, text="📥 Status: Downloading SD Card...", fg="#FFA500")
 
-        text_box.insert(tk.END, f"\n{'='*70}\n", "cyan")
-        text_box.insert(tk.END, f"📥 REQUESTING SD CARD DOWNLOAD\n", "cyan")
-        text_box.insert(tk.END, f"{'='*70}\n", "cyan")
-        text_box.insert(tk.END, f"💾 Save location: {file_path}\n", "yellow")
-        text_box.insert(tk.END, f"⏳ Waiting for Teensy response...\n\n", "yellow")
-        text_box.see(tk.END)
+        frames.log(text_box, f"\n{'='*70}\n", "cyan")
+        frames.log(text_box, f"📥 REQUESTING SD CARD DOWNLOAD\n", "cyan")
+        frames.log(text_box, f"{'='*70}\n", "cyan")
+        frames.log(text_box, f"💾 Save location: {file_path}\n", "yellow")
+        frames.log(text_box, f"⏳ Waiting for Teensy response...\n\n", "yellow")
 
         # Send download command to Teensy
         ser.write(b"DOWNLOAD_SD\n")
         ser.flush()
 
-        print("📥 SD download request sent to Teensy")
+        sd_log.info("📥 SD download request sent to Teensy")
 
     except Exception as e:
         messagebox.showerror("Download Error", f"Failed to start download:\n\n{e}")
@@ -355,66 +552,109 @@ def download_sd_card():
         download_sd_button.config(state="normal", text="📥 Download SD Card")
 
 # -------------------- Plot Graph Helper --------------------
-def plot_sensor_graphs(timestamps, ph_values, do_values, temp_values, pressure_values, title_text, window):
-    """Helper function to create and display graphs"""
-    
-    # Create figure with subplots
-    fig = Figure(figsize=(12, 8), facecolor='#001F33')
-    
-    # Create 4 subplots (2x2 grid)
-    ax1 = fig.add_subplot(2, 2, 1, facecolor='#0A1929')
-    ax2 = fig.add_subplot(2, 2, 2, facecolor='#0A1929')
-    ax3 = fig.add_subplot(2, 2, 3, facecolor='#0A1929')
-    ax4 = fig.add_subplot(2, 2, 4, facecolor='#0A1929')
-    
-    # Plot 1: pH
-    ax1.plot(timestamps, ph_values, color='#00E1FF', linewidth=2, marker='o', markersize=4)
-    ax1.set_title('🌊 pH Level', color='white', fontsize=14, fontweight='bold')
-    ax1.set_ylabel('pH', color='white', fontsize=12)
-    ax1.tick_params(colors='white')
-    ax1.grid(True, alpha=0.3, color='white')
-    ax1.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-    
-    # Plot 2: Dissolved Oxygen
-    ax2.plot(timestamps, do_values, color='#00FF88', linewidth=2, marker='s', markersize=4)
-    ax2.set_title('💧 Dissolved Oxygen', color='white', fontsize=14, fontweight='bold')
-    ax2.set_ylabel('DO (mg/L)', color='white', fontsize=12)
-    ax2.tick_params(colors='white')
-    ax2.grid(True, alpha=0.3, color='white')
-    ax2.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-    
-    # Plot 3: Temperature
-    ax3.plot(timestamps, temp_values, color='#FF6B6B', linewidth=2, marker='^', markersize=4)
-    ax3.set_title('🔥 Temperature', color='white', fontsize=14, fontweight='bold')
-    ax3.set_ylabel('Temperature (°C)', color='white', fontsize=12)
-    ax3.set_xlabel('Time', color='white', fontsize=12)
-    ax3.tick_params(colors='white')
-    ax3.grid(True, alpha=0.3, color='white')
-    ax3.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-    
-    # Plot 4: Pressure
-    ax4.plot(timestamps, pressure_values, color='#FFD700', linewidth=2, marker='d', markersize=4)
-    ax4.set_title('🌡️ Pressure', color='white', fontsize=14, fontweight='bold')
-    ax4.set_ylabel('Pressure (mbar)', color='white', fontsize=12)
-    ax4.set_xlabel('Time', color='white', fontsize=12)
-    ax4.tick_params(colors='white')
-    ax4.grid(True, alpha=0.3, color='white')
-    ax4.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-    
-    # Rotate x-axis labels
-    for ax in [ax1, ax2, ax3, ax4]:
-        plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
-    
-    fig.tight_layout(pad=3.0)
-    
-    return fig
+def plot_sensor_graphs(timestamps, ph_values, do_values, temp_values, pressure_values):
+    """2x2 sensor figure; the caller embeds it under its own window title"""
+    return build_sensor_figure(timestamps, ph_values, do_values, temp_values, pressure_values)
+
+# -------------------- Windowed Graph Loading --------------------
+def attach_windowed_loading(window, fig, canvas, store, info_label, label_text):
+    """Load only the visible time range from the store and reload lazily on pan/zoom"""
+    axes = fig.axes
+    state = {"follow": True, "applying": False, "after_id": None, "requested_at": None, "draw_requested": None}
+
+    def visible_points():
+        # One point per horizontal pixel of a subplot is all the screen can show
+        return max(50, int(axes[0].bbox.width))
+
+    def apply_result(time_range, result):
+        if not window.winfo_exists():
+            return
+        if state["requested_at"] is not None:
+            metrics.histogram("graph.query_latency", "Range request -> result on the Tk thread").observe(
+                time.perf_counter() - state["requested_at"])
+        with metrics.timer("graph.refresh", "Apply a range result to the figure (drawing is timed by graph.draw)"):
+            redraw(time_range, result)
+
+    def on_draw(event):
+        # draw_idle() renders on the next idle pass; time it from the request to the finished draw
+        if state["draw_requested"] is not None:
+            metrics.histogram("graph.draw", "Graph redraw request -> figure drawn").observe(
+                time.perf_counter() - state["draw_requested"])
+            state["draw_requested"] = None
+
+    canvas.mpl_connect("draw_event", on_draw)
+
+    def redraw(time_range, result):
+        xs = [from_epoch(t) for t in result["ts"]]
+        state["applying"] = True
+        try:
+            for ax, name in zip(axes, CHANNELS):
+                ax.lines[0].set_data(xs, result[name])
+                ax.relim()
+                ax.autoscale_view(scalex=False)
+            if state["follow"] and xs:
+                axes[0].set_xlim(from_epoch(time_range[0]), from_epoch(time_range[1]))
+        finally:
+            state["applying"] = False
+        if state["draw_requested"] is None:
+            state["draw_requested"] = time.perf_counter()
+        canvas.draw_idle()
+        info_label.config(text=f"📈 {label_text} | Showing {len(xs)} points for "
+                               f"{result['rows_in_range']} readings in view | "
+                               f"Last updated: {datetime.now().strftime('%H:%M:%S')}")
+
+    loader = LazyRangeLoader(store, apply_result, frames.post)
+
+    def load(t0, t1):
+        state["requested_at"] = time.perf_counter()
+        loader.request(t0, t1, visible_points())
+
+    def request_visible():
+        state["after_id"] = None
+        x0, x1 = axes[0].get_xlim()
+        t0 = mdates.num2date(x0).replace(tzinfo=None).timestamp()
+        t1 = mdates.num2date(x1).replace(tzinfo=None).timestamp()
+        load(t0, t1)
+
+    def on_xlim_changed(ax):
+        if state["applying"]:
+            return
+        # User panned/zoomed: stop following new data, debounce the reload
+        state["follow"] = False
+        if state["after_id"]:
+            window.after_cancel(state["after_id"])
+        state["after_id"] = window.after(150, request_visible)
+
+    axes[0].callbacks.connect("xlim_changed", on_xlim_changed)
+
+    def refresh(follow=None):
+        if follow is not None:
+            state["follow"] = follow
+        if state["follow"]:
+            bounds = store.bounds()
+            if bounds:
+                load(bounds[0], bounds[1])
+        else:
+            request_visible()
+
+    window.bind("<Destroy>", lambda e: loader.close() if e.widget is window else None)
+    return refresh
+
+def plot_store_range(store, max_points=1000):
+    """Build the 2x2 figure from one screen-resolution query over the whole store"""
+    bounds = store.bounds()
+    if not bounds:
+        return None
+    result = store.query_range(bounds[0], bounds[1], max_points)
+    timestamps = [from_epoch(t) for t in result["ts"]]
+    return plot_sensor_graphs(timestamps, result["pH"], result["DO"], result["Temperature"], result["Pressure"])
 
 # -------------------- Open Live Graph Window --------------------
 def open_graph_window():
-    """Open a new window with real-time graphs of sensor data from GUI"""
+    """Open a new window with graphs of the stored readings (visible range only)"""
     global graph_window
     
-    if not sensor_data_list:
+    if sensor_store.count() == 0:
         messagebox.showwarning("No Data", 
             "⚠️ No sensor data available to plot!\n\n"
             "Connect to Teensy and wait for readings to be saved.")
@@ -426,11 +666,6 @@ def open_graph_window():
         graph_window.focus_force()
         return
     
-    # Create new window
-    graph_window = tk.Toplevel(root)
-    graph_window.title("📊 Live Sensor Data Graphs")
-    graph_window.geometry("1200x900")
-    graph_window.configure(bg="#3B6D42")
     # Create new window
     graph_window = tk.Toplevel(root)
     graph_window.title("📊 Live Sensor Data Graphs")
@@ -444,35 +679,12 @@ def open_graph_window():
     
     # Info label
     info_label = tk.Label(graph_window, 
-                         text=f"📈 Displaying {len(sensor_data_list)} live readings | Auto-refreshing every 10 seconds",
+                         text=f"📈 Displaying {sensor_store.count()} stored readings | Auto-refreshing every 10 seconds",
                          font=("Arial", 10), fg="white", bg="#001F33")
     info_label.pack(pady=5)
     
-    # Extract data
-    timestamps = []
-    ph_values = []
-    do_values = []
-    temp_values = []
-    pressure_values = []
-    
-    for data in sensor_data_list:
-        try:
-            timestamps.append(datetime.strptime(data["timestamp"], "%Y-%m-%d %H:%M:%S"))
-            ph_values.append(float(data["pH"]))
-            do_values.append(float(data["DO"]))
-            temp_values.append(float(data["Temperature"]))
-            pressure_values.append(float(data["Pressure"]))
-        except:
-            continue
-    
-    if not timestamps:
-        messagebox.showerror("Error", "Unable to parse sensor data for graphing!")
-        graph_window.destroy()
-        return
-    
     # Create graphs
-    fig = plot_sensor_graphs(timestamps, ph_values, do_values, temp_values, pressure_values, 
-                             "Live Readings", graph_window)
+    fig = plot_store_range(sensor_store)
     
     # Create canvas
     canvas_frame = tk.Frame(graph_window, bg="#001F33")
@@ -480,46 +692,29 @@ def open_graph_window():
     
     canvas = FigureCanvasTkAgg(fig, master=canvas_frame)
     canvas.draw()
+    toolbar = NavigationToolbar2Tk(canvas, canvas_frame)
+    toolbar.update()
     canvas_widget = canvas.get_tk_widget()
     canvas_widget.pack(fill=tk.BOTH, expand=True)
     
+    refresh_range = attach_windowed_loading(graph_window, fig, canvas, sensor_store,
+                                            info_label, "Live Readings")
+    
     # Auto-refresh function
     auto_refresh_enabled = [True]  # Use list to allow modification in nested function
+    # Only "a new SAVED reading arrived" matters here; overflow just drops old heartbeats
+    graph_sub = reading_bus.subscribe("graph", maxsize=64, policy=DROP_OLDEST)
+    graph_window.bind("<Destroy>", lambda e: reading_bus.unsubscribe(graph_sub)
+                      if e.widget is graph_window else None, add="+")
     
     def auto_refresh():
         if not auto_refresh_enabled[0] or not graph_window.winfo_exists():
             return
             
         try:
-            # Clear and recreate
-            timestamps.clear()
-            ph_values.clear()
-            do_values.clear()
-            temp_values.clear()
-            pressure_values.clear()
-            
-            for data in sensor_data_list:
-                try:
-                    timestamps.append(datetime.strptime(data["timestamp"], "%Y-%m-%d %H:%M:%S"))
-                    ph_values.append(float(data["pH"]))
-                    do_values.append(float(data["DO"]))
-                    temp_values.append(float(data["Temperature"]))
-                    pressure_values.append(float(data["Pressure"]))
-                except:
-                    continue
-            
-            if timestamps:
-                # Recreate figure
-                new_fig = plot_sensor_graphs(timestamps, ph_values, do_values, temp_values, 
-                                            pressure_values, "Live Readings", graph_window)
-                
-                # Update canvas
-                canvas.figure = new_fig
-                canvas.draw()
-                
-                # Update info label
-                info_label.config(text=f"📈 Displaying {len(sensor_data_list)} live readings | "
-                                      f"Last updated: {datetime.now().strftime('%H:%M:%S')}")
+            # Re-query the visible range only when the bus delivered new stored readings
+            if any(r.saved for r in graph_sub.drain()):
+                refresh_range()
             
             # Schedule next refresh
             if graph_window.winfo_exists():
@@ -536,13 +731,19 @@ def open_graph_window():
     
     # Manual refresh button
     def manual_refresh():
-        auto_refresh()
+        refresh_range()
     
     refresh_btn = tk.Button(button_frame, text="🔄 Refresh Now", command=manual_refresh,
                            font=("Times", 11, "bold"), bg="#007A99", fg="white",
                            relief="flat", width=15, height=2)
     refresh_btn.pack(side=tk.LEFT, padx=5)
     
+    # Back to the full mission range, following new readings
+    reset_btn = tk.Button(button_frame, text="🔍 Full Range", command=lambda: refresh_range(follow=True),
+                          font=("Times", 11, "bold"), bg="#9370DB", fg="white",
+                          relief="flat", width=12, height=2)
+    reset_btn.pack(side=tk.LEFT, padx=5)
+    
     # Toggle auto-refresh
     def toggle_auto_refresh():
         auto_refresh_enabled[0] = not auto_refresh_enabled[0]
@@ -566,8 +767,8 @@ def open_graph_window():
         )
         if file_path:
             try:
-                fig.savefig(file_path, dpi=300, facecolor='#001F33', edgecolor='none')
-                messagebox.showinfo("Success", f"📊 Graph saved to:\n\n{file_path}")
+                future = figure_exporter.export(snapshot_from_figure(fig), file_path)
+                watch_figure_exports([future], "📊 Graph")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save graph:\n\n{e}")
     
@@ -576,6 +777,21 @@ def open_graph_window():
                           relief="flat", width=15, height=2)
     export_btn.pack(side=tk.LEFT, padx=5)
     
+    # One report figure per mission day
+    def export_daily_reports():
+        out_dir = filedialog.askdirectory(title="Select folder for daily report figures")
+        if out_dir:
+            try:
+                futures = figure_exporter.export_daily(sensor_store, out_dir)
+                watch_figure_exports(futures, "📅 Daily reports")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to export daily reports:\n\n{e}")
+    
+    daily_btn = tk.Button(button_frame, text="📅 Daily Reports", command=export_daily_reports,
+                          font=("Times", 11, "bold"), bg="#007A99", fg="white",
+                          relief="flat", width=15, height=2)
+    daily_btn.pack(side=tk.LEFT, padx=5)
+    
     # Close button
     def close_window():
         auto_refresh_enabled[0] = False
@@ -587,6 +803,39 @@ def open_graph_window():
     close_btn.pack(side=tk.LEFT, padx=5)
 
 # -------------------- Open SD Card Graph Window --------------------
+def load_sd_file(file_path, store):
+    """Stream an SD card file into `store`; returns the number of readings.
+
+    Datalog.txt downloads are memory-mapped and parsed chunk by chunk with
+    their own timestamps; other files are scanned line by line for $Params.
+    """
+    with DatalogFile(file_path) as log:
+        if len(log):
+            loaded = 0
+            for chunk in log.iter_chunks(workers=1, columns=True):
+                values = reprocess(array_raw_fields(chunk), active_calibration)
+                values = np.where(np.isnan(values), None, values)     # missing fields -> NULL
+                loaded += store.insert_many(zip(chunk["ts"].tolist(), *values.T.tolist(),
+                                                chunk["reading_id"].tolist()),
+                                            log_order=True, profile=active_calibration)
+            return loaded
+
+    # No Datalog records: $Params lines without timestamps, spaced 30 min apart
+    rows = []
+    start = datetime.now()
+    with open(file_path, 'r', errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if "$Params" in line or "$params" in line:
+                try:
+                    parts = line.split(',')
+                    if len(parts) >= 5:
+                        rows.append((start + timedelta(minutes=len(rows)*30),
+                                     *active_calibration.apply(parts[1:5])))
+                except (ValueError, IndexError):
+                    continue
+    return store.insert_many(rows, profile=active_calibration) if rows else 0
+
 def open_sd_graph_window():
     """Open a new window to plot data from SD card file"""
     
@@ -600,51 +849,21 @@ def open_sd_graph_window():
         return
     
     try:
-        # Parse SD card file
-        timestamps = []
-        ph_values = []
-        do_values = []
-        temp_values = []
-        pressure_values = []
-        
-        with open(file_path, 'r') as f:
-            lines = f.readlines()
-            
-        text_box.insert(tk.END, f"\n📂 Loading SD card file: {file_path}\n", "cyan")
-        text_box.see(tk.END)
+        frames.log(text_box, f"\n📂 Loading SD card file: {file_path}\n", "cyan")
         
-        # Parse lines looking for $Params format
-        for line in lines:
-            line = line.strip()
-            if "$Params" in line or "$params" in line:
-                try:
-                    parts = line.split(',')
-                    if len(parts) >= 5:
-                        ph = float(parts[1]) / 100.0
-                        do = float(parts[2]) / 10.0
-                        temp = float(parts[3]) / 50.0
-                        pressure = float(parts[4]) / 1000.0
-                        
-                        # Use current time as placeholder (SD card might not have timestamps)
-                        # You can modify this to extract timestamps if they exist in your SD format
-                        timestamps.append(datetime.now() + timedelta(minutes=len(timestamps)*30))
-                        ph_values.append(ph)
-                        do_values.append(do)
-                        temp_values.append(temp)
-                        pressure_values.append(pressure)
-                except:
-                    continue
+        # Index the file once so the window only ever plots the visible range
+        sd_store = SensorStore(":memory:")
+        loaded = load_sd_file(file_path, sd_store)
         
-        if not timestamps:
+        if not loaded:
+            sd_store.close()
             messagebox.showerror("No Data", 
                 f"⚠️ No valid sensor data found in file!\n\n"
-                f"Make sure the file contains $Params format data.")
-            text_box.insert(tk.END, f"❌ No valid data found in SD file\n", "red")
-            text_box.see(tk.END)
+                f"Make sure the file contains Datalog records or $Params format data.")
+            frames.log(text_box, f"❌ No valid data found in SD file\n", "red")
             return
         
-        text_box.insert(tk.END, f"✅ Loaded {len(timestamps)} readings from SD card\n", "green")
-        text_box.see(tk.END)
+        frames.log(text_box, f"✅ Loaded {loaded} readings from SD card\n", "green")
         
         # Create graph window
         sd_graph_window = tk.Toplevel(root)
@@ -659,19 +878,23 @@ def open_sd_graph_window():
         
         # Info label
         info_label = tk.Label(sd_graph_window, 
-                             text=f"📈 Displaying {len(timestamps)} readings from SD card | File: {file_path.split('/')[-1]}",
+                             text=f"📈 Displaying {loaded} readings from SD card | File: {file_path.split('/')[-1]}",
                              font=("Arial", 10), fg="white", bg="#001F33")
         info_label.pack(pady=5)
         
         # Create graphs
-        fig = plot_sensor_graphs(timestamps, ph_values, do_values, temp_values, pressure_values,
-                                "SD Card Data", sd_graph_window)
+        fig = plot_store_range(sd_store)
         
         # Create canvas
         canvas = FigureCanvasTkAgg(fig, master=sd_graph_window)
         canvas.draw()
+        toolbar = NavigationToolbar2Tk(canvas, sd_graph_window)
+        toolbar.update()
         canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
+        attach_windowed_loading(sd_graph_window, fig, canvas, sd_store, info_label,
+                                f"SD card file: {file_path.split('/')[-1]}")
+        
         # Button frame
         button_frame = tk.Frame(sd_graph_window, bg="#001F33")
         button_frame.pack(pady=10)
@@ -685,8 +908,8 @@ def open_sd_graph_window():
             )
             if export_path:
                 try:
-                    fig.savefig(export_path, dpi=300, facecolor='#001F33', edgecolor='none')
-                    messagebox.showinfo("Success", f"📊 Graph saved to:\n\n{export_path}")
+                    future = figure_exporter.export(snapshot_from_figure(fig), export_path)
+                    watch_figure_exports([future], "📊 Graph")
                 except Exception as e:
                     messagebox.showerror("Error", f"Failed to save graph:\n\n{e}")
         
@@ -699,23 +922,14 @@ def open_sd_graph_window():
         def export_csv():
             csv_path = filedialog.asksaveasfilename(
                 defaultextension=".csv",
-                filetypes=[("CSV Files", "*.csv")],
+                filetypes=export_filetypes(),
                 initialfile=f"sd_card_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
             )
             if csv_path:
                 try:
-                    with open(csv_path, 'w', newline='') as f:
-                        writer = csv.writer(f)
-                        writer.writerow(["Timestamp", "pH", "DO (mg/L)", "Temperature (°C)", "Pressure (mbar)"])
-                        for i in range(len(timestamps)):
-                            writer.writerow([
-                                timestamps[i].strftime("%Y-%m-%d %H:%M:%S"),
-                                f"{ph_values[i]:.2f}",
-                                f"{do_values[i]:.2f}",
-                                f"{temp_values[i]:.2f}",
-                                f"{pressure_values[i]:.2f}"
-                            ])
-                    messagebox.showinfo("Success", f"💾 CSV saved to:\n\n{csv_path}")
+                    job = ExportJob(sd_store, csv_path,
+                                    header=["Timestamp", "pH", "DO (mg/L)", "Temperature (°C)", "Pressure (mbar)"])
+                    run_export_job(job, "📄 Export SD Data")
                 except Exception as e:
                     messagebox.showerror("Error", f"Failed to save CSV:\n\n{e}")
         
@@ -732,13 +946,14 @@ def open_sd_graph_window():
         
     except Exception as e:
         messagebox.showerror("Error Loading File", f"Failed to load SD card file:\n\n{e}")
-        text_box.insert(tk.END, f"❌ Error loading SD file: {e}\n", "red")
-        text_box.see(tk.END)
+        frames.log(text_box, f"❌ Error loading SD file: {e}\n", "red")
 
 # -------------------- Connect to Teensy --------------------
 def connect_teensy():
     """Connect to Teensy and start read thread"""
+    global active_calibration
     global ser, is_reading, read_thread, read_thread_stop, continuous_csv_file, continuous_csv_writer
+    global stream_decoder, telemetry_mode, session_recorder
 
     if ser and getattr(ser, "is_open", False):
         messagebox.showinfo("Already Connected", "✅ Already connected to Teensy!")
@@ -753,26 +968,37 @@ def connect_teensy():
             port = simpledialog.askstring("Manual Port",
                 "Enter port (e.g., COM3, /dev/ttyACM0):")
         if not port:
-            text_box.insert(tk.END, "❌ No port provided. Connect aborted.\n", "red")
-            text_box.see(tk.END)
+            frames.log(text_box, "❌ No port provided. Connect aborted.\n", "red")
             return
 
+    active_calibration = calibration.active(device_id_for_port(port))
+
     try:
         try:
             continuous_csv_file_path = f"teensy_30min_readings_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            continuous_csv_file = open(continuous_csv_file_path, 'w', newline='')
-            continuous_csv_writer = csv.DictWriter(continuous_csv_file, 
-                                                   fieldnames=["timestamp", "pH", "DO", "Temperature", "Pressure"])
-            continuous_csv_writer.writeheader()
-            continuous_csv_file.flush()
-            text_box.insert(tk.END, f"📝 CSV file created: {continuous_csv_file_path}\n", "cyan")
+            with csv_lock:
+                continuous_csv_file = open(continuous_csv_file_path, 'w', newline='')
+                continuous_csv_writer = csv.DictWriter(continuous_csv_file, 
+                                                       fieldnames=["timestamp", "pH", "DO", "Temperature", "Pressure"])
+                continuous_csv_writer.writeheader()
+                continuous_csv_file.flush()
+            frames.log(text_box, f"📝 CSV file created: {continuous_csv_file_path}\n", "cyan")
         except Exception as e:
             messagebox.showerror("File Error", f"Could not create CSV file:\n{e}")
             return
 
-        text_box.insert(tk.END, f"🔌 Connecting to {port} at {BAUD} baud...\n", "white")
-        text_box.see(tk.END)
-        ser = serial.Serial(port, BAUD, timeout=SERIAL_TIMEOUT)
+        frames.log(text_box, f"🔌 Connecting to {port} at {BAUD} baud...\n", "white")
+        session_recorder = None
+        if RECORD_SESSIONS:
+            os.makedirs(SESSION_DIR, exist_ok=True)
+            session_path = os.path.join(SESSION_DIR, f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.rec")
+            session_recorder = SessionRecorder(session_path, port=port, baud=BAUD)
+            frames.log(text_box, f"🎞️ Recording raw session: {session_path}\n", "cyan")
+        ser = SerialLink(port, BAUD, timeout=SERIAL_TIMEOUT, find_port=find_teensy_port,
+                         on_disconnect=on_link_lost, on_reconnect=on_link_restored,
+                         recorder=session_recorder).open()
+        port_discovery.remember(port)
+        link_connected.set(1)
         time.sleep(0.2)
         try:
             ser.reset_input_buffer()
@@ -780,26 +1006,35 @@ def connect_teensy():
         except Exception:
             pass
 
+        # Old firmware ignores the request and keeps sending text; the decoder takes either.
+        # The firmware only polls commands every few seconds while asleep, so the
+        # TELEMETRY_MODE ack is handled whenever it arrives rather than waited for here.
+        stream_decoder = StreamDecoder()
+        telemetry_mode = "TEXT"
+        ingest.reset(sensor_store, active_calibration)
+        if REQUEST_BINARY_TELEMETRY:
+            ser.write(CMD_BINARY)
+            ser.flush()
+
         is_reading = True
         read_thread_stop.clear()
         read_thread = threading.Thread(target=read_serial_data, daemon=True)
         read_thread.start()
 
-        text_box.insert(tk.END, "\n" + "="*70 + "\n", "green")
-        text_box.insert(tk.END, f"✅ CONNECTED to {port}\n", "green")
-        text_box.insert(tk.END, "="*70 + "\n\n", "green")
-        text_box.insert(tk.END, "📊 Mode: 30-Minute Interval Monitoring\n", "cyan")
-        text_box.insert(tk.END, "💾 All scheduled readings saved to SD + CSV\n", "cyan")
-        text_box.insert(tk.END, "💓 Display updates continuously (including during sleep)\n", "cyan")
-        text_box.insert(tk.END, "⏰ Readings taken every 30 minutes\n", "cyan")
-        text_box.insert(tk.END, "📁 CSV file: " + continuous_csv_file_path + "\n", "yellow")
-        text_box.insert(tk.END, "📥 Use 'Download SD Card' to retrieve all SD data\n\n", "cyan")
-        text_box.see(tk.END)
+        frames.log(text_box, "\n" + "="*70 + "\n", "green")
+        frames.log(text_box, f"✅ CONNECTED to {port}\n", "green")
+        frames.log(text_box, "="*70 + "\n\n", "green")
+        frames.log(text_box, "📊 Mode: 30-Minute Interval Monitoring\n", "cyan")
+        frames.log(text_box, "💾 All scheduled readings saved to SD + CSV\n", "cyan")
+        frames.log(text_box, "💓 Display updates continuously (including during sleep)\n", "cyan")
+        frames.log(text_box, "⏰ Readings taken every 30 minutes\n", "cyan")
+        frames.log(text_box, "📁 CSV file: " + continuous_csv_file_path + "\n", "yellow")
+        frames.log(text_box, "📥 Use 'Download SD Card' to retrieve all SD data\n\n", "cyan")
         
         connect_button.config(text="✅ Connected", bg="#00AA00", state="disabled")
         download_sd_button.config(state="normal")
         graph_button.config(state="normal")
-        status_label.config(text="📊 Status: Connected - Monitoring", fg="#00BFFF")
+        frames.set(status_label, text="📊 Status: Connected - Monitoring", fg="#00BFFF")
         
         messagebox.showinfo("Connected", 
                           f"✅ Connected to {port}\n\n"
@@ -808,30 +1043,81 @@ def connect_teensy():
                           f"You can now download SD card data!")
         
     except Exception as e:
-        text_box.insert(tk.END, f"❌ Connection failed: {e}\n", "red")
-        text_box.see(tk.END)
+        frames.log(text_box, f"❌ Connection failed: {e}\n", "red")
         messagebox.showerror("Connection Error", f"Failed to connect to {port}\n\n{e}")
 
+# -------------------- Replay Recorded Session --------------------
+def replay_session():
+    """Feed a recorded session through the normal pipeline (into a scratch store)"""
+    global ser, is_reading, read_thread, read_thread_stop, sensor_store
+    global stream_decoder, telemetry_mode
+
+    if ser and getattr(ser, "is_open", False):
+        messagebox.showwarning("Connected", "⚠️ Disconnect before replaying a session.")
+        return
+    path = filedialog.askopenfilename(initialdir=SESSION_DIR if os.path.isdir(SESSION_DIR) else ".",
+                                      filetypes=[("Recorded sessions", "*.rec"), ("All Files", "*.*")])
+    if not path:
+        return
+    speed_text = simpledialog.askstring("Replay Speed", "Speed: 1x, 100x, max (or a factor):",
+                                        initialvalue="100x")
+    if not speed_text:
+        return
+    try:
+        speed = SPEEDS[speed_text] if speed_text in SPEEDS else float(speed_text.rstrip("x"))
+        ser = ReplayLink(path, speed)
+    except (ValueError, OSError) as e:
+        messagebox.showerror("Replay Error", f"Could not replay {path}:\n\n{e}")
+        return
+
+    # Replayed readings must not end up in the real history
+    sensor_store = SensorStore(":memory:")
+    stream_decoder = StreamDecoder()
+    telemetry_mode = "TEXT"
+    ingest.reset(sensor_store, active_calibration)
+
+    is_reading = True
+    read_thread_stop.clear()
+    read_thread = threading.Thread(target=read_serial_data, daemon=True)
+    read_thread.start()
+
+    frames.log(text_box, f"\n🎞️ REPLAYING {os.path.basename(path)} at "
+                         f"{'max speed' if not speed else f'{speed:g}x'} "
+                         f"({ser.duration:.0f} s recorded)\n\n", "yellow")
+    connect_button.config(text="🎞️ Replaying", bg="#9370DB", state="disabled")
+    graph_button.config(state="normal")
+    frames.set(status_label, text="🎞️ Status: Replaying recorded session", fg="#9370DB")
+
 # -------------------- Disconnect --------------------
 def disconnect_teensy():
     """Disconnect from Teensy and stop reading thread safely"""
     global ser, is_reading, read_thread_stop, read_thread, continuous_csv_file, continuous_csv_writer
+    global session_recorder, sensor_store
 
     is_reading = False
     read_thread_stop.set()
     if read_thread and read_thread.is_alive():
         read_thread.join(timeout=1.0)
 
-    if continuous_csv_file:
-        try:
-            continuous_csv_file.close()
-            text_box.insert(tk.END, "\n💾 CSV file saved and closed\n", "green")
-            text_box.see(tk.END)
-        except Exception as e:
-            print(f"Error closing continuous CSV: {e}")
-    
-    continuous_csv_file = None
-    continuous_csv_writer = None
+    if session_recorder:
+        session_recorder.close()
+        frames.log(text_box, f"🎞️ Session saved: {session_recorder.path}\n", "cyan")
+        session_recorder = None
+    if sensor_store is not live_store:
+        sensor_store.close()
+        sensor_store = live_store
+        ingest.reset(sensor_store)
+
+    with csv_lock:
+        if continuous_csv_file:
+            try:
+                continuous_csv_file.close()
+                frames.log(text_box, "\n💾 CSV file saved and closed\n", "green")
+            except Exception as e:
+                store_log.error("Error closing continuous CSV: %s", e)
+        
+        continuous_csv_file = None
+        continuous_csv_writer = None
 
     if ser and getattr(ser, "is_open", False):
         try:
@@ -839,43 +1125,246 @@ def disconnect_teensy():
         except:
             pass
     ser = None
+    link_connected.set(0)
 
-    text_box.insert(tk.END, "\n⚠️ DISCONNECTED\n\n", "red")
-    text_box.see(tk.END)
+    frames.log(text_box, "\n⚠️ DISCONNECTED\n\n", "red")
     connect_button.config(text="🔌 Connect to Teensy", bg="#007A99", state="normal")
     download_sd_button.config(state="disabled")
     graph_button.config(state="normal")  # Keep enabled if data exists
-    status_label.config(text="📊 Status: Disconnected", fg="#FF0000")
+    frames.set(status_label, text="📊 Status: Disconnected", fg="#FF0000")
     messagebox.showinfo("Disconnected", "Serial connection closed.\nCSV file saved.")
 
+# -------------------- Background Export --------------------
+def export_filetypes():
+    """Save-dialog file types for the installed export formats"""
+    names = {"csv": ("CSV Files", "*.csv"), "xlsx": ("Excel Workbook", "*.xlsx"),
+             "parquet": ("Parquet", "*.parquet")}
+    return [names[fmt] for fmt in available_formats()]
+
+def run_export_job(job, title):
+    """Start an export job and show its progress in a small window with Cancel"""
+    try:
+        job.start()
+    except Exception as e:
+        messagebox.showerror("Export Error", f"Could not start export:\n{e}")
+        return
+
+    progress_win = tk.Toplevel(root)
+    progress_win.title(title)
+    progress_win.geometry("420x140")
+    progress_win.configure(bg="#001F33")
+    progress_win.resizable(False, False)
+
+    status = tk.Label(progress_win, text=f"💾 Exporting to {os.path.basename(job.path)}...",
+                      font=("Arial", 10), fg="white", bg="#001F33")
+    status.pack(pady=10)
+    bar = ttk.Progressbar(progress_win, length=380, mode="determinate", maximum=max(job.total, 1))
+    bar.pack(pady=5)
+    cancel_btn = tk.Button(progress_win, text="❌ Cancel", command=job.cancel,
+                           font=("Times", 11, "bold"), bg="#CC0000", fg="black",
+                           relief="flat", width=12)
+    cancel_btn.pack(pady=5)
+    progress_win.protocol("WM_DELETE_WINDOW", job.cancel)
+
+    def poll():
+        written, total = job.progress()
+        bar.config(value=written)
+        status.config(text=f"💾 Exported {written} / {total} readings")
+        if not job.finished:
+            progress_win.after(100, poll)
+            return
+        progress_win.destroy()
+        if job.state == "done":
+            frames.log(text_box, f"💾 Exported {written} readings to {job.path}\n", "green")
+            messagebox.showinfo("Success", f"💾 Saved {written} readings to:\n\n{job.path}")
+        elif job.state == "cancelled":
+            frames.log(text_box, f"⚠️ Export to {job.path} cancelled\n", "yellow")
+        else:
+            messagebox.showerror("Save Error", f"Error saving file:\n{job.error}")
+
+    poll()
+
+def watch_figure_exports(futures, description):
+    """Report background figure renders in the text box as they finish"""
+    if not futures:
+        messagebox.showwarning("No Data", f"⚠️ {description}: nothing to export.")
+        return
+    frames.log(text_box, f"🖼️ {description}: rendering {len(futures)} figure(s) in background...\n", "cyan")
+
+    def poll():
+        if not all(f.done() for f in futures):
+            root.after(200, poll)
+            return
+        failed = [f.exception() for f in futures if f.exception() is not None]
+        paths = [f.result()[0] for f in futures if f.exception() is None]
+        cached = sum(1 for f in futures if f.exception() is None and f.result()[1])
+        if failed:
+            frames.log(text_box, f"❌ {description}: {len(failed)} render(s) failed: {failed[0]}\n", "red")
+            messagebox.showerror("Error", f"Failed to save graph:\n\n{failed[0]}")
+        if paths:
+            frames.log(text_box, f"✅ {description}: saved {len(paths)} file(s) "
+                                 f"({cached} from render cache)\n", "green")
+            if len(paths) == 1:
+                messagebox.showinfo("Success", f"📊 Graph saved to:\n\n{paths[0]}")
+
+    poll()
+
+# -------------------- Metrics Panel --------------------
+def open_metrics_window():
+    """Live table of hot-path counters and stage timings"""
+    global metrics_window
+
+    if metrics_window is not None and metrics_window.winfo_exists():
+        metrics_window.lift()
+        return
+
+    metrics_window = tk.Toplevel(root)
+    metrics_window.title("📈 Pipeline Metrics")
+    metrics_window.geometry("760x460")
+    metrics_window.configure(bg="#001F33")
+
+    tk.Label(metrics_window, text="📈 Serial → Parse → Tk → CSV/Store → Graph",
+             font=("Times", 16, "bold"), fg="#00E1FF", bg="#001F33").pack(pady=8)
+
+    table = tk.Text(metrics_window, height=18, width=96, bg="#000B1A", fg="#00FF00",
+                    font=("Consolas", 9), relief="flat")
+    table.pack(fill="both", expand=True, padx=10)
+
+    def render():
+        if not metrics_window.winfo_exists():
+            return
+        fmt = lambda v: "" if v is None else f"{v:10.3f}"
+        table.delete("1.0", tk.END)
+        table.insert(tk.END, f"{'metric':<24}{'count':>10}{'mean ms':>12}{'p95 ms':>12}{'max ms':>12}\n")
+        table.insert(tk.END, "-" * 70 + "\n")
+        for name, count, mean, p95, peak in metrics.summary_rows():
+            table.insert(tk.END, f"{name:<24}{count:>10}{fmt(mean):>12}{fmt(p95):>12}{fmt(peak):>12}\n")
+        metrics_window.after(1000, render)
+
+    def dump(kind):
+        path = filedialog.asksaveasfilename(
+            parent=metrics_window,
+            defaultextension=".json" if kind == "json" else ".prom",
+            filetypes=[("JSON", "*.json")] if kind == "json" else [("Prometheus text", "*.prom *.txt")],
+            initialfile=f"sensor_metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                        + (".json" if kind == "json" else ".prom"))
+        if path:
+            try:
+                metrics.to_json(path) if kind == "json" else metrics.to_prometheus(path)
+                messagebox.showinfo("Success", f"📈 Metrics saved to:\n\n{path}", parent=metrics_window)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to save metrics:\n\n{e}", parent=metrics_window)
+
+    button_frame = tk.Frame(metrics_window, bg="#001F33")
+    button_frame.pack(pady=8)
+    for text, command, color in [("💾 JSON", lambda: dump("json"), "#00AA00"),
+                                 ("💾 Prometheus", lambda: dump("prom"), "#007A99"),
+                                 ("♻️ Reset", metrics.reset, "#FF8C00")]:
+        tk.Button(button_frame, text=text, command=command, font=("Times", 11, "bold"),
+                  bg=color, fg="white", relief="flat", width=14).pack(side=tk.LEFT, padx=5)
+
+    render()
+
+# -------------------- Event Log Window --------------------
+EVENT_PRESETS = [("✗ SD failures this week", FAIL, "sd", "week"),
+                 ("✗ All failures this week", FAIL, "", "week"),
+                 ("📋 Readings today", READING, "", "today"),
+                 ("😴 Sleep / wake today", (SLEEP, WAKE), "", "today")]
+EVENT_RANGE_LABELS = {"hour": "Last hour", "today": "Today", "week": "This week",
+                      "month": "This month", "all": "All time"}
+MAX_EVENT_ROWS = 500
+
+def open_events_window():
+    """Filtered views of the device event log (kind / keywords / time range)"""
+    global events_window
+
+    if events_window is not None and events_window.winfo_exists():
+        events_window.lift()
+        return
+
+    events_window = tk.Toplevel(root)
+    events_window.title("🗂️ Device Events")
+    events_window.geometry("860x520")
+    events_window.configure(bg="#001F33")
+
+    tk.Label(events_window, text="🗂️ Device Event Log", font=("Times", 16, "bold"),
+             fg="#00E1FF", bg="#001F33").pack(pady=8)
+
+    filter_frame = tk.Frame(events_window, bg="#001F33")
+    filter_frame.pack(pady=4)
+    kind_names = {"All": None, **{KIND_LABELS[k]: k for k in KINDS}}
+    kind_var = tk.StringVar(value="All")
+    words_var = tk.StringVar()
+    range_var = tk.StringVar(value=EVENT_RANGE_LABELS["week"])
+    tk.Label(filter_frame, text="Type:", fg="white", bg="#001F33").grid(row=0, column=0, padx=4)
+    tk.OptionMenu(filter_frame, kind_var, *kind_names).grid(row=0, column=1, padx=4)
+    tk.Label(filter_frame, text="Keywords:", fg="white", bg="#001F33").grid(row=0, column=2, padx=4)
+    words_entry = tk.Entry(filter_frame, textvariable=words_var, width=24)
+    words_entry.grid(row=0, column=3, padx=4)
+    tk.Label(filter_frame, text="When:", fg="white", bg="#001F33").grid(row=0, column=4, padx=4)
+    tk.OptionMenu(filter_frame, range_var, *EVENT_RANGE_LABELS.values()).grid(row=0, column=5, padx=4)
+
+    preset_frame = tk.Frame(events_window, bg="#001F33")
+    preset_frame.pack(pady=4)
+
+    summary = tk.Label(events_window, text="", font=("Consolas", 10), fg="#00FF00", bg="#001F33")
+    summary.pack()
+    results = tk.Text(events_window, height=20, width=110, bg="#000B1A", fg="#E0FFFF",
+                      font=("Consolas", 9), relief="flat")
+    results.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+    results.tag_config("fail", foreground="red")
+    results.tag_config("ok", foreground="green")
+
+    def search(kind=None, words="", range_name=None):
+        range_name = range_name or next(k for k, v in EVENT_RANGE_LABELS.items() if v == range_var.get())
+        start = time.perf_counter()
+        t0 = range_start(range_name)
+        found = event_log.find(kind, words, t0)
+        events = event_log.read(found[-MAX_EVENT_ROWS:])
+        elapsed = time.perf_counter() - start
+        results.delete("1.0", tk.END)
+        for event in reversed(events):
+            results.insert(tk.END, f"{event.when:%Y-%m-%d %H:%M:%S}  {KIND_LABELS[event.kind]:<12} {event.text}\n",
+                           event.kind if event.kind in (OK, FAIL) else ())
+        shown = f", newest {len(events)} shown" if len(found) > len(events) else ""
+        summary.config(text=f"{len(found)} event(s){shown} - {EVENT_RANGE_LABELS[range_name]} "
+                            f"({elapsed * 1000:.1f} ms, {len(event_log)} events logged)")
+
+    def run_filters(_event=None):
+        search(kind_names[kind_var.get()], words_var.get(), None)
+
+    def run_preset(kind, words, range_name):
+        kind_var.set(KIND_LABELS[kind] if isinstance(kind, str) else "All")
+        words_var.set(words)
+        range_var.set(EVENT_RANGE_LABELS[range_name])
+        search(kind, words, range_name)
+
+    for text, kind, words, range_name in EVENT_PRESETS:
+        tk.Button(preset_frame, text=text, command=lambda k=kind, w=words, r=range_name: run_preset(k, w, r),
+                  font=("Times", 10, "bold"), bg="#007A99", fg="white", relief="flat").pack(side=tk.LEFT, padx=4)
+    tk.Button(filter_frame, text="🔍 Search", command=run_filters, font=("Times", 10, "bold"),
+              bg="#00AA00", fg="white", relief="flat").grid(row=0, column=6, padx=6)
+    words_entry.bind("<Return>", run_filters)
+
+    run_preset(*EVENT_PRESETS[0][1:])
+
 # -------------------- Download Data --------------------
 def download_data():
-    """Download all sensor data to CSV"""
-    global sensor_data_list
-
-    if not sensor_data_list:
+    """Export all stored sensor data (CSV / Excel / Parquet) in the background"""
+    if sensor_store.count() == 0:
         messagebox.showwarning("No Data",
             "⚠️ No sensor data to download!\n\nConnect to Teensy and wait for scheduled readings.")
         return
 
     file_path = filedialog.asksaveasfilename(
         defaultextension=".csv",
-        filetypes=[("CSV Files", "*.csv")],
+        filetypes=export_filetypes(),
         initialfile=f"teensy_download_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     )
 
     if file_path:
         try:
-            with open(file_path, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=["timestamp", "pH", "DO", "Temperature", "Pressure"])
-                writer.writeheader()
-                writer.writerows(sensor_data_list)
-
-            messagebox.showinfo("Success",
-                f"💾 Saved {len(sensor_data_list)} readings to:\n\n{file_path}")
-
-            text_box.insert(tk.END, f"💾 Downloaded {len(sensor_data_list)} readings to {file_path}\n", "green")
-            text_box.see(tk.END)
+            run_export_job(ExportJob(sensor_store, file_path), "💾 Download Data")
         except Exception as e:
             messagebox.showerror("Save Error", f"Error saving file:\n{e}")
 
@@ -889,6 +1378,9 @@ def on_closing():
     global is_reading, ser, read_thread_stop, csv_file, continuous_csv_file
     is_reading = False
     read_thread_stop.set()
+    if session_recorder:
+        session_recorder.close()
+    figure_exporter.shutdown()
     
     if csv_file:
         try:
@@ -896,11 +1388,13 @@ def on_closing():
         except:
             pass
     
-    if continuous_csv_file:
-        try:
-            continuous_csv_file.close()
-        except:
-            pass
+    reading_bus.close()
+    with csv_lock:
+        if continuous_csv_file:
+            try:
+                continuous_csv_file.close()
+            except:
+                pass
     
     try:
         if ser and getattr(ser, "is_open", False):
@@ -973,6 +1467,21 @@ sd_graph_button = tk.Button(root, text="📥 SD Graph", command=open_sd_graph_wi
                            relief="flat", width=12, height=1)
 sd_graph_button.place(x=850, y=125)
 
+metrics_button = tk.Button(root, text="📈 Metrics", command=open_metrics_window,
+                           font=("Times", 10, "bold"), bg="#2E8B57", fg="black",
+                           relief="flat", width=12, height=1)
+metrics_button.place(x=850, y=55)
+
+events_button = tk.Button(root, text="🗂️ Events", command=open_events_window,
+                          font=("Times", 10, "bold"), bg="#007A99", fg="black",
+                          relief="flat", width=12, height=1)
+events_button.place(x=690, y=55)
+
+replay_button = tk.Button(root, text="🎞️ Replay", command=replay_session,
+                          font=("Times", 10, "bold"), bg="#9370DB", fg="black",
+                          relief="flat", width=12, height=1)
+replay_button.place(x=690, y=125)
+
 panel = tk.Frame(root, bd=0, highlightbackground="#700606", highlightthickness=3, bg="#0D0D0D")
 panel.place(x=50, y=160, width=900, height=600)
 
@@ -1004,19 +1513,19 @@ scrollbar.config(command=text_box.yview)
 for color in ["blue", "green", "red", "goldenrod", "white", "cyan", "yellow"]:
     text_box.tag_config(color, foreground=color)
 
-text_box.insert(tk.END, "🌊 TEENSY 4.1 - 30 MINUTE INTERVAL MONITOR\n", "cyan")
-text_box.insert(tk.END, "=" * 80 + "\n\n", "white")
-text_box.insert(tk.END, "📡 Click 'Connect to Teensy' to start monitoring\n\n", "white")
-text_box.insert(tk.END, "⏰ OPERATING MODE:\n", "yellow")
-text_box.insert(tk.END, "   • Teensy takes readings every 30 minutes\n", "white")
-text_box.insert(tk.END, "   • Each reading is saved to SD card + GUI CSV file\n", "white")
-text_box.insert(tk.END, "   • Display updates continuously (even during sleep)\n", "white")
-text_box.insert(tk.END, "   • Expected ~4,320 readings over 90 days\n", "white")
-text_box.insert(tk.END, "   • Serial connection remains active throughout\n\n", "white")
-text_box.insert(tk.END, "💾 Click 'Download CSV' to save GUI readings\n", "white")
-text_box.insert(tk.END, "📥 Click 'Download SD Card' to retrieve all SD data\n", "cyan")
-text_box.insert(tk.END, "📊 Click 'View Graphs' to visualize sensor data\n\n", "yellow")
-text_box.insert(tk.END, "✅ Ready to connect!\n", "green")
+frames.log(text_box, "🌊 TEENSY 4.1 - 30 MINUTE INTERVAL MONITOR\n", "cyan")
+frames.log(text_box, "=" * 80 + "\n\n", "white")
+frames.log(text_box, "📡 Click 'Connect to Teensy' to start monitoring\n\n", "white")
+frames.log(text_box, "⏰ OPERATING MODE:\n", "yellow")
+frames.log(text_box, "   • Teensy takes readings every 30 minutes\n", "white")
+frames.log(text_box, "   • Each reading is saved to SD card + GUI CSV file\n", "white")
+frames.log(text_box, "   • Display updates continuously (even during sleep)\n", "white")
+frames.log(text_box, "   • Expected ~4,320 readings over 90 days\n", "white")
+frames.log(text_box, "   • Serial connection remains active throughout\n\n", "white")
+frames.log(text_box, "💾 Click 'Download CSV' to save GUI readings\n", "white")
+frames.log(text_box, "📥 Click 'Download SD Card' to retrieve all SD data\n", "cyan")
+frames.log(text_box, "📊 Click 'View Graphs' to visualize sensor data\n\n", "yellow")
+frames.log(text_box, "✅ Ready to connect!\n", "green")
 
 footer = tk.Label(root,
     text="Teensy 4.1 - 30 Min Intervals | Live Monitoring | SD + CSV Logging | Real-Time Graphs | Remote Download",
@@ -1037,4 +1546,12 @@ print("  • Download SD card data remotely via serial")
 print("  • Real-time graphing and visualization")
 print("="*70 + "\n")
 
+# Bus subscribers: the display drains on the Tk loop (newest readings win),
+# the CSV writer runs on its own thread with backpressure so no SAVED row is lost
+display_sub = reading_bus.subscribe("display", maxsize=200, policy=DROP_OLDEST)
+# Never blocks the Tk thread (publish runs there); a stalled disk drops new rows, counted in bus.dropped.csv
+reading_bus.subscribe("csv", maxsize=CSV_QUEUE, policy=DROP_NEWEST, handler=write_csv_rows)
+frames.attach(root)
+root.after(DISPLAY_INTERVAL_MS, pump_display)
+
 root.mainloop()
\ No newline at end of file
@@ -9,6 +9,9 @@ import serial.tools.list_ports
 from datetime import datetime, timedelta
 import sys
 import re
+from calibration import CalibrationManager, device_id_for_port
+from sensor_logging import setup_logging, get_logger, RateLimiter
+from port_discovery import PortDiscovery
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
@@ -18,8 +21,17 @@ import matplotlib.dates as mdates
 BAUD = 115200
 SERIAL_TIMEOUT = 1.0
 
+# -------------------- Logging --------------------
+setup_logging("GUI_with_graphs")
+serial_log = get_logger("serial")
+rx_log = get_logger("rx")
+sd_log = get_logger("sd")
+store_log = get_logger("store")
+ui_error_limiter = RateLimiter()   # repeated [SERIAL ERROR]/[READ ERROR] lines in the text box
+
 # -------------------- Global Variables --------------------
 ser = None
+port_discovery = PortDiscovery()   # remembers which logger we connected to last
 sensor_data_list = []
 csv_file_path = None
 csv_writer = None
@@ -27,6 +39,10 @@ csv_file = None
 continuous_csv_file = None
 continuous_csv_writer = None
 
+# Calibration profiles (loaded once, applied per reading)
+calibration = CalibrationManager()
+active_calibration = calibration.active()
+
 # runtime flags / thread handles
 is_reading = False
 read_thread = None
@@ -51,30 +67,19 @@ graph_window = None
 
 # -------------------- Find Teensy Port --------------------
 def find_teensy_port():
-    """Automatically detect Teensy port"""
-    ports = serial.tools.list_ports.comports()
-    print("\n🔍 Scanning for Teensy...")
-    for port in ports:
-        print(f"  📍 {port.device} - {port.description}")
-        desc = (port.description or "").lower()
-        dev = (port.device or "").lower()
-        if "teensy" in desc or "teensy" in dev:
-            print(f"  ✅ Found Teensy!")
-            return port.device
-        if "usbmodem" in dev or "ttyacm" in dev or "usbserial" in dev:
-            print(f"  ✅ Found USB Serial Device!")
-            return port.device
-        if getattr(port, "vid", None) == 0x16C0:
-            print(f"  ✅ Found Teensy by VID!")
-            return port.device
-    print("  ❌ No Teensy found")
-    return None
+    """Detect the Teensy logger (cached VID/PID/serial identity, see port_discovery)"""
+    port = port_discovery.find()
+    if port:
+        serial_log.info("✅ Found Teensy on %s", port)
+    else:
+        serial_log.warning("  ❌ No Teensy found")
+    return port
 
 # -------------------- Serial Reading Thread --------------------
 def read_serial_data():
     """Continuously read data from Teensy and update display"""
     global ser, is_reading, read_thread_stop
-    print("📡 Serial reading thread started")
+    serial_log.info("📡 Serial reading thread started")
     try:
         while not read_thread_stop.is_set() and is_reading:
             if ser is None or not getattr(ser, "is_open", False):
@@ -91,15 +96,18 @@ def read_serial_data():
                     except Exception:
                         line = raw.decode("latin-1", errors="ignore").strip()
                     if line:
-                        print(f"📥 RECEIVED: {line}")
+                        rx_log.debug("📥 RECEIVED: %s", line)
                         root.after(0, lambda l=line: update_display(l))
                 else:
                     time.sleep(0.02)
             except (serial.SerialException, OSError) as e:
-                print(f"❌ Serial Exception in read loop: {e}")
+                serial_log.error("❌ Serial exception in read loop: %s", e)
                 try:
-                    text_box.insert(tk.END, f"[SERIAL ERROR] {e}\n", "red")
-                    text_box.see(tk.END)
+                    allowed, repeats = ui_error_limiter.allow("SERIAL ERROR")
+                    if allowed:
+                        note = f" (+{repeats} repeats)" if repeats else ""
+                        text_box.insert(tk.END, f"[SERIAL ERROR] {e}{note}\n", "red")
+                        text_box.see(tk.END)
                 except:
                     pass
                 is_reading = False
@@ -112,15 +120,18 @@ def read_serial_data():
                 ser = None
                 break
             except Exception as e:
-                print(f"❌ Unexpected read error: {e}")
+                serial_log.error("❌ Unexpected read error: %s", e)
                 try:
-                    text_box.insert(tk.END, f"[READ ERROR] {e}\n", "red")
-                    text_box.see(tk.END)
+                    allowed, repeats = ui_error_limiter.allow("READ ERROR")
+                    if allowed:
+                        note = f" (+{repeats} repeats)" if repeats else ""
+                        text_box.insert(tk.END, f"[READ ERROR] {e}{note}\n", "red")
+                        text_box.see(tk.END)
                 except:
                     pass
                 time.sleep(0.2)
     finally:
-        print("📴 Serial reading thread exiting")
+        serial_log.info("📴 Serial reading thread exiting")
 
 # -------------------- Update Display with Synchronized Output --------------------
 def update_display(line):
@@ -200,10 +211,7 @@ def update_display(line):
             parts = line.split(',')
             if len(parts) >= 5:
                 try:
-                    current_ph = float(parts[1]) / 100.0
-                    current_do = float(parts[2]) / 10.0
-                    current_temp = float(parts[3]) / 50.0
-                    current_pressure = float(parts[4]) / 1000.0
+                    current_ph, current_do, current_temp, current_pressure = active_calibration.apply(parts[1:5])
                     
                     if len(parts) >= 6 and "SAVED" in parts[5].upper():
                         is_saved_reading = True
@@ -295,7 +303,7 @@ def save_sensor_data(timestamp, ph, do, temp, pressure):
             })
             continuous_csv_file.flush()
     except Exception as e:
-        print(f"Error writing to continuous CSV: {e}")
+        store_log.error("Error writing to continuous CSV: %s", e)
 
     data_count_label.config(text=f"📊 Saved Readings: {len(sensor_data_list)}")
 
@@ -343,7 +351,7 @@ def download_sd_card():
         ser.write(b"DOWNLOAD_SD\n")
         ser.flush()
 
-        print("📥 SD download request sent to Teensy")
+        sd_log.info("📥 SD download request sent to Teensy")
 
     except Exception as e:
         messagebox.showerror("Download Error", f"Failed to start download:\n\n{e}")
@@ -506,6 +514,7 @@ def open_graph_window():
 # -------------------- Connect to Teensy --------------------
 def connect_teensy():
     """Connect to Teensy and start read thread"""
+    global active_calibration
     global ser, is_reading, read_thread, read_thread_stop, continuous_csv_file, continuous_csv_writer
 
     if ser and getattr(ser, "is_open", False):
@@ -525,6 +534,8 @@ def connect_teensy():
             text_box.see(tk.END)
             return
 
+    active_calibration = calibration.active(device_id_for_port(port))
+
     try:
         try:
             continuous_csv_file_path = f"teensy_30min_readings_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
@@ -541,6 +552,7 @@ def connect_teensy():
         text_box.insert(tk.END, f"🔌 Connecting to {port} at {BAUD} baud...\n", "white")
         text_box.see(tk.END)
         ser = serial.Serial(port, BAUD, timeout=SERIAL_TIMEOUT)
+        port_discovery.remember(port)
         time.sleep(0.2)
         try:
             ser.reset_input_buffer()
@@ -596,7 +608,7 @@ def disconnect_teensy():
             text_box.insert(tk.END, "\n💾 CSV file saved and closed\n", "green")
             text_box.see(tk.END)
         except Exception as e:
-            print(f"Error closing continuous CSV: {e}")
+            store_log.error("Error closing continuous CSV: %s", e)
     
     continuous_csv_file = None
     continuous_csv_writer = None
@@ -31,6 +31,12 @@ VERSION: GUI Sync - 30 Min Intervals - Serial Always Active - Remote SD Download
 #define PH_ARRAY_LENGTH 40
 #define VOLTAGE_REFERENCE 3.3
 
+// Binary telemetry (host requests it with "TELEMETRY BINARY")
+#define FRAME_SYNC_0 0xA5
+#define FRAME_SYNC_1 0x5A
+#define FRAME_VERSION 2
+#define FRAME_FLAG_SAVED 0x01
+
 // DO sensor settings
 #define VREF_DO 3300
 #define ADC_RES 1024
@@ -61,6 +67,25 @@ time_t nextWakeTime;
 // System start time
 time_t systemStartTime;
 
+// Telemetry mode + per-frame sequence number (text and binary)
+bool binary_telemetry = false;
+uint16_t telemetry_seq = 0;
+
+// 26-byte little-endian $Params frame (layout mirrored in telemetry.py)
+struct __attribute__((packed)) TelemetryFrame {
+  uint8_t sync[2];
+  uint8_t version;
+  uint8_t flags;
+  uint16_t seq;
+  uint32_t reading_id;
+  uint32_t device_time;
+  int16_t ph_x100;
+  int16_t do_x10;
+  int16_t temp_x50;
+  int32_t pressure_x1000;
+  uint16_t crc;
+};
+
 // Current sensor values (for GUI updates during sleep)
 float current_pH = 0.0;
 float current_DO = 0.0;
@@ -85,7 +110,10 @@ void createDatalogHeader();
 void initPeripherals();
 void printRuntimeStats();
 void sendToGUI(float pH, float DO_mgL, float temp, float press_mbar, bool isSavedReading);
+uint16_t crc16_ccitt(const uint8_t* data, size_t len);
+bool handleHostCommand(const String& command);
 void downloadSDCard();
+void downloadSDRange(uint32_t first_id, uint32_t last_id);
 void performReading();
 void setNextWakeTime();
 bool isTimeToRead();
@@ -294,10 +322,70 @@ void printRuntimeStats() {
   Serial.println();
 }
 
+/**
+ * CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF)
+ */
+uint16_t crc16_ccitt(const uint8_t* data, size_t len) {
+  uint16_t crc = 0xFFFF;
+  for (size_t i = 0; i < len; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (int b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+/**
+ * Host commands that do not interrupt the reading cycle:
+ *   TELEMETRY BINARY | TELEMETRY TEXT  - $Params wire format
+ *   DOWNLOAD_SD_RANGE <first> <last>   - resend Datalog records by Reading ID
+ */
+bool handleHostCommand(const String& command) {
+  if (command.startsWith("DOWNLOAD_SD_RANGE")) {
+    unsigned long first_id = 0, last_id = 0;
+    if (sscanf(command.c_str(), "DOWNLOAD_SD_RANGE %lu %lu", &first_id, &last_id) == 2) {
+      downloadSDRange(first_id, last_id);
+    } else {
+      Serial.println("SD_DOWNLOAD_ERROR: usage DOWNLOAD_SD_RANGE <first> <last>");
+    }
+    return true;
+  }
+  if (command == "TELEMETRY BINARY") {
+    binary_telemetry = true;
+    Serial.println("TELEMETRY_MODE:BINARY");
+    return true;
+  }
+  if (command == "TELEMETRY TEXT") {
+    binary_telemetry = false;
+    Serial.println("TELEMETRY_MODE:TEXT");
+    return true;
+  }
+  return false;
+}
+
 /**
  * Send data to GUI in standardized format
  */
 void sendToGUI(float pH, float DO_mgL, float temp, float press_mbar, bool isSavedReading) {
+  if (binary_telemetry) {
+    TelemetryFrame frame;
+    frame.sync[0] = FRAME_SYNC_0;
+    frame.sync[1] = FRAME_SYNC_1;
+    frame.version = FRAME_VERSION;
+    frame.flags = isSavedReading ? FRAME_FLAG_SAVED : 0;
+    frame.seq = telemetry_seq++;
+    frame.reading_id = reading_counter;
+    frame.device_time = (uint32_t)now();
+    frame.ph_x100 = (int16_t)(pH * 100);
+    frame.do_x10 = (int16_t)(DO_mgL * 10);
+    frame.temp_x50 = (int16_t)(temp * 50);
+    frame.pressure_x1000 = (int32_t)(press_mbar * 1000);
+    frame.crc = crc16_ccitt((const uint8_t*)&frame + 2, sizeof(frame) - 4);
+    Serial.write((const uint8_t*)&frame, sizeof(frame));
+    return;
+  }
+
   // Send in $Params format (scaled integers for transmission)
   // pH*100, DO*10, Temp*50, Pressure*1000
   Serial.print("$Params,");
@@ -311,10 +399,15 @@ void sendToGUI(float pH, float DO_mgL, float temp, float press_mbar, bool isSave
   
   // Add flag to indicate if this was saved to SD
   if (isSavedReading) {
-    Serial.println(",SAVED");
+    Serial.print(",SAVED,");
   } else {
-    Serial.println(",LIVE");
+    Serial.print(",LIVE,");
   }
+  
+  // Sequence number (gap detection) + Reading ID of the last SD record (backfill)
+  Serial.print(telemetry_seq++);
+  Serial.print(",");
+  Serial.println(reading_counter);
 }
 
 /**
@@ -381,6 +474,61 @@ void downloadSDCard() {
   Serial.flush();
 }
 
+/**
+ * Resend only the Datalog.txt records with first_id <= Reading ID <= last_id,
+ * framed like downloadSDCard() so the host can reuse its download handling
+ */
+void downloadSDRange(uint32_t first_id, uint32_t last_id) {
+  if (!sd_available || !SD.exists("Datalog.txt")) {
+    Serial.println("SD_DOWNLOAD_ERROR: Datalog.txt not available");
+    return;
+  }
+  
+  File dataFile = SD.open("Datalog.txt", FILE_READ);
+  if (!dataFile) {
+    Serial.println("SD_DOWNLOAD_ERROR: Failed to open Datalog.txt");
+    return;
+  }
+  
+  Serial.printf("SD_DOWNLOAD_PROGRESS: Range %lu-%lu\n", first_id, last_id);
+  
+  bool in_range = false;
+  bool separator_pending = false;
+  int recordCount = 0;
+  
+  while (dataFile.available()) {
+    String line = dataFile.readStringUntil('\n');
+    
+    // Records start with a dashed separator followed by "Reading ID: N"
+    if (line.startsWith("--------")) {
+      separator_pending = true;
+      in_range = false;
+      continue;
+    }
+    if (line.startsWith("Reading ID: ")) {
+      uint32_t id = line.substring(12).toInt();
+      in_range = (id >= first_id && id <= last_id);
+      if (in_range) {
+        if (separator_pending) {
+          Serial.println("--------------------------------------------------------------------------------");
+        }
+        recordCount++;
+      }
+      separator_pending = false;
+    }
+    if (in_range) {
+      Serial.println(line);
+      delay(1);
+    }
+  }
+  
+  dataFile.close();
+  
+  Serial.printf("SD_DOWNLOAD_PROGRESS: Transfer complete - %d records sent\n", recordCount);
+  Serial.println("SD_DOWNLOAD_END");
+  Serial.flush();
+}
+
 /**
  * Take readings and save to Datalog.txt
  */
@@ -569,7 +717,9 @@ void lowPowerSleep() {
       String command = Serial.readStringUntil('\n');
       command.trim();
       
-      if (command == "DOWNLOAD_SD") {
+      if (handleHostCommand(command)) {
+        // handled, keep sleeping
+      } else if (command == "DOWNLOAD_SD") {
         Serial.println("\n════════════════════════════════════════");
         Serial.println("   SD DOWNLOAD REQUEST (DURING SLEEP)");
         Serial.println("════════════════════════════════════════\n");
@@ -719,7 +869,9 @@ void loop() {
     String command = Serial.readStringUntil('\n');
     command.trim();
     
-    if (command == "DOWNLOAD_SD") {
+    if (handleHostCommand(command)) {
+      // handled
+    } else if (command == "DOWNLOAD_SD") {
       Serial.println("\n════════════════════════════════════════");
       Serial.println("   SD CARD DOWNLOAD REQUEST RECEIVED");
       Serial.println("════════════════════════════════════════\n");
@@ -0,0 +1,71 @@
+###############################################################
+#   BURST AGGREGATION BENCHMARK
+#   Reprocesses a whole mission of raw bursts (one reading every
+#   30 minutes) with every estimator in burst_aggregate.py, from
+#   a burst archive on disk, against a per-reading Python loop.
+#
+#   python bench_aggregation.py [--days 90] [--samples 10]
+###############################################################
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from burst_aggregate import ESTIMATORS, aggregate, ph_from_adc
+from bursts import BurstArchive, synthetic_bursts
+
+BUDGET_S = 1.0                # a 90-day mission must reprocess well inside this
+READINGS_PER_DAY = 48
+
+
+def best_of(repeat, func, *args, **kwargs):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def loop_median_ph(bursts):
+    """Baseline: what a per-reading Python loop costs for one channel"""
+    return [ph_from_adc(statistics.median(row["ph_adc"][:row["n"]].tolist())) for row in bursts]
+
+
+# -------------------- Main --------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vectorized burst aggregation benchmark")
+    parser.add_argument("--days", type=float, default=90)
+    parser.add_argument("--samples", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    count = int(args.days * READINGS_PER_DAY)
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = BurstArchive(os.path.join(tmp, "bursts.bin"))
+        archive.append(synthetic_bursts(count, args.samples))
+
+        start = time.perf_counter()
+        bursts = archive.load()
+        load_s = time.perf_counter() - start
+        print(f"\n📊 {args.days:g}-day mission: {count} readings x {args.samples} samples "
+              f"({os.path.getsize(archive.path) / 1e6:.1f} MB archive, memmap in {load_s * 1000:.2f} ms)")
+
+        slowest = 0.0
+        for name in ("firmware", *ESTIMATORS):
+            seconds = best_of(args.repeat, aggregate, bursts, name)
+            slowest = max(slowest, seconds)
+            print(f"  {name:<9}: {seconds * 1000:8.2f} ms  {count / seconds:12,.0f} readings/s")
+
+        seconds = best_of(1, loop_median_ph, bursts)
+        print(f"  {'py loop':<9}: {seconds * 1000:8.2f} ms  {count / seconds:12,.0f} readings/s  "
+              f"(statistics.median, pH only)")
+
+        ok = slowest < BUDGET_S
+        print(f"\n{'✅' if ok else '❌'} slowest estimator {slowest * 1000:.1f} ms "
+              f"(budget {BUDGET_S * 1000:.0f} ms for the whole mission)\n")
+        del bursts
+    if not ok:
+        raise SystemExit(1)
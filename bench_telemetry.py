@@ -0,0 +1,121 @@
+###############################################################
+#   TELEMETRY BENCHMARK
+#   Text $Params vs binary frames: host decode cost in memory,
+#   and end-to-end throughput through the pty simulator.
+#
+#   python bench_telemetry.py [--frames 100000]
+###############################################################
+
+import argparse
+import random
+import threading
+import time
+
+import serial
+
+from calibration import default_profile, reprocess
+from telemetry import StreamDecoder, encode_frame, raw_fields
+from teensy_simulator import TeensySimulator, params_line, scaled_reading
+
+CHUNK = 4096
+
+
+# -------------------- Host Paths --------------------
+def decode_text(lines, profile):
+    """What read_serial_data + update_display do per $Params line"""
+    count = 0
+    for raw in lines:
+        line = raw.decode("utf-8", errors="ignore").strip()
+        if "$Params" in line:
+            parts = line.split(",")
+            profile.apply(parts[1:5])
+            count += 1
+    return count
+
+
+def decode_stream(decoder, data, profile):
+    """Chunked reads through StreamDecoder (handles text lines and frames)"""
+    count = 0
+    for item in decoder.feed(data):
+        if isinstance(item, str):
+            if "$Params" in item:
+                profile.apply(item.split(",")[1:5])
+                count += 1
+        else:
+            reprocess(raw_fields(item), profile)
+            count += len(item)
+    return count
+
+
+# -------------------- In-Memory --------------------
+def bench_memory(n):
+    rng = random.Random(1)
+    readings = [scaled_reading(rng) for _ in range(n)]
+    text = "".join(params_line(r, False) for r in readings).encode()
+    binary = b"".join(encode_frame(i, 0, r) for i, r in enumerate(readings))
+    profile = default_profile()
+
+    start = time.perf_counter()
+    decoded = decode_text(text.splitlines(keepends=True), profile)
+    text_s = time.perf_counter() - start
+    assert decoded == n
+
+    decoder = StreamDecoder()
+    start = time.perf_counter()
+    decoded = sum(decode_stream(decoder, binary[i:i + CHUNK], profile)
+                  for i in range(0, len(binary), CHUNK))
+    binary_s = time.perf_counter() - start
+    assert decoded == n
+
+    return (len(text) / n, text_s), (len(binary) / n, binary_s)
+
+
+# -------------------- Through the Simulator --------------------
+def bench_pty(n, binary, chunked=True):
+    sim = TeensySimulator(seed=2)
+    port = sim.start(heartbeat=False)
+    ser = serial.Serial(port, 115200, timeout=0.5)
+    profile = default_profile()
+    decoder = StreamDecoder()
+    try:
+        start = time.perf_counter()
+        threading.Thread(target=sim.burst, args=(n, binary), daemon=True).start()
+        received = 0
+        while received < n:
+            if chunked:
+                data = ser.read(max(1, ser.in_waiting))
+                if not data:
+                    break
+                received += decode_stream(decoder, data, profile)
+            else:
+                line = ser.readline()
+                if not line:
+                    break
+                received += decode_text((line,), profile)
+        elapsed = time.perf_counter() - start
+    finally:
+        ser.close()
+        sim.stop()
+    return received, elapsed
+
+
+# -------------------- Main --------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Text vs binary $Params benchmark")
+    parser.add_argument("--frames", type=int, default=100000)
+    args = parser.parse_args()
+    n = args.frames
+
+    print(f"\n📊 Host decode, {n} readings in memory")
+    (text_bpf, text_s), (bin_bpf, bin_s) = bench_memory(n)
+    print(f"  text   : {text_bpf:5.1f} B/reading  {n / text_s:12,.0f} readings/s")
+    print(f"  binary : {bin_bpf:5.1f} B/reading  {n / bin_s:12,.0f} readings/s  "
+          f"({text_s / bin_s:.1f}x faster)")
+
+    print(f"\n📡 Through the pty simulator, {n} readings")
+    for label, binary, chunked in (("text, readline()", False, False),
+                                   ("text, chunked", False, True),
+                                   ("binary, chunked", True, True)):
+        received, elapsed = bench_pty(n, binary, chunked)
+        print(f"  {label:<17}: {received} received  {received / elapsed:12,.0f} readings/s")
+    print()
@@ -0,0 +1,189 @@
+###############################################################
+#   BURST AGGREGATION
+#   Recomputes readings from the raw bursts (bursts.py) with a
+#   selectable estimator per channel, for all readings at once:
+#
+#     firmware   what 25_USB_CHECK.ino prints: pH drops its single
+#                min and max sample, DO / Temp / Pressure plain mean
+#     mean       plain mean
+#     trimmed    mean after dropping a fraction at both ends
+#     median     middle sample
+#     mad        mean of the samples within k x MAD of the median
+#
+#   Bursts are sorted once per channel (NaN padding sorts last), so
+#   every estimator is a few array operations over the mission.
+#
+#   python burst_aggregate.py bursts.bin --estimator median
+###############################################################
+
+import argparse
+import math
+from datetime import datetime
+
+import numpy as np
+
+from bursts import BurstArchive, CHANNELS, channel, device_datetime
+from reading_bus import Reading
+
+# -------------------- Firmware Constants (25_USB_CHECK.ino) --------------------
+VOLTAGE_REFERENCE = 3.3
+PH_OFFSET = 0.19
+PH_SLOPE = 3.5
+VREF_DO = 3300
+ADC_RES = 1024
+CAL1_V, CAL1_T = 1274, 28
+CAL2_V, CAL2_T = 1262, 21
+DO_TABLE = np.array([
+    14460, 14220, 13820, 13440, 13090, 12740, 12420, 12110, 11810, 11530,
+    11260, 11010, 10770, 10530, 10300, 10080, 9860, 9660, 9460, 9270,
+    9080, 8900, 8730, 8570, 8410, 8250, 8110, 7960, 7820, 7690,
+    7560, 7430, 7300, 7180, 7070, 6950, 6840, 6730, 6630, 6530, 6410])
+
+# -------------------- CONFIG --------------------
+DEFAULT_TRIM = 0.2            # trimmed: fraction dropped at each end
+DEFAULT_MAD_K = 3.0           # mad: keep samples within k x MAD (scaled to sigma)
+MAD_TO_SIGMA = 1.4826
+
+READING_DTYPE = np.dtype([("device_time", "<u4"), ("host_time", "<f8"), ("ph", "<f8"), ("do", "<f8"),
+                          ("temp", "<f8"), ("pressure", "<f8")])
+
+
+# -------------------- Estimators --------------------
+# Every estimator takes the ascending-sorted (k, width) samples (NaN past
+# each burst's n), the per-burst counts n and ignores options it has no use for.
+def _order_stat(sorted_x, index):
+    return np.take_along_axis(sorted_x, index[:, None], axis=1)[:, 0]
+
+
+def _trim_mean(sorted_x, n, cut):
+    """Mean of the sorted samples with `cut` (per burst) removed at each end"""
+    pos = np.arange(sorted_x.shape[1])
+    keep = (pos >= cut[:, None]) & (pos < (n - cut)[:, None])
+    return np.where(keep, sorted_x, 0.0).sum(axis=1) / keep.sum(axis=1)
+
+
+def est_mean(sorted_x, n, **_):
+    return _trim_mean(sorted_x, n, np.zeros_like(n))
+
+
+def est_trimmed(sorted_x, n, trim=DEFAULT_TRIM, **_):
+    return _trim_mean(sorted_x, n, np.minimum((n * trim).astype(n.dtype), (n - 1) // 2))
+
+
+def est_median(sorted_x, n, **_):
+    return (_order_stat(sorted_x, (n - 1) // 2) + _order_stat(sorted_x, n // 2)) / 2
+
+
+def est_mad(sorted_x, n, k=DEFAULT_MAD_K, **_):
+    median = est_median(sorted_x, n)
+    spread = np.abs(sorted_x - median[:, None])
+    mad = est_median(np.sort(spread, axis=1), n) * MAD_TO_SIGMA
+    keep = spread <= k * mad[:, None]          # NaN padding compares False
+    return np.where(keep, sorted_x, 0.0).sum(axis=1) / keep.sum(axis=1)
+
+
+def est_drop_min_max(sorted_x, n, **_):
+    """The firmware's pH filter: one min and one max dropped when n > 2"""
+    return _trim_mean(sorted_x, n, (n > 2).astype(n.dtype))
+
+
+ESTIMATORS = {"mean": est_mean, "trimmed": est_trimmed, "median": est_median, "mad": est_mad}
+FIRMWARE = {"ph_adc": est_drop_min_max, "do_adc": est_mean, "temp": est_mean, "pressure": est_mean}
+
+
+# -------------------- Unit Conversion --------------------
+def ph_from_adc(adc):
+    return PH_SLOPE * (adc * VOLTAGE_REFERENCE / ADC_RES) + PH_OFFSET
+
+
+def do_from_adc(adc, temp_c, integer=False):
+    """DO in mg/L from the averaged DO ADC and temperature (readDO, two-point calibration).
+
+    integer=True repeats the firmware's integer maths (mV truncated,
+    integer saturation voltage and division) so `firmware` reproduces the
+    printed block exactly; otherwise the result keeps full resolution.
+    """
+    t = np.clip(np.floor(temp_c + 0.5), 0, 40).astype(np.int64)
+    mv = VREF_DO * adc / ADC_RES
+    if integer:
+        v_sat = np.trunc((t - CAL2_T) * (CAL1_V - CAL2_V) / (CAL1_T - CAL2_T)) + CAL2_V
+        return np.floor(np.floor(mv) * DO_TABLE[t] / v_sat) / 1000.0
+    v_sat = (t - CAL2_T) * (CAL1_V - CAL2_V) / (CAL1_T - CAL2_T) + CAL2_V
+    return mv * DO_TABLE[t] / v_sat / 1000.0
+
+
+# -------------------- Aggregation --------------------
+def aggregate(bursts, estimator="firmware", **options):
+    """One reading per burst in physical units (pH, DO mg/L, °C, mbar).
+
+    `estimator` is a name from ESTIMATORS / "firmware", or a dict
+    {channel: name} for a per-channel choice (missing channels use the
+    firmware's). `options` go to the estimators that take them
+    (trim=..., k=...).
+    """
+    choice = estimator if isinstance(estimator, dict) else dict.fromkeys(CHANNELS, estimator)
+    out = np.zeros(len(bursts), dtype=READING_DTYPE)
+    if not len(bursts):
+        return out
+    out["device_time"] = bursts["device_time"]
+    out["host_time"] = bursts["host_time"]
+    n = bursts["n"].astype(np.int64)
+    width = int(n.max())
+
+    values = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for name in CHANNELS:
+            method = choice.get(name, "firmware")
+            if method == "firmware":
+                func = FIRMWARE[name]
+            elif method in ESTIMATORS:
+                func = ESTIMATORS[method]
+            else:
+                raise ValueError(f"unknown estimator {method!r} (choose from firmware, {', '.join(ESTIMATORS)})")
+            values[name] = func(np.sort(channel(bursts, name, width), axis=1), n, **options)
+
+    out["ph"] = ph_from_adc(values["ph_adc"])
+    out["do"] = do_from_adc(values["do_adc"], values["temp"], integer=choice.get("do_adc", "firmware") == "firmware")
+    out["temp"] = values["temp"]
+    out["pressure"] = values["pressure"]
+    return out
+
+
+def to_readings(aggregated, device_clock=None):
+    """Reading objects for the bus / store (saved). Timestamps are the host time
+    mapped when the burst was archived, else the device clock run through
+    `device_clock` (clock_sync.DriftModel) when given, else the device clock."""
+    convert = device_clock.to_host if device_clock is not None else (lambda t: t)
+    readings = []
+    for row in aggregated:
+        host_time = float(row["host_time"])
+        stamp = (datetime.fromtimestamp(host_time) if math.isfinite(host_time)
+                 else convert(device_datetime(row["device_time"])))
+        readings.append(Reading(stamp, float(row["ph"]), float(row["do"]), float(row["temp"]),
+                                float(row["pressure"]), saved=True, source="burst", device_time=stamp))
+    return readings
+
+
+# -------------------- Main --------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute readings from archived raw bursts")
+    parser.add_argument("archive", help="burst archive written by 25_USB_CHECK.py")
+    parser.add_argument("--estimator", default="firmware", choices=["firmware", *ESTIMATORS])
+    parser.add_argument("--trim", type=float, default=DEFAULT_TRIM)
+    parser.add_argument("--k", type=float, default=DEFAULT_MAD_K)
+    parser.add_argument("--csv", help="write the readings here instead of printing them")
+    args = parser.parse_args()
+
+    readings = aggregate(BurstArchive(args.archive).load(), args.estimator, trim=args.trim, k=args.k)
+    rows = [(f"{device_datetime(r['device_time']):%Y-%m-%d %H:%M:%S}", f"{r['ph']:.2f}", f"{r['do']:.2f}",
+             f"{r['temp']:.2f}", f"{r['pressure']:.2f}") for r in readings]
+    if args.csv:
+        import csv
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["timestamp", "pH", "DO", "Temperature", "Pressure"])
+            writer.writerows(rows)
+        print(f"💾 {len(rows)} readings ({args.estimator}) written to {args.csv}")
+    else:
+        for row in rows:
+            print("  ".join(row))
@@ -0,0 +1,255 @@
+###############################################################
+#   RAW BURSTS
+#   25_USB_CHECK.ino averages N samples per reading and throws
+#   the samples away. With RAW=1 it also prints every burst as
+#   one compact $BURST line; this module decodes those lines,
+#   keeps them in a fixed-width archive (one record per reading,
+#   MAX_SAMPLES slots per channel) and analyses a whole mission
+#   at once with NumPy: per-burst spread, spectral noise floor
+#   and drift within the burst.
+#
+#   python bursts.py bursts.bin               (health summary of an archive)
+#   python bursts.py --synthetic 90           (same for a simulated 90-day mission)
+###############################################################
+
+import argparse
+import base64
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from sensor_logging import get_logger
+from telemetry import crc16
+
+# -------------------- Wire Format --------------------
+# $BURST,<rtc unixtime>,<N>,<T ms>,<crc16 hex>,<base64 payload>
+# payload (little endian, channel after channel):
+#   pH ADC u16[N] | DO ADC u16[N] | Temp*100 i16[N] | Pressure mbar*100 i32[N]
+BURST_PREFIX = "$BURST,"
+MAX_SAMPLES = 100             # firmware MAX_SAMPLES
+CHANNELS = ("ph_adc", "do_adc", "temp", "pressure")
+_WIRE = (("ph_adc", "<u2"), ("do_adc", "<u2"), ("temp", "<i2"), ("pressure", "<i4"))
+SAMPLE_BYTES = sum(np.dtype(t).itemsize for _, t in _WIRE)
+SCALE = {"ph_adc": 1.0, "do_adc": 1.0, "temp": 0.01, "pressure": 0.01}   # -> counts, counts, °C, mbar
+
+# One archive record per reading; slots past `n` are zero. host_time is the
+# device_time mapped onto the host clock (clock_sync.DriftModel) when the
+# burst was archived, NaN when the device clock was not synced yet.
+BURST_DTYPE = np.dtype([("device_time", "<u4"), ("n", "<u2"), ("interval_ms", "<u2"), ("host_time", "<f8")] +
+                       [(name, t, (MAX_SAMPLES,)) for name, t in _WIRE])
+
+_EPOCH = datetime(1970, 1, 1)
+
+store_log = get_logger("store")
+
+
+def device_datetime(device_time):
+    """RTC unixtime -> naive datetime as the RTC shows it (same clock as the block Timestamp)"""
+    return _EPOCH + timedelta(seconds=int(device_time))
+
+
+def encode_burst(device_time, interval_ms, ph_adc, do_adc, temp, pressure):
+    """$BURST line as the firmware prints it (simulator, fixtures)"""
+    n = len(ph_adc)
+    payload = b"".join(np.asarray(np.round(np.asarray(values) / SCALE[name]), dtype=t).tobytes()
+                       for (name, t), values in zip(_WIRE, (ph_adc, do_adc, temp, pressure)))
+    return (f"{BURST_PREFIX}{int(device_time)},{n},{int(interval_ms)},{crc16(payload):04X},"
+            f"{base64.b64encode(payload).decode('ascii')}")
+
+
+def parse_burst(line):
+    """One $BURST line -> BURST_DTYPE record. ValueError if malformed or the CRC fails."""
+    parts = line.strip().split(",")
+    if len(parts) != 6 or parts[0] != BURST_PREFIX[:-1]:
+        raise ValueError("not a $BURST line")
+    device_time, n, interval_ms, crc = int(parts[1]), int(parts[2]), int(parts[3]), int(parts[4], 16)
+    if not 1 <= n <= MAX_SAMPLES:
+        raise ValueError(f"burst of {n} samples")
+    payload = base64.b64decode(parts[5], validate=True)
+    if len(payload) != n * SAMPLE_BYTES:
+        raise ValueError(f"payload is {len(payload)} bytes, expected {n * SAMPLE_BYTES}")
+    if crc16(payload) != crc:
+        raise ValueError("CRC mismatch")
+
+    record = np.zeros((), dtype=BURST_DTYPE)
+    record["device_time"], record["n"], record["interval_ms"] = device_time, n, interval_ms
+    record["host_time"] = np.nan
+    offset = 0
+    for name, t in _WIRE:
+        record[name][:n] = np.frombuffer(payload, dtype=t, count=n, offset=offset)
+        offset += n * np.dtype(t).itemsize
+    return record
+
+
+# -------------------- Archive --------------------
+class BurstArchive:
+    """Append-only file of BURST_DTYPE records, loaded back as a memmap.
+
+    Records are fixed width, so record i lives at i * itemsize and a whole
+    mission maps straight into one structured array. A record torn by a
+    crash mid-write is cut off when the archive is opened.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size % BURST_DTYPE.itemsize:
+            store_log.warning("⚠️ %s ends in a partial burst record - truncating", path)
+            os.truncate(path, size - size % BURST_DTYPE.itemsize)
+        self.count = size // BURST_DTYPE.itemsize
+
+    def __len__(self):
+        return self.count
+
+    def append(self, records):
+        records = np.atleast_1d(np.asarray(records, dtype=BURST_DTYPE))
+        with self._lock:
+            with open(self.path, "ab") as f:
+                f.write(records.tobytes())
+            self.count += len(records)
+        return self.count
+
+    def load(self):
+        """Read-only memmap of every record (empty array for an empty archive)"""
+        if not self.count:
+            return np.zeros(0, dtype=BURST_DTYPE)
+        return np.memmap(self.path, dtype=BURST_DTYPE, mode="r", shape=(self.count,))
+
+
+# -------------------- Analysis --------------------
+def sample_mask(bursts):
+    """(k, MAX_SAMPLES) bool: True for the slots each burst actually filled"""
+    return np.arange(MAX_SAMPLES) < bursts["n"][:, None]
+
+
+def channel(bursts, name, width=MAX_SAMPLES):
+    """(k, width) float samples in channel units, NaN past each burst's n"""
+    values = bursts[name][:, :width] * SCALE[name]
+    values[~sample_mask(bursts)[:, :width]] = np.nan
+    return values
+
+
+def _noise_floor(residual):
+    """White-noise sigma of (k, n) detrended bursts from the median periodogram bin.
+
+    For white noise every rfft bin has E|X|^2 = n * sigma^2 and |X|^2 is
+    exponential, whose median is ln 2 times the mean; the median ignores
+    a mains tone or a single spike that would inflate the variance.
+    """
+    n = residual.shape[1]
+    power = np.abs(np.fft.rfft(residual, axis=1)[:, 1:(n + 1) // 2]) ** 2
+    return np.sqrt(np.median(power, axis=1) / (n * math.log(2)))
+
+
+def analyse(bursts):
+    """Per-burst health figures for every channel, vectorized over the mission.
+
+    Returns a structured array (one row per burst) with device_time, n and,
+    per channel: <ch>_mean, <ch>_std (sample spread), <ch>_drift (least
+    squares slope within the burst, units per second) and <ch>_noise
+    (spectral noise floor, NaN below 4 samples).
+    """
+    fields = [("device_time", "<u4"), ("n", "<u2")]
+    for name in CHANNELS:
+        fields += [(f"{name}_{stat}", "<f8") for stat in ("mean", "std", "drift", "noise")]
+    out = np.zeros(len(bursts), dtype=fields)
+    out["device_time"], out["n"] = bursts["device_time"], bursts["n"]
+    if not len(bursts):
+        return out
+
+    mask = sample_mask(bursts)
+    n = bursts["n"].astype(np.float64)
+    t = np.arange(MAX_SAMPLES) * (bursts["interval_ms"][:, None] / 1000.0)
+    t_centered = np.where(mask, t - (np.where(mask, t, 0).sum(axis=1) / n)[:, None], 0.0)
+    t_ss = (t_centered ** 2).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for name in CHANNELS:
+            x = np.where(mask, bursts[name] * SCALE[name], 0.0)
+            mean = x.sum(axis=1) / n
+            dev = np.where(mask, x - mean[:, None], 0.0)
+            slope = (t_centered * dev).sum(axis=1) / t_ss
+            out[f"{name}_mean"] = mean
+            out[f"{name}_std"] = np.where(n > 1, np.sqrt((dev ** 2).sum(axis=1) / (n - 1)), np.nan)
+            out[f"{name}_drift"] = np.where(n > 1, slope, np.nan)
+            out[f"{name}_noise"] = np.nan
+            residual = dev - slope[:, None] * t_centered
+            for size in np.unique(bursts["n"]):
+                if size >= 4:
+                    rows = bursts["n"] == size
+                    out[f"{name}_noise"][rows] = _noise_floor(residual[rows, :size])
+    return out
+
+
+def mean_spectrum(bursts, name, n, interval_ms):
+    """(frequencies Hz, mean power) over the detrended bursts of exactly n samples at interval_ms"""
+    rows = (bursts["n"] == n) & (bursts["interval_ms"] == interval_ms)
+    x = bursts[name][rows, :n] * SCALE[name]
+    t = np.arange(n) - (n - 1) / 2
+    slope = (x * t).sum(axis=1) / (t ** 2).sum()
+    residual = x - x.mean(axis=1)[:, None] - slope[:, None] * t
+    power = np.abs(np.fft.rfft(residual, axis=1)) ** 2
+    freqs = np.fft.rfftfreq(n, interval_ms / 1000.0)
+    return freqs, power.mean(axis=0) if len(x) else np.zeros(len(freqs))
+
+
+# -------------------- Synthetic Mission --------------------
+def synthetic_bursts(count, n=10, interval_ms=20, seed=0, start=datetime(2026, 1, 14)):
+    """`count` realistic bursts 30 minutes apart: sensor noise, slow drift
+    within each burst and occasional ADC spikes (benchmarks, demos)"""
+    rng = np.random.default_rng(seed)
+    bursts = np.zeros(count, dtype=BURST_DTYPE)
+    bursts["device_time"] = int((start - _EPOCH).total_seconds()) + 1800 * np.arange(count)
+    bursts["n"], bursts["interval_ms"], bursts["host_time"] = n, interval_ms, np.nan
+    t = np.arange(n)
+    centre = {"ph_adc": (640, 1.5), "do_adc": (252, 2.0), "temp": (1825, 0.8), "pressure": (101325, 5.0)}
+    for name, (level, sigma) in centre.items():
+        walk = level + np.cumsum(rng.normal(0, sigma, count))[:, None]
+        drift = rng.normal(0, sigma / 4, count)[:, None] * t
+        values = walk + drift + rng.normal(0, sigma, (count, n))
+        if name in ("ph_adc", "do_adc"):
+            spikes = rng.random((count, n)) < 0.01
+            values[spikes] += rng.choice([-1, 1], spikes.sum()) * rng.uniform(40, 200, spikes.sum())
+            values = np.clip(values, 0, 1023)
+        bursts[name][:, :n] = np.round(values)
+    return bursts
+
+
+# -------------------- Main --------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sensor health summary of raw burst samples")
+    parser.add_argument("archive", nargs="?", help="burst archive written by 25_USB_CHECK.py")
+    parser.add_argument("--synthetic", type=float, metavar="DAYS", help="analyse a simulated mission instead")
+    parser.add_argument("--samples", type=int, default=10, help="samples per synthetic burst")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        bursts = synthetic_bursts(int(args.synthetic * 48), args.samples)
+        source = f"synthetic {args.synthetic:g}-day mission"
+    elif args.archive:
+        bursts = BurstArchive(args.archive).load()
+        source = args.archive
+    else:
+        parser.error("an archive or --synthetic is required")
+
+    start = time.perf_counter()
+    stats = analyse(bursts)
+    seconds = time.perf_counter() - start
+    print(f"\n🔬 {source}: {len(bursts)} bursts, {int(bursts['n'].sum()) if len(bursts) else 0} samples "
+          f"analysed in {seconds * 1000:.1f} ms")
+    if len(bursts):
+        first, last = device_datetime(bursts["device_time"].min()), device_datetime(bursts["device_time"].max())
+        print(f"   {first:%Y-%m-%d %H:%M} .. {last:%Y-%m-%d %H:%M}\n")
+        print(f"  {'channel':<9} {'median std':>11} {'median noise':>13} {'p95 |drift|/s':>14} {'noisiest burst':>17}")
+        for name in CHANNELS:
+            noise = stats[f"{name}_noise"]
+            worst = "-" if np.isnan(noise).all() else \
+                f"{device_datetime(stats['device_time'][np.nanargmax(noise)]):%m-%d %H:%M}"
+            with np.errstate(all="ignore"):
+                print(f"  {name:<9} {np.nanmedian(stats[f'{name}_std']):11.3f} {np.nanmedian(noise):13.3f} "
+                      f"{np.nanpercentile(np.abs(stats[f'{name}_drift']), 95):14.3f} {worst:>17}")
+    print()
@@ -0,0 +1,204 @@
+###############################################################
+#   CALIBRATION PROFILES
+#   Versioned, per-device calibration for $Params readings.
+#   Profiles are loaded once and applied as precomputed
+#   affine transforms (value = raw * a + b per channel).
+###############################################################
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+
+import numpy as np
+import serial.tools.list_ports
+
+# -------------------- CONFIG --------------------
+CALIBRATION_FILE = "calibration_profiles.json"
+DEFAULT_DEVICE_ID = "default"
+
+CHANNELS = ("pH", "DO", "Temperature", "Pressure")
+
+# Wire scaling used by sendToGUI(): pH*100, DO*10, Temp*50, Pressure*1000
+PARAMS_SCALE = (1 / 100.0, 1 / 10.0, 1 / 50.0, 1 / 1000.0)
+
+# Firmware #defines the values on the wire were computed with
+FIRMWARE_DEFAULTS = {
+    "PH_OFFSET": 0.19,
+    "VREF_DO": 3300,
+    "CAL1_V": 1274,
+    "CAL1_T": 28,
+    "CAL2_V": 1262,
+    "CAL2_T": 21,
+}
+
+
+# -------------------- Profile --------------------
+@dataclass(frozen=True)
+class CalibrationProfile:
+    """One immutable calibration version for one device"""
+    device_id: str
+    version: int
+    scale: tuple = PARAMS_SCALE
+    gain: tuple = (1.0, 1.0, 1.0, 1.0)
+    offset: tuple = (0.0, 0.0, 0.0, 0.0)
+    firmware: dict = field(default_factory=lambda: dict(FIRMWARE_DEFAULTS))
+    created: str = ""
+    note: str = ""
+
+    def __post_init__(self):
+        # Fold wire scale and physical correction into one affine per channel
+        a = tuple(s * g for s, g in zip(self.scale, self.gain))
+        object.__setattr__(self, "_a", a)
+        object.__setattr__(self, "_b", tuple(self.offset))
+
+    @property
+    def coefficients(self):
+        """(a, b) tuples so that value = raw * a + b"""
+        return self._a, self._b
+
+    def apply(self, raw):
+        """Convert four raw $Params fields (str or number) to calibrated floats;
+        a missing field (None) stays None"""
+        a, b = self._a, self._b
+        if None in raw:
+            return tuple(None if r is None else float(r) * ai + bi for r, ai, bi in zip(raw, a, b))
+        return (float(raw[0]) * a[0] + b[0],
+                float(raw[1]) * a[1] + b[1],
+                float(raw[2]) * a[2] + b[2],
+                float(raw[3]) * a[3] + b[3])
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(device_id=d["device_id"], version=int(d["version"]),
+                   scale=tuple(d.get("scale", PARAMS_SCALE)),
+                   gain=tuple(d.get("gain", (1.0, 1.0, 1.0, 1.0))),
+                   offset=tuple(d.get("offset", (0.0, 0.0, 0.0, 0.0))),
+                   firmware=dict(d.get("firmware", FIRMWARE_DEFAULTS)),
+                   created=d.get("created", ""), note=d.get("note", ""))
+
+
+def default_profile(device_id=DEFAULT_DEVICE_ID):
+    """Version 0: plain $Params scaling, no correction"""
+    return CalibrationProfile(device_id=device_id, version=0, note="firmware defaults")
+
+
+def device_id_for_port(port):
+    """Stable device id for a serial port (USB serial number when available)"""
+    for info in serial.tools.list_ports.comports():
+        if info.device == port:
+            if getattr(info, "serial_number", None):
+                return info.serial_number
+            break
+    return port or DEFAULT_DEVICE_ID
+
+
+# -------------------- Profile Manager --------------------
+class CalibrationManager:
+    """Loads the profile file once and caches the active profile per device.
+
+    Old versions are never removed so historical data can be re-derived.
+    """
+
+    def __init__(self, path=CALIBRATION_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._profiles = {}   # device_id -> [CalibrationProfile, ...] sorted by version
+        self._active = {}     # device_id -> CalibrationProfile
+        self.load()
+
+    def load(self):
+        """(Re)read all profiles from disk"""
+        profiles = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            for device_id, versions in data.get("devices", {}).items():
+                profiles[device_id] = sorted(
+                    (CalibrationProfile.from_dict(v) for v in versions),
+                    key=lambda p: p.version)
+        with self._lock:
+            self._profiles = profiles
+            self._active = {}
+
+    def save(self):
+        """Write all profiles back to disk (atomic replace)"""
+        with self._lock:
+            data = {"devices": {dev: [p.to_dict() for p in versions]
+                                for dev, versions in self._profiles.items()}}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def devices(self):
+        with self._lock:
+            return sorted(self._profiles)
+
+    def history(self, device_id):
+        """All versions for a device, oldest first"""
+        with self._lock:
+            return list(self._profiles.get(device_id, ()))
+
+    def get(self, device_id, version=None):
+        """Specific version (or latest) for a device; falls back to defaults"""
+        with self._lock:
+            if version is None and device_id in self._active:
+                return self._active[device_id]
+            versions = self._profiles.get(device_id, ())
+            if version is None:
+                profile = versions[-1] if versions else default_profile(device_id)
+                self._active[device_id] = profile
+                return profile
+            for p in versions:
+                if p.version == version:
+                    return p
+        if version == 0:
+            return default_profile(device_id)
+        raise KeyError(f"No calibration v{version} for device '{device_id}'")
+
+    def active(self, device_id=DEFAULT_DEVICE_ID):
+        """Latest profile for a device (cached after the first lookup)"""
+        return self.get(device_id)
+
+    def add_profile(self, device_id, gain=None, offset=None, scale=None, firmware=None, note=""):
+        """Append a new version for a device, make it active and persist"""
+        with self._lock:
+            versions = self._profiles.setdefault(device_id, [])
+            previous = versions[-1] if versions else default_profile(device_id)
+            profile = CalibrationProfile(
+                device_id=device_id,
+                version=previous.version + 1,
+                scale=tuple(scale or previous.scale),
+                gain=tuple(gain or previous.gain),
+                offset=tuple(offset or previous.offset),
+                firmware=dict(firmware or previous.firmware),
+                created=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                note=note)
+            versions.append(profile)
+            self._active[device_id] = profile
+        self.save()
+        return profile
+
+
+# -------------------- Vectorized Reprocessing --------------------
+def reprocess(raw, profile):
+    """Apply a profile to an (N, 4) array of raw $Params integers"""
+    a, b = profile.coefficients
+    return np.asarray(raw, dtype=np.float64) * np.asarray(a) + np.asarray(b)
+
+
+def rederive(values, old_profile, new_profile):
+    """Re-derive an (N, 4) array of calibrated values under a different profile.
+
+    Both profiles are affine in the raw value, so the whole mapping
+    collapses to a single multiply-add per channel.
+    """
+    a_old, b_old = (np.asarray(c) for c in old_profile.coefficients)
+    a_new, b_new = (np.asarray(c) for c in new_profile.coefficients)
+    ratio = a_new / a_old
+    return np.asarray(values, dtype=np.float64) * ratio + (b_new - b_old * ratio)
@@ -0,0 +1,282 @@
+###############################################################
+#   CLOCK SYNC
+#   Host-side timekeeping for serial readings.
+#
+#   HostClock: the reader threads take time.monotonic() as bytes
+#   land; this turns those arrival stamps into wall-clock
+#   datetimes, so a reading keeps its millisecond timestamp no
+#   matter how long the Tk queue takes to show it.
+#
+#   DriftModel / ClockSync: the loggers' clocks (DS3231 RTC,
+#   compile-time setTime) drift against the host. STATUS
+#   exchanges give (device time, host time) pairs; a weighted
+#   least-squares fit with forgetting maps device time to host
+#   time online (offset + rate).
+#
+#   python clock_sync.py --simulate    (fit against the 25_USB_CHECK pty simulator)
+###############################################################
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sensor_logging import get_logger
+
+# -------------------- CONFIG --------------------
+WALL_STEP_TOLERANCE = 0.5     # s: wall clock moved this much against monotonic -> re-anchor
+SYNC_INTERVAL = 60.0          # s: minimum time between STATUS exchanges
+DRIFT_FORGET = 0.98           # weight kept by older exchanges at each new one
+STEP_TOLERANCE = 5.0          # s: residual that means the device clock was set / reset
+MIN_RATE_SPAN = 300.0         # s of device time before a rate (drift) is fitted
+DEVICE_RESOLUTION = 1.0       # s: the firmware prints whole seconds (truncated)
+
+serial_log = get_logger("serial")
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def format_stamp(when):
+    """Timestamp text with milliseconds, as written to the CSV files"""
+    return when.isoformat(sep=" ", timespec="milliseconds")
+
+
+# -------------------- Host Clock --------------------
+class HostClock:
+    """time.monotonic() -> wall-clock datetime.
+
+    Anchored once against time.time() so arrival stamps stay evenly spaced
+    while NTP slews the wall clock; a step larger than WALL_STEP_TOLERANCE
+    (manual change, NTP jump, resume from suspend) re-anchors.
+    """
+
+    def __init__(self):
+        self._offset = time.time() - time.monotonic()
+
+    def to_epoch(self, arrival):
+        current = time.time() - time.monotonic()
+        if abs(current - self._offset) > WALL_STEP_TOLERANCE:
+            serial_log.warning("🕒 Wall clock stepped %+.3f s - re-anchoring arrival stamps",
+                               current - self._offset)
+            self._offset = current
+        return self._offset + arrival
+
+    def to_datetime(self, arrival):
+        return datetime.fromtimestamp(self.to_epoch(arrival))
+
+    def now(self):
+        return self.to_datetime(time.monotonic())
+
+
+host_clock = HostClock()
+
+
+# -------------------- Drift Model --------------------
+class DriftModel:
+    """Online fit of host time - device time = offset + rate * (device - ref).
+
+    Each exchange brackets the device's clock read between the command's
+    send time and the reply's arrival, and the device prints truncated
+    whole seconds; both are taken as uniform errors and weight the sample.
+    Older exchanges decay by DRIFT_FORGET so a changing rate (temperature)
+    is followed. A residual beyond STEP_TOLERANCE means the device clock
+    was set (TIME=, SETTIME, reboot to compile time) and restarts the fit.
+    """
+
+    def __init__(self, forget=DRIFT_FORGET, min_rate_span=MIN_RATE_SPAN):
+        self.forget = forget
+        self.min_rate_span = min_rate_span
+        self.steps = 0
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.samples = 0
+            self._ref = None
+            self._sums = [0.0] * 5        # w, wx, wy, wxx, wxy
+            self._last_x = 0.0
+
+    @property
+    def ready(self):
+        return self.samples > 0
+
+    def add(self, device_time, sent_at, received_at):
+        """One exchange: device clock read (datetime) between two host monotonic stamps.
+        Returns the residual against the previous fit in seconds (None for the first)."""
+        host = host_clock.to_epoch((sent_at + received_at) / 2)
+        device = (device_time - _EPOCH).total_seconds() + DEVICE_RESOLUTION / 2
+        variance = ((received_at - sent_at) / 2) ** 2 / 3 + DEVICE_RESOLUTION ** 2 / 12
+
+        residual = None
+        if self.samples:
+            residual = host - self._host_epoch(device)
+            if abs(residual) > STEP_TOLERANCE:
+                serial_log.warning("🕒 Device clock jumped %+.1f s - restarting drift fit", residual)
+                self.reset()
+                self.steps += 1
+        with self._lock:
+            if self._ref is None:
+                self._ref = device
+            x, y, w = device - self._ref, host - device, 1.0 / variance
+            self._sums = [s * self.forget + v for s, v in zip(self._sums, (w, w * x, w * y, w * x * x, w * x * y))]
+            self._last_x = x
+            self.samples += 1
+        return residual
+
+    def _fit(self):
+        w, wx, wy, wxx, wxy = self._sums
+        denominator = w * wxx - wx * wx
+        if w == 0:
+            return 0.0, 0.0
+        if denominator <= 0 or (wxx / w - (wx / w) ** 2) < (self.min_rate_span / 2) ** 2:
+            return wy / w, 0.0            # not enough span for a rate yet: offset only
+        rate = (w * wxy - wx * wy) / denominator
+        return (wy - rate * wx) / w, rate
+
+    def _host_epoch(self, device):
+        with self._lock:
+            if self._ref is None:
+                return device
+            offset, rate = self._fit()
+            return device + offset + rate * (device - self._ref)
+
+    @property
+    def offset_s(self):
+        """Host minus device clock at the latest exchange"""
+        with self._lock:
+            offset, rate = self._fit()
+            return offset + rate * self._last_x
+
+    @property
+    def drift_ppm(self):
+        """Device clock rate against the host: positive = device runs fast"""
+        with self._lock:
+            rate = self._fit()[1]
+        return -rate / (1 + rate) * 1e6
+
+    def to_host(self, device_time):
+        """Device (RTC) datetime -> host wall-clock datetime; unchanged before the first exchange"""
+        if not self.ready:
+            return device_time
+        device = (device_time - _EPOCH).total_seconds()
+        return datetime.fromtimestamp(self._host_epoch(device))
+
+    def describe(self):
+        if not self.ready:
+            return "device clock: not synced"
+        return (f"device clock {-self.offset_s:+.3f} s ahead of host, {self.drift_ppm:+.1f} ppm "
+                f"({self.samples} exchanges)")
+
+
+# -------------------- Exchanges --------------------
+class ClockSync:
+    """Runs STATUS exchanges on a device_commands.CommandClient and feeds a DriftModel.
+
+    `request()` is cheap to call often (after every reading, from the idle
+    reader loop): it sends nothing while an exchange is in flight or the
+    last one is younger than `interval`. Failed exchanges (device asleep,
+    firmware without STATUS) are simply skipped.
+    """
+
+    def __init__(self, client, model, interval=SYNC_INTERVAL):
+        self.client = client
+        self.model = model
+        self.interval = interval
+        self._last = None
+        self._in_flight = False
+
+    def request(self, force=False):
+        now = time.monotonic()
+        if self._in_flight or (not force and self._last is not None and now - self._last < self.interval):
+            return None
+        self._in_flight, self._last = True, now
+        future = self.client.status()
+        future.add_done_callback(lambda f: self._done(f, now))
+        return future
+
+    def clock_set(self):
+        """The device clock was just set (TIME= / SETTIME): the old fit no longer applies"""
+        self.model.reset()
+        self._last = None
+
+    def _done(self, future, sent_at):
+        self._in_flight = False
+        try:
+            status = future.result()
+        except Exception as e:
+            serial_log.debug("Clock sync exchange failed: %s", e)
+            return
+        received_at = status.received_at if status.received_at is not None else time.monotonic()
+        residual = self.model.add(status.device_time, sent_at, received_at)
+        serial_log.info("🕒 %s%s", self.model.describe(),
+                        "" if residual is None else f", residual {residual * 1000:+.0f} ms")
+
+
+# -------------------- Main --------------------
+if __name__ == "__main__":
+    import argparse
+
+    from device_commands import CommandClient
+    from serial_link import SerialLink
+    from telemetry import StreamDecoder
+
+    parser = argparse.ArgumentParser(description="Fit the device clock against the host")
+    parser.add_argument("--port")
+    parser.add_argument("--baud", type=int, default=57600)
+    parser.add_argument("--simulate", action="store_true", help="use the 25_USB_CHECK pty simulator")
+    parser.add_argument("--exchanges", type=int, default=150)
+    parser.add_argument("--every", type=float, default=0.137,
+                        help="seconds between STATUS exchanges (not a divisor of 1 s: the device prints whole seconds)")
+    parser.add_argument("--skew-ppm", type=float, default=20000.0, help="simulated device clock rate error")
+    args = parser.parse_args()
+
+    sim = None
+    port = args.port
+    if args.simulate:
+        from teensy_simulator import UsbCheckSimulator
+        sim = UsbCheckSimulator(interval=3600, save_every=0)
+        skew, start, t0 = args.skew_ppm * 1e-6, datetime.now(), time.monotonic()
+        sim.rtc_now = lambda: (start + timedelta(seconds=37.4) +
+                               (datetime.now() - start) * (1 + skew)).replace(microsecond=0)
+        port = sim.start(heartbeat=False)
+    if not port:
+        parser.error("--port or --simulate is required")
+
+    link = SerialLink(port, args.baud).open()
+    client = CommandClient(link)
+    model = DriftModel(forget=1.0, min_rate_span=args.exchanges * args.every / 4)
+    sync = ClockSync(client, model, interval=0)
+    stop = threading.Event()
+
+    def reader():
+        decoder = StreamDecoder()
+        while not stop.is_set():
+            raw = link.read_available()
+            arrival = time.monotonic()
+            if not raw:
+                client.poll()
+                time.sleep(0.001)
+                continue
+            for line in decoder.feed(raw):
+                if isinstance(line, str):
+                    client.feed_line(line, arrival)
+
+    threading.Thread(target=reader, daemon=True).start()
+    try:
+        for _ in range(args.exchanges):
+            future = sync.request(force=True)
+            if future is not None:
+                try:
+                    future.result(timeout=5)
+                except Exception as e:
+                    print(f"❌ STATUS: {e}")
+            time.sleep(args.every)
+        print(f"🕒 {model.describe()}")
+        if sim:
+            print(f"   simulated: device clock {37.4 + skew * (time.monotonic() - t0):+.3f} s ahead, "
+                  f"{args.skew_ppm:+.1f} ppm")
+    finally:
+        stop.set()
+        link.close()
+        if sim:
+            sim.stop()
@@ -0,0 +1,101 @@
+###############################################################
+#   CONSOLE BLOCKS
+#   Assembler for the multi-line reading blocks printed by
+#   25_USB_CHECK.ino: everything between two ======== lines
+#   becomes one atomic reading with the device (RTC) timestamp.
+###############################################################
+
+import re
+from datetime import datetime
+
+from reading_bus import Reading
+
+# -------------------- Block Format --------------------
+# ========================================
+# Timestamp: 14/1/2026 9:30:0
+# ----------------------------------------
+# PH Raw ADC: 512.3
+# PH Voltage: 1.650 V
+# PH Value:   7.41
+# ----------------------------------------
+# DO mV:      812
+# DO Value:   8120 ug/L
+# ----------------------------------------
+# Temp:       18.25 °C
+# Pressure:   1013.25 mbar
+# ========================================
+BLOCK_DELIMITER = "========"
+_NUMBER = r"([-+]?\d*\.?\d+)"
+_TIMESTAMP = re.compile(r"^Timestamp:\s*(\d{1,2})/(\d{1,2})/(\d{4})\s+(\d{1,2}):(\d{1,2}):(\d{1,2})")
+_FIELDS = {
+    "ph": re.compile(r"^PH [Vv]alue:\s*" + _NUMBER),
+    "do": re.compile(r"^DO [Vv]alue:\s*" + _NUMBER),
+    "temp": re.compile(r"^[Tt]emp:\s*" + _NUMBER),
+    "pressure": re.compile(r"^[Pp]ressure:\s*" + _NUMBER),
+}
+DO_UG_PER_MG = 1000.0         # the firmware prints DO in ug/L
+
+
+class BlockAssembler:
+    """Feed console lines one by one; a Reading comes out per complete block.
+
+    `feed()` returns (consumed, reading): consumed is True for every line
+    that belongs to a reading block (delimiters included) so callers can
+    skip their per-line handling, reading is set on the closing delimiter
+    of a block that had all four values. A block only starts at its
+    Timestamp line, so the startup banner and a stream joined mid-block
+    resynchronise by themselves. Blocks missing a value
+    (a reset mid-print, a dropped line) are counted in `partial` and never
+    emitted.
+    """
+
+    def __init__(self):
+        self.readings = 0
+        self.partial = 0
+        self._block = None
+
+    @property
+    def in_block(self):
+        return self._block is not None
+
+    def reset(self):
+        """Forget a half-received block (reconnect, port change)"""
+        self._block = None
+
+    def feed(self, line):
+        line = line.strip()
+        if line.startswith(BLOCK_DELIMITER):
+            return True, self._close() if self._block is not None else None
+        if not line:
+            return self._block is not None, None
+
+        m = _TIMESTAMP.match(line)
+        if m:
+            if self._block:
+                self.partial += 1     # previous block never closed
+            self._block = {}
+            day, month, year, hour, minute, second = map(int, m.groups())
+            try:
+                self._block["timestamp"] = datetime(year, month, day, hour, minute, second)
+            except ValueError:
+                pass
+            return True, None
+        if self._block is None:
+            return False, None        # banner or other text between delimiters
+
+        for key, pattern in _FIELDS.items():
+            m = pattern.match(line)
+            if m:
+                self._block[key] = float(m.group(1))
+                break
+        return True, None
+
+    def _close(self):
+        block, self._block = self._block, None
+        if any(key not in block for key in _FIELDS):
+            self.partial += 1
+            return None
+        self.readings += 1
+        stamp = block.get("timestamp")
+        return Reading(stamp or datetime.now(), block["ph"], block["do"] / DO_UG_PER_MG, block["temp"],
+                       block["pressure"], saved=True, device_time=stamp)
@@ -0,0 +1,288 @@
+###############################################################
+#   DATALOG
+#   Parser for the SD card Datalog.txt records written by
+#   SD_sketch_jan14a.ino (full downloads and range backfills),
+#   plus a memory-mapped scanner for multi-hundred-MB logs.
+###############################################################
+
+import mmap
+import os
+import re
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+# -------------------- Record Format --------------------
+# --------------------------------------------------------------------------------
+# Reading ID: 42
+# Date & Time: 14/01/2026 at 10:30:00
+# ...
+# pH Value: 7.41
+# Temperature: 18.25 °C [Sensor: OK]
+# Pressure: 1013.25 mbar [Sensor: OK]
+# DO Concentration: 8120 ug/L (8.12 mg/L)
+RECORD_SEPARATOR = "--------"
+_FIELDS = {
+    "reading_id": re.compile(r"^Reading ID:\s*(\d+)"),
+    "timestamp": re.compile(r"^Date & Time:\s*(\d{2})/(\d{2})/(\d{4}) at (\d{2}):(\d{2}):(\d{2})"),
+    "pH": re.compile(r"^pH Value:\s*(-?[\d.]+)"),
+    "Temperature": re.compile(r"^Temperature:\s*(-?[\d.]+)"),
+    "Pressure": re.compile(r"^Pressure:\s*(-?[\d.]+)"),
+    "DO": re.compile(r"^DO Concentration:.*\((-?[\d.]+) mg/L\)"),
+}
+_LEADS = frozenset(pattern.pattern[1:3] for pattern in _FIELDS.values())   # cheap pre-filter
+# Every line the firmware writes into a record (parsed or not)
+RECORD_LINE_PREFIXES = (RECORD_SEPARATOR, "Reading ID:", "Date & Time:", "Runtime:", "pH Voltage:", "pH Value:",
+                        "Temperature:", "Pressure:", "DO Voltage:", "DO Concentration:", "Reading Duration:")
+
+# Factors that turn Datalog values back into raw $Params integers
+PARAMS_FACTORS = {"pH": 100, "DO": 10, "Temperature": 50, "Pressure": 1000}
+
+
+def is_record_line(line):
+    """True for a Datalog record line (as resent by DOWNLOAD_SD / DOWNLOAD_SD_RANGE)"""
+    return line.strip().startswith(RECORD_LINE_PREFIXES)
+
+
+def _finish(record, records):
+    if record and "reading_id" in record and "timestamp" in record:
+        records.append(record)
+
+
+def parse_records(lines):
+    """Datalog lines -> list of dicts with reading_id, timestamp (datetime),
+    pH, DO, Temperature, Pressure (firmware values; missing fields omitted)"""
+    records = []
+    record = None
+    for line in lines:
+        line = line.strip()
+        if line.startswith(RECORD_SEPARATOR):
+            _finish(record, records)
+            record = {}
+            continue
+        if line[:2] not in _LEADS:
+            continue
+        for key, pattern in _FIELDS.items():
+            m = pattern.match(line)
+            if not m:
+                continue
+            if record is None:
+                record = {}
+            if key == "reading_id":
+                if "reading_id" in record:
+                    # Record without its own separator
+                    _finish(record, records)
+                    record = {}
+                record[key] = int(m.group(1))
+            elif key == "timestamp":
+                day, month, year, hour, minute, second = map(int, m.groups())
+                record[key] = datetime(year, month, day, hour, minute, second)
+            else:
+                record[key] = float(m.group(1))
+            break
+    _finish(record, records)
+    return records
+
+
+def current_run(records):
+    """Records after the last Reading ID decrease, i.e. of the newest counter.txt
+    run (a range download also returns matching IDs of runs before a reset)"""
+    start = 0
+    for i in range(1, len(records)):
+        if records[i]["reading_id"] < records[i - 1]["reading_id"]:
+            start = i
+    return records[start:]
+
+
+def record_raw_fields(record):
+    """Raw pH*100, DO*10, Temp*50, Pressure*1000 for calibration.apply()
+    (None for a field missing from the record - stored as NULL, not as 0)"""
+    return tuple(None if record.get(name) is None else record[name] * factor
+                 for name, factor in PARAMS_FACTORS.items())
+
+
+# -------------------- Columnar Records --------------------
+# Compact form for bulk scans: 48 bytes per record instead of a dict
+# (missing sensor fields are NaN, timestamps are epoch seconds)
+RECORD_DTYPE = np.dtype([("reading_id", "<i8"), ("ts", "<f8"), ("pH", "<f8"),
+                         ("DO", "<f8"), ("Temperature", "<f8"), ("Pressure", "<f8")])
+
+
+def records_to_array(records):
+    arr = np.empty(len(records), dtype=RECORD_DTYPE)
+    arr["reading_id"] = [r["reading_id"] for r in records]
+    arr["ts"] = [r["timestamp"].timestamp() for r in records]
+    for name in PARAMS_FACTORS:
+        arr[name] = [r.get(name, np.nan) for r in records]
+    return arr
+
+
+def array_raw_fields(arr):
+    """(N, 4) raw $Params values of a RECORD_DTYPE array for calibration.reprocess()
+    (missing fields stay NaN)"""
+    return np.column_stack([arr[name] * factor for name, factor in PARAMS_FACTORS.items()])
+
+
+# -------------------- Memory-Mapped Scanner --------------------
+RECORD_START = b"Reading ID:"
+CHUNK_BYTES = 1024 * 1024          # target size of one parallel parse chunk
+
+
+def _parse_span(path, start, end, columns=False):
+    """Records in bytes [start, end) of a Datalog file (own mapping, so it
+    works the same in a worker thread or a worker process)"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        text = mm[start:end].decode("utf-8", errors="replace")
+    records = parse_records(text.splitlines())
+    return records_to_array(records) if columns else records
+
+
+class DatalogFile:
+    """Random-access view of a downloaded Datalog.txt.
+
+    The file is mapped, never read into Python strings as a whole. One pass
+    of `mmap.find` locates every "Reading ID:" line (a record runs from its
+    Reading ID line to the next one; the ---- separator in between is
+    skipped by parse_records) and keeps the offsets and IDs in two numpy
+    arrays - 16 bytes per record. Records are then parsed on demand: one by
+    ID, or all of them in CHUNK_BYTES pieces across a worker pool.
+
+    Threads are the default so the GUI script is never re-imported;
+    command-line tools with a __main__ guard can pass processes=True.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self.offsets, self.ids = self._index()
+        self._by_id = np.argsort(self.ids, kind="stable")
+        self._sorted_ids = self.ids[self._by_id]      # searched by get(); built once
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    # -------------------- Index --------------------
+    def _index(self):
+        offsets, ids = [], []
+        mm = self._mm
+        pos = mm.find(RECORD_START) if mm is not None else -1
+        while pos >= 0:
+            if pos == 0 or mm[pos - 1] in b"\r\n":
+                eol = mm.find(b"\n", pos, pos + 64)
+                digits = mm[pos + len(RECORD_START):eol if eol >= 0 else pos + 64].strip()
+                if digits.isdigit():
+                    offsets.append(pos)
+                    ids.append(int(digits))
+            pos = mm.find(RECORD_START, pos + len(RECORD_START))
+        return np.array(offsets, dtype=np.int64), np.array(ids, dtype=np.int64)
+
+    def _span(self, i):
+        end = self.offsets[i + 1] if i + 1 < len(self.offsets) else self.size
+        return int(self.offsets[i]), int(end)
+
+    # -------------------- Random Access --------------------
+    def get(self, reading_id):
+        """The record with this Reading ID (the last one if the log repeats it), or None"""
+        pos = np.searchsorted(self._sorted_ids, reading_id, side="right") - 1
+        if pos < 0 or self._sorted_ids[pos] != reading_id:
+            return None
+        start, end = self._span(int(self._by_id[pos]))
+        records = parse_records(self._mm[start:end].decode("utf-8", errors="replace").splitlines())
+        return records[0] if records else None
+
+    def range(self, first_id, last_id):
+        """Records with first_id <= Reading ID <= last_id, in file order"""
+        hits = np.nonzero((self.ids >= first_id) & (self.ids <= last_id))[0]
+        records = []
+        for i in hits.tolist():
+            start, end = self._span(i)
+            records += parse_records(self._mm[start:end].decode("utf-8", errors="replace").splitlines())
+        return records
+
+    # -------------------- Bulk Scan --------------------
+    def chunks(self, chunk_bytes=CHUNK_BYTES):
+        """(start, end) byte ranges that split the file on record boundaries"""
+        if not len(self.offsets):
+            return []
+        offsets = self.offsets.tolist()
+        bounds = [offsets[0]]
+        i = 0
+        while True:
+            i = max(bisect_right(offsets, offsets[i] + chunk_bytes) - 1, i + 1)
+            if i >= len(offsets):
+                break
+            bounds.append(offsets[i])
+        bounds.append(self.size)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def iter_chunks(self, workers=4, processes=False, columns=False, chunk_bytes=CHUNK_BYTES):
+        """Yield the records chunk by chunk, in file order - lists of dicts,
+        or RECORD_DTYPE arrays with columns=True (much cheaper to return
+        from worker processes). At most workers + 1 chunks are in flight,
+        so memory stays bounded however large the file is."""
+        spans = self.chunks(chunk_bytes)
+        if workers <= 1 or len(spans) <= 1:
+            for start, end in spans:
+                yield _parse_span(self.path, start, end, columns)
+            return
+        pool_cls = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with pool_cls(max_workers=workers) as pool:
+            pending = []
+            for start, end in spans:
+                pending.append(pool.submit(_parse_span, self.path, start, end, columns))
+                if len(pending) > workers:
+                    yield pending.pop(0).result()
+            for future in pending:
+                yield future.result()
+
+    def records(self, workers=4, processes=False):
+        """Every record, one at a time"""
+        for chunk in self.iter_chunks(workers, processes):
+            yield from chunk
+
+    def to_array(self, workers=4, processes=False):
+        """The whole log as one RECORD_DTYPE array"""
+        chunks = list(self.iter_chunks(workers, processes, columns=True))
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=RECORD_DTYPE)
+
+
+# -------------------- Main --------------------
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Scan a downloaded Datalog.txt")
+    parser.add_argument("path")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--id", type=int, help="print one record by Reading ID")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with DatalogFile(args.path) as log:
+        print(f"📂 {args.path}: {log.size / 1e6:.1f} MB, {len(log)} records "
+              f"(indexed in {time.perf_counter() - start:.2f} s)")
+        if args.id is not None:
+            print(log.get(args.id) or f"❌ Reading ID {args.id} not in the log")
+        else:
+            start = time.perf_counter()
+            arr = log.to_array(args.workers, processes=True)
+            print(f"✅ Parsed {len(arr)} records with {args.workers} worker(s) in "
+                  f"{time.perf_counter() - start:.2f} s")
+            if len(arr):
+                print(f"   Reading IDs {arr['reading_id'].min()}-{arr['reading_id'].max()}")
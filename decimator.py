@@ -0,0 +1,130 @@
+###############################################################
+#   DECIMATOR
+#   One stored sample per sampling interval from a reader that
+#   drains the port continuously. Readings are binned on the
+#   monotonic clock (interval boundaries at multiples of the
+#   interval) and each closed bin becomes one sample:
+#
+#     last     newest reading of the interval
+#     mean     per-channel mean (running sums, O(1) memory)
+#     median   per-channel median of the bin (at most MAX_BIN
+#              readings kept - the newest ones)
+#
+#   python decimator.py --rate 10 --interval 2 --method median
+###############################################################
+
+import math
+import statistics
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+# -------------------- CONFIG --------------------
+METHODS = ("last", "mean", "median")
+MAX_BIN = 4096                # readings kept per interval for the median
+
+
+@dataclass(frozen=True)
+class Sample:
+    """One decimated sample: `arrival` is the monotonic stamp of the newest reading"""
+    arrival: float
+    values: tuple
+    count: int
+
+
+class Decimator:
+    """Bins (arrival, values) readings into one Sample per interval.
+
+    `add()` is called by the reader for every reading and returns the
+    samples of the bins it closed; `poll(now)` closes a bin whose interval
+    has ended without a newer reading. Both are cheap enough to call per
+    line. Thread-safe, so the Tk thread may `configure()` it meanwhile.
+    """
+
+    def __init__(self, interval_s, method="last", max_bin=MAX_BIN):
+        self._lock = threading.Lock()
+        self.max_bin = max_bin
+        self.emitted = 0
+        self.configure(interval_s, method)
+
+    def configure(self, interval_s, method="last"):
+        """New interval / method; the bin in progress is dropped"""
+        if interval_s <= 0:
+            raise ValueError("sampling interval must be positive")
+        if method not in METHODS:
+            raise ValueError(f"unknown decimation method {method!r} (choose from {', '.join(METHODS)})")
+        with self._lock:
+            self.interval_s = interval_s
+            self.method = method
+            self._reset(None)
+
+    def _reset(self, index):
+        self._index = index
+        self._count = 0
+        self._last = None
+        self._arrival = None
+        self._sums = None
+        self._bin = deque(maxlen=self.max_bin)
+
+    def add(self, arrival, values):
+        values = tuple(values)
+        with self._lock:
+            index = math.floor(arrival / self.interval_s)
+            closed = self._close() if self._index is not None and index != self._index else []
+            if self._index != index:
+                self._reset(index)
+            self._count += 1
+            self._last, self._arrival = values, arrival
+            if self.method == "mean":
+                self._sums = values if self._sums is None else tuple(map(sum, zip(self._sums, values)))
+            elif self.method == "median":
+                self._bin.append(values)
+        return closed
+
+    def poll(self, now):
+        with self._lock:
+            if self._index is None or math.floor(now / self.interval_s) == self._index:
+                return []
+            closed = self._close()
+            self._reset(None)
+        return closed
+
+    def _close(self):
+        """Sample of the current bin (lock held)"""
+        if not self._count:
+            return []
+        if self.method == "mean":
+            values = tuple(s / self._count for s in self._sums)
+        elif self.method == "median":
+            values = tuple(statistics.median(channel) for channel in zip(*self._bin))
+        else:
+            values = self._last
+        self.emitted += 1
+        return [Sample(self._arrival, values, self._count)]
+
+
+# -------------------- Main --------------------
+if __name__ == "__main__":
+    import argparse
+    import random
+    import time
+
+    parser = argparse.ArgumentParser(description="Decimate a simulated reading stream")
+    parser.add_argument("--rate", type=float, default=10, help="readings per second")
+    parser.add_argument("--interval", type=float, default=2)
+    parser.add_argument("--method", default="mean", choices=METHODS)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    decimator = Decimator(args.interval, args.method)
+    rng = random.Random(0)
+    start = time.monotonic()
+    for i in range(int(args.seconds * args.rate)):
+        arrival = start + i / args.rate
+        values = (8.1 + rng.gauss(0, 0.02), 7.5 + rng.gauss(0, 0.1), 18 + i * 0.01, 1013 + rng.gauss(0, 0.5))
+        for sample in decimator.add(arrival, values):
+            print(f"⏱️ +{sample.arrival - start:6.2f} s  {sample.count:3d} readings  "
+                  + "  ".join(f"{v:8.3f}" for v in sample.values))
+    for sample in decimator.poll(start + args.seconds + args.interval):
+        print(f"⏱️ +{sample.arrival - start:6.2f} s  {sample.count:3d} readings  "
+              + "  ".join(f"{v:8.3f}" for v in sample.values) + "  (closed by poll)")
@@ -0,0 +1,386 @@
+###############################################################
+#   DEVICE COMMANDS
+#   Request/response client for the Teensy serial commands:
+#   N= T= RAW= NOW SEND STATUS SETTIME TIME= (25_USB_CHECK.ino) and
+#   DOWNLOAD_SD (SD_sketch_jan14a.ino). Replies are picked out of
+#   the live stream, matched to their request and returned as
+#   typed results through futures, with per-command timeouts.
+#
+#   python device_commands.py --simulate    (round trip against the pty simulator)
+###############################################################
+
+import re
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import datetime
+
+from console_blocks import BlockAssembler
+from sensor_logging import get_logger
+
+# -------------------- CONFIG --------------------
+DEFAULT_TIMEOUT = 3.0         # seconds without a reply line before a command fails
+TRANSFER_TIMEOUT = 30.0       # SEND / DOWNLOAD_SD: silence allowed between file lines
+SAMPLE_MARGIN = 5.0           # NOW: on top of N x T sampling time
+
+serial_log = get_logger("serial")
+
+_HELP_REPLY = "Commands: N=<num>"   # 25_USB_CHECK's answer to anything it does not know
+
+
+# -------------------- Results --------------------
+@dataclass(frozen=True)
+class DeviceStatus:
+    """STATUS reply of 25_USB_CHECK.ino"""
+    samples: int                  # N: samples averaged per reading
+    interval_ms: int              # T: ms between samples
+    sd_available: bool
+    device_time: datetime
+    next_reading_s: int
+    received_at: float = None    # time.monotonic() when the Time: line arrived (clock_sync)
+
+
+def _iso_time(text):
+    return datetime.fromisoformat(text.strip())
+
+
+# -------------------- Reply Matchers --------------------
+# feed(line) -> (consumed, done). Once done, `result` (or `error`) is set.
+class _Reply:
+    started = False
+    result = None
+    error = None
+    arrival = None                # monotonic arrival of the line being fed
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+
+
+class _ValueReply(_Reply):
+    """One line "prefix <value>" (N=, T=, SETTIME, TIME=)"""
+
+    def __init__(self, prefix, convert, timeout=DEFAULT_TIMEOUT):
+        super().__init__(timeout)
+        self.prefix = prefix
+        self.convert = convert
+
+    def feed(self, line):
+        if line.startswith(self.prefix):
+            self.result = self.convert(line[len(self.prefix):])
+            return True, True
+        if line.startswith(_HELP_REPLY):
+            self.error = RuntimeError("command rejected by the firmware")
+            return True, True
+        return False, False
+
+
+class _StatusReply(_Reply):
+    _FIRST = re.compile(r"^N=(\d+) T=(\d+) SD=(YES|NO)")
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        super().__init__(timeout)
+        self.fields = {}
+
+    def feed(self, line):
+        m = self._FIRST.match(line)
+        if m and not self.started:
+            self.started = True
+            self.fields.update(samples=int(m.group(1)), interval_ms=int(m.group(2)),
+                               sd_available=m.group(3) == "YES")
+            return True, False
+        if not self.started:
+            return False, False
+        if line.startswith("Time: "):
+            self.fields["device_time"] = _iso_time(line[6:])
+            self.fields["received_at"] = self.arrival
+            return True, False
+        if line.startswith("Next reading in:"):
+            self.fields["next_reading_s"] = int(line.split(":", 1)[1].split()[0])
+            self.result = DeviceStatus(**self.fields)
+            return True, True
+        return False, False
+
+
+class _NowReply(_Reply):
+    """Manual reading: the block itself still flows to the live parser"""
+
+    def __init__(self, timeout):
+        super().__init__(timeout)
+        self.blocks = BlockAssembler()
+
+    def feed(self, line):
+        if not self.started:
+            if line.startswith("[Manual] Taking reading"):
+                self.started = True
+                return True, False
+            return False, False
+        if line.startswith("Sampling ") and line.endswith("times..."):
+            return True, False
+        _, reading = self.blocks.feed(line)
+        if reading is not None:
+            self.result = reading
+            return False, True
+        return False, False
+
+
+class _FileReply(_Reply):
+    """SEND: lines between [START FILE] and [END FILE]"""
+
+    def __init__(self, timeout=TRANSFER_TIMEOUT):
+        super().__init__(timeout)
+        self.lines = []
+
+    def feed(self, line):
+        if not self.started:
+            if line.startswith("[START FILE]"):
+                self.started = True
+                return True, False
+            if line.startswith("[Error]"):
+                self.error = RuntimeError(line)
+                return True, True
+            return False, False
+        if line.startswith("[END FILE]"):
+            self.result = self.lines
+            return True, True
+        self.lines.append(line)
+        return True, False
+
+
+class _DownloadReply(_Reply):
+    """DOWNLOAD_SD: Datalog lines up to SD_DOWNLOAD_END"""
+
+    def __init__(self, timeout=TRANSFER_TIMEOUT):
+        super().__init__(timeout)
+        self.lines = []
+
+    def feed(self, line):
+        if line.startswith("SD_DOWNLOAD_ERROR"):
+            self.error = RuntimeError(line)
+            return True, True
+        if line.startswith("SD_DOWNLOAD_PROGRESS"):
+            self.started = True
+            return True, False
+        if not self.started:
+            return False, False
+        if line == "SD_DOWNLOAD_END":
+            self.result = self.lines
+            return True, True
+        self.lines.append(line)
+        return True, False
+
+
+# -------------------- Client --------------------
+class _Pending:
+    __slots__ = ("command", "reply", "future", "deadline")
+
+    def __init__(self, command, reply):
+        self.command = command
+        self.reply = reply
+        self.future = Future()
+        self.deadline = time.monotonic() + reply.timeout
+
+
+class CommandClient:
+    """Sends commands on a serial link and matches replies in the stream.
+
+    Commands are written immediately, so several can be in flight; the
+    firmware answers them in order. The reader thread hands every received
+    line to `feed_line()`, which returns True when the line was part of a
+    reply (the caller then skips its normal display / parsing), and calls
+    `poll()` while idle so timeouts fire without traffic.
+
+    A reply is offered to every pending command in order. When the reply
+    to a later command starts, earlier ones that never saw a reply line
+    were ignored by the firmware and fail straight away. Deadlines are
+    inactivity timeouts: each consumed reply line extends them, so long
+    file transfers only fail when the device goes quiet.
+    """
+
+    def __init__(self, link):
+        self.link = link
+        self.sent = 0
+        self.timeouts = 0
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pending)
+
+    # -------------------- Sending --------------------
+    def request(self, command, reply):
+        """Write one command; returns a Future for its reply"""
+        pending = _Pending(command, reply)
+        with self._lock:
+            self._pending.append(pending)
+        try:
+            self.link.write(f"{command}\n".encode())
+            self.link.flush()
+        except Exception as e:
+            with self._lock:
+                if pending in self._pending:
+                    self._pending.remove(pending)
+            pending.future.set_exception(e)
+            return pending.future
+        self.sent += 1
+        serial_log.info("📤 Command: %s", command)
+        return pending.future
+
+    def set_samples(self, n):
+        """N=: samples averaged per reading -> value the firmware kept (1..100)"""
+        return self.request(f"N={int(n)}", _ValueReply("N_samples = ", int))
+
+    def set_interval(self, ms):
+        """T=: ms between samples -> value the firmware kept (1..60000)"""
+        return self.request(f"T={int(ms)}", _ValueReply("samplingInterval = ", int))
+
+    def set_raw_bursts(self, enabled):
+        """RAW=: stream every sample of a reading as a $BURST line (bursts.py) -> new setting"""
+        return self.request(f"RAW={int(bool(enabled))}", _ValueReply("raw_bursts = ", lambda v: int(v) != 0))
+
+    def status(self):
+        """STATUS -> DeviceStatus"""
+        return self.request("STATUS", _StatusReply())
+
+    def sample_now(self, samples=100, interval_ms=60000):
+        """NOW -> Reading of the manual block. Pass the current N / T so the
+        timeout covers the sampling time (defaults assume the firmware maxima)."""
+        return self.request("NOW", _NowReply(samples * interval_ms / 1000 + SAMPLE_MARGIN))
+
+    def send_file(self):
+        """SEND -> the device's datalog.txt lines"""
+        return self.request("SEND", _FileReply())
+
+    def set_compile_time(self):
+        """SETTIME -> RTC time after resetting it to the sketch's compile time"""
+        return self.request("SETTIME", _ValueReply("RTC set to compile time: ", _iso_time))
+
+    def set_time(self, when):
+        """TIME= -> RTC time the firmware reports back"""
+        return self.request(f"TIME={when.strftime('%Y-%m-%d %H:%M:%S')}",
+                            _ValueReply("RTC set to: ", _iso_time))
+
+    def download_sd(self):
+        """DOWNLOAD_SD (SD_sketch_jan14a) -> Datalog.txt lines"""
+        return self.request("DOWNLOAD_SD", _DownloadReply())
+
+    # -------------------- Receiving (reader thread) --------------------
+    def feed_line(self, line, arrival=None):
+        """`arrival`: time.monotonic() when the line's bytes were read (defaults to now)"""
+        if not self._pending:
+            return False
+        line = line.strip()
+        if arrival is None:
+            arrival = time.monotonic()
+        with self._lock:
+            for i, pending in enumerate(self._pending):
+                was_started = pending.reply.started
+                pending.reply.arrival = arrival
+                consumed, done = pending.reply.feed(line)
+                if not (consumed or done):
+                    continue
+                pending.deadline = time.monotonic() + pending.reply.timeout
+                finished = [pending] if done else []
+                if not was_started:
+                    # The firmware handles commands in order: earlier ones got no reply
+                    finished += [p for p in self._pending[:i] if not p.reply.started]
+                self._pending = [p for p in self._pending if p not in finished]
+                break
+            else:
+                return False
+        for pending in finished:
+            self._resolve(pending)
+        return consumed
+
+    def poll(self):
+        """Fail commands whose reply is overdue"""
+        if not self._pending:
+            return
+        now = time.monotonic()
+        with self._lock:
+            expired = [p for p in self._pending if now > p.deadline]
+            self._pending = [p for p in self._pending if p not in expired]
+        for pending in expired:
+            self.timeouts += 1
+            serial_log.warning("⏱️ No reply to %s within %.1f s", pending.command, pending.reply.timeout)
+            pending.future.set_exception(TimeoutError(f"{pending.command}: no reply within "
+                                                      f"{pending.reply.timeout:.1f} s"))
+
+    def cancel_all(self, reason="link closed"):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for p in pending:
+            p.future.set_exception(ConnectionError(f"{p.command}: {reason}"))
+
+    @staticmethod
+    def _resolve(pending):
+        reply = pending.reply
+        if reply.error is not None:
+            pending.future.set_exception(reply.error)
+        elif reply.result is None and not reply.started:
+            pending.future.set_exception(RuntimeError(f"{pending.command}: no reply (ignored by the firmware?)"))
+        else:
+            pending.future.set_result(reply.result)
+
+
+# -------------------- Main --------------------
+if __name__ == "__main__":
+    import argparse
+
+    from serial_link import SerialLink
+    from telemetry import StreamDecoder
+
+    parser = argparse.ArgumentParser(description="Round trip the device commands")
+    parser.add_argument("--port")
+    parser.add_argument("--baud", type=int, default=57600)
+    parser.add_argument("--simulate", action="store_true", help="use the 25_USB_CHECK pty simulator")
+    args = parser.parse_args()
+
+    sim = None
+    port = args.port
+    if args.simulate:
+        from teensy_simulator import UsbCheckSimulator
+        sim = UsbCheckSimulator(interval=0.5, save_every=4)
+        port = sim.start()
+    if not port:
+        parser.error("--port or --simulate is required")
+
+    link = SerialLink(port, args.baud).open()
+    client = CommandClient(link)
+    stop = threading.Event()
+    live = []
+
+    def reader():
+        decoder = StreamDecoder()
+        while not stop.is_set():
+            raw = link.read_available()
+            if not raw:
+                client.poll()
+                time.sleep(0.01)
+                continue
+            for line in decoder.feed(raw):
+                if isinstance(line, str) and not client.feed_line(line):
+                    live.append(line)
+
+    threading.Thread(target=reader, daemon=True).start()
+    try:
+        # Pipelined: all of these are on the wire before the first reply arrives
+        start = time.perf_counter()
+        futures = {"N=": client.set_samples(3), "T=": client.set_interval(20), "STATUS": client.status(),
+                   "TIME=": client.set_time(datetime(2026, 1, 14, 12, 0, 0)),
+                   "NOW": client.sample_now(3, 20), "SEND": client.send_file()}
+        for name, future in futures.items():
+            try:
+                result = future.result(timeout=30)
+                if isinstance(result, list):
+                    result = f"{len(result)} lines"
+                print(f"✅ {name:<7} {result}")
+            except Exception as e:
+                print(f"❌ {name:<7} {type(e).__name__}: {e}")
+        print(f"⏱️ {len(futures)} commands in {time.perf_counter() - start:.2f} s, "
+              f"{len(live)} live lines passed through")
+    finally:
+        stop.set()
+        link.close()
+        if sim:
+            sim.stop()
@@ -0,0 +1,162 @@
+###############################################################
+#   FIRMWARE DIALECTS
+#   The three Teensy sketches speak different serial dialects:
+#
+#     ph_do_stream  sketch_oct3aupadte.ino  57600   $PH,... / $DO,... at 1 Hz
+#     usb_check     25_USB_CHECK.ino        57600   multi-line reading blocks
+#     sd_params     SD_sketch_jan14a.ino    115200  $Params,...,SAVED|LIVE (+ binary)
+#
+#   DialectDetector identifies the sketch from its startup banner
+#   or first data lines; the dialect's own parser is then bound
+#   once instead of trying every format on every line.
+###############################################################
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+
+from console_blocks import BlockAssembler
+from reading_bus import Reading
+
+# -------------------- CONFIG --------------------
+DETECT_MAX_LINES = 200        # give up (keep the caller's default) after this many lines
+PROBE_COMMAND = b"STATUS\n"   # 25_USB_CHECK answers "N=.. T=.. SD=.."; the others ignore it
+DO_UG_PER_MG = 1000.0
+
+
+# -------------------- Parsers --------------------
+# Every parser has feed(line) -> (consumed, reading): consumed is True for
+# lines that belong to the data format, reading is a complete Reading or None.
+class ParamsParser:
+    """$Params,pH*100,DO*10,Temp*50,Pressure*1000[,SAVED|LIVE[,seq,reading_id]]"""
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.last_seq = None
+
+    def feed(self, line):
+        if not line.startswith("$Params,"):
+            return False, None
+        self.last_seq = None
+        parts = line.split(",")
+        if len(parts) < 5:
+            return True, None
+        saved = len(parts) >= 6 and parts[5].strip().upper() == "SAVED"
+        reading_id = None
+        try:
+            values = self.profile.apply(parts[1:5])
+            if len(parts) >= 8:
+                self.last_seq = int(parts[6])
+                reading_id = int(parts[7]) if saved else None
+        except ValueError:
+            return True, None
+        return True, Reading(datetime.now(), *values, saved=saved, reading_id=reading_id)
+
+
+class PhDoParser:
+    """$PH,dd/mm/yyyy HH:MM:SS,raw,voltage,pH and
+    $DO,dd/mm/yyyy HH:MM:SS,temp,adc_raw,adc_mv,DO ug/L,pressure,temp_ok,press_ok.
+    Both are printed every interval; a reading is emitted on each $DO line
+    with the latest pH."""
+
+    def __init__(self, profile=None):
+        self.ph = None
+
+    @staticmethod
+    def _timestamp(field):
+        try:
+            return datetime.strptime(field.strip(), "%d/%m/%Y %H:%M:%S")
+        except ValueError:
+            return None
+
+    def feed(self, line):
+        if line.startswith("$PH,"):
+            parts = line.split(",")
+            try:
+                self.ph = float(parts[4])
+            except (IndexError, ValueError):
+                pass
+            return True, None
+        if not line.startswith("$DO,"):
+            return False, None
+        parts = line.split(",")
+        if self.ph is None or len(parts) < 7:
+            return True, None
+        try:
+            temp, do, pressure = float(parts[2]), float(parts[5]) / DO_UG_PER_MG, float(parts[6])
+        except ValueError:
+            return True, None
+        stamp = self._timestamp(parts[1])
+        return True, Reading(stamp or datetime.now(), self.ph, do, temp, pressure, saved=True, device_time=stamp)
+
+
+class BlockParser(BlockAssembler):
+    """25_USB_CHECK blocks (console_blocks.BlockAssembler)"""
+
+    def __init__(self, profile=None):
+        super().__init__()
+
+
+# -------------------- Dialects --------------------
+@dataclass(frozen=True)
+class Dialect:
+    name: str
+    firmware: str
+    baud: int
+    banner: tuple             # startup text only this sketch prints
+    signature: re.Pattern     # steady-state data line
+    parser: type              # parser(profile) -> object with feed(line)
+    binary: bool = False      # understands TELEMETRY BINARY
+
+    def make_parser(self, profile=None):
+        return self.parser(profile)
+
+
+SD_PARAMS = Dialect("sd_params", "SD_sketch_jan14a.ino", 115200,
+                    ("WATER QUALITY MONITORING SYSTEM", "GUI SYNCHRONIZED", "READING #",
+                     "TELEMETRY_MODE:", "SD_DOWNLOAD_"),
+                    re.compile(r"^\$Params,-?\d+,-?\d+,-?\d+,-?\d+"), ParamsParser, binary=True)
+USB_CHECK = Dialect("usb_check", "25_USB_CHECK.ino", 57600,
+                    ("Water Quality Logger", "Commands: N=", "[Manual] Taking reading"),
+                    re.compile(r"^(Timestamp:\s*\d{1,2}/\d{1,2}/\d{4}|N=\d+ T=\d+ SD=)"), BlockParser)
+PH_DO_STREAM = Dialect("ph_do_stream", "sketch_oct3aupadte.ino", 57600,
+                       ("pH meter experiment", "$Params ,"),
+                       re.compile(r"^\$(PH|DO),\d{2}/\d{2}/\d{4} "), PhDoParser)
+DIALECTS = (SD_PARAMS, USB_CHECK, PH_DO_STREAM)
+BY_NAME = {d.name: d for d in DIALECTS}
+
+
+# -------------------- Detection --------------------
+class DialectDetector:
+    """Feed lines until `feed()` returns a Dialect (None while unsure).
+
+    A banner line or one signature line is enough: the formats share no
+    lines. A binary telemetry frame means sd_params. After
+    DETECT_MAX_LINES unrecognised lines `gave_up` is set and the caller
+    keeps its default.
+    """
+
+    def __init__(self, dialects=DIALECTS, max_lines=DETECT_MAX_LINES):
+        self.dialects = dialects
+        self.max_lines = max_lines
+        self.lines = 0
+        self.dialect = None
+        self.gave_up = False
+
+    def feed(self, line):
+        if self.dialect is not None or self.gave_up:
+            return self.dialect
+        self.lines += 1
+        for dialect in self.dialects:
+            if dialect.signature.match(line) or any(marker in line for marker in dialect.banner):
+                self.dialect = dialect
+                return dialect
+        if self.lines >= self.max_lines:
+            self.gave_up = True
+        return None
+
+    def feed_frames(self, frames):
+        """Binary $Params frames only come from the SD sketch"""
+        if self.dialect is None and len(frames):
+            self.dialect = SD_PARAMS
+        return self.dialect
@@ -0,0 +1,274 @@
+###############################################################
+#   DEVICE EVENT LOG
+#   The status lines SD_sketch_jan14a.ino prints around each
+#   reading (READING #, Sleeping, WAKING UP, ✓ / ✗ results,
+#   [Duration], sensor / SD card status) as typed records in an
+#   append-only text file, with an in-memory inverted index by
+#   kind, keyword and time, so "all ✗ SD failures this week"
+#   is a few list intersections instead of a scan of the text
+#   box or the file.
+#
+#   python event_log.py --kind fail --words sd --range week
+###############################################################
+
+import argparse
+import bisect
+import heapq
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sensor_logging import get_logger
+
+# -------------------- CONFIG --------------------
+EVENT_FILE = "device_events.log"
+
+READING = "reading"           # READING #<counter>            value: counter
+CLOCK = "time"                # Time: dd/mm/yyyy HH:MM:SS
+SLEEP = "sleep"               # Sleeping... (GUI will remain connected)
+WAKE = "wake"                 # WAKING UP - TIME TO READ
+OK = "ok"                     # ✓ ...
+FAIL = "fail"                 # ✗ ...
+DURATION = "duration"         # [Duration] <ms> ms              value: ms
+STATUS = "status"             # SD card / Counter / Runtime / sensor lines
+KINDS = (READING, CLOCK, SLEEP, WAKE, OK, FAIL, DURATION, STATUS)
+KIND_LABELS = {READING: "📋 Reading", CLOCK: "🕒 Time", SLEEP: "😴 Sleep", WAKE: "⏰ Wake",
+               OK: "✓ OK", FAIL: "✗ Failure", DURATION: "⏱️ Duration", STATUS: "ℹ️ Status"}
+
+STATUS_KEYWORDS = ("SD card", "Counter", "Runtime", "Temperature sensor", "Pressure sensor")
+RANGES = ("hour", "today", "week", "month", "all")
+
+_BOX = "═║╔╗╚╝ \t"
+_WORD = re.compile(r"[a-z0-9_.]+")
+_NUMBER = re.compile(r"\d+")
+_LETTER = re.compile(r"[a-z]")
+
+store_log = get_logger("store")
+
+
+# -------------------- Records --------------------
+@dataclass(frozen=True)
+class Event:
+    ts: float                 # host epoch seconds (arrival of the line)
+    kind: str
+    text: str
+    value: float = None
+
+    @property
+    def when(self):
+        return datetime.fromtimestamp(self.ts)
+
+
+def parse_event(line, ts=None):
+    """Event for a device status line, None for anything else (data, heartbeat, blank)"""
+    text = line.strip(_BOX)
+    if not text:
+        return None
+    value = None
+    if "READING #" in text:
+        kind = READING
+        m = _NUMBER.search(text, text.index("READING #"))
+        value = int(m.group()) if m else None
+    elif "Sleeping" in text:
+        kind = SLEEP
+    elif "WAKING UP" in text:
+        kind = WAKE
+    elif "✓" in text:
+        kind = OK
+    elif "✗" in text:
+        kind = FAIL
+    elif "Duration" in text:
+        kind = DURATION
+        m = _NUMBER.search(text)
+        value = int(m.group()) if m else None
+    elif text.startswith("Time:"):
+        kind = CLOCK
+    elif any(keyword in text for keyword in STATUS_KEYWORDS):
+        kind = STATUS
+    else:
+        return None
+    return Event(time.time() if ts is None else ts, kind, text, value)
+
+
+def keywords(text):
+    """Indexed words: lower case, at least one letter (counters, times and values are not indexed)"""
+    return {w.strip(".") for w in _WORD.findall(text.lower()) if _LETTER.search(w)}
+
+
+def range_start(name, now=None):
+    """Epoch start of a named range ("hour", "today", "week" = since Monday, "month", "all")"""
+    now = now or datetime.now()
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    start = {"hour": now - timedelta(hours=1), "today": midnight,
+             "week": midnight - timedelta(days=now.weekday()), "month": midnight.replace(day=1),
+             "all": None}[name]
+    return None if start is None else start.timestamp()
+
+
+# -------------------- Log + Index --------------------
+class EventLog:
+    """Append-only file of events (one tab-separated line each) with an inverted index.
+
+    The index lives in memory and is rebuilt from the file on open:
+    record number -> (timestamp, file offset), plus sorted posting lists
+    of record numbers per kind and per keyword. Queries intersect the
+    postings, cut them to the time range by bisection and read only the
+    matching lines back from the file.
+    """
+
+    def __init__(self, path=EVENT_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ts = []
+        self._offsets = []
+        self._by_kind = defaultdict(list)
+        self._by_word = defaultdict(list)
+        self._in_order = True         # timestamps non-decreasing -> bisect on time
+        self._size = 0
+        self._load()
+
+    def __len__(self):
+        return len(self._ts)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            store_log.warning("⚠️ %s ends in a partial event - truncating", self.path)
+            os.truncate(self.path, end)
+        offset = 0
+        for raw in data[:end].split(b"\n")[:-1]:
+            try:
+                self._index(self._decode(raw.decode("utf-8")), offset)
+            except ValueError:
+                store_log.warning("⚠️ Unreadable event at byte %d of %s skipped", offset, self.path)
+            offset += len(raw) + 1
+        self._size = end
+
+    @staticmethod
+    def _encode(event):
+        value = "" if event.value is None else f"{event.value:g}"
+        text = event.text.replace("\t", " ").replace("\n", " ")
+        return f"{event.ts:.3f}\t{event.kind}\t{value}\t{text}\n".encode("utf-8")
+
+    @staticmethod
+    def _decode(line):
+        ts, kind, value, text = line.rstrip("\n").split("\t", 3)
+        return Event(float(ts), kind, text, float(value) if value else None)
+
+    def _index(self, event, offset):
+        i = len(self._ts)
+        if self._ts and event.ts < self._ts[-1]:
+            self._in_order = False
+        self._ts.append(event.ts)
+        self._offsets.append(offset)
+        self._by_kind[event.kind].append(i)
+        for word in keywords(event.text):
+            self._by_word[word].append(i)
+
+    def append(self, event):
+        """Store one event; returns its record number"""
+        data = self._encode(event)
+        with self._lock:
+            with open(self.path, "ab") as f:
+                f.write(data)
+            self._index(event, self._size)
+            self._size += len(data)
+            return len(self._ts) - 1
+
+    def add(self, line, ts=None):
+        """parse_event + append; returns the Event or None"""
+        event = parse_event(line, ts)
+        if event is not None:
+            self.append(event)
+        return event
+
+    # -------------------- Queries --------------------
+    def _word_postings(self, word):
+        """Records containing `word` or a keyword starting with it (e.g. "fail" -> failed)"""
+        exact = self._by_word.get(word)
+        prefixed = [p for w, p in self._by_word.items() if w != word and w.startswith(word)]
+        if not prefixed:
+            return exact or []
+        merged = heapq.merge(*(prefixed + ([exact] if exact else [])))
+        out = []
+        for i in merged:
+            if not out or out[-1] != i:
+                out.append(i)
+        return out
+
+    def _time_slice(self, postings, t0, t1):
+        if not self._in_order:
+            return [i for i in postings
+                    if (t0 is None or self._ts[i] >= t0) and (t1 is None or self._ts[i] <= t1)]
+        lo = 0 if t0 is None else bisect.bisect_left(self._ts, t0)
+        hi = len(self._ts) if t1 is None else bisect.bisect_right(self._ts, t1)
+        return postings[bisect.bisect_left(postings, lo):bisect.bisect_left(postings, hi)]
+
+    def _kind_postings(self, kind):
+        if isinstance(kind, str):
+            return self._by_kind.get(kind, [])
+        return list(heapq.merge(*(self._by_kind.get(k, []) for k in kind)))   # kinds are disjoint
+
+    def find(self, kind=None, words=(), t0=None, t1=None):
+        """Record numbers matching every condition (kind or tuple of kinds, all words,
+        t0 <= ts <= t1), oldest first"""
+        if isinstance(words, str):
+            words = sorted(keywords(words))
+        with self._lock:
+            lists = [] if kind is None else [self._kind_postings(kind)]
+            lists += [self._word_postings(w.lower()) for w in words]
+            if not lists:
+                lists = [range(len(self._ts))]
+            lists.sort(key=len)
+            base = self._time_slice(list(lists[0]), t0, t1)
+            others = [set(p) for p in lists[1:]]
+        return [i for i in base if all(i in s for s in others)]
+
+    def query(self, kind=None, words=(), t0=None, t1=None, limit=None):
+        """Matching events, oldest first (the newest `limit` when given)"""
+        found = self.find(kind, words, t0, t1)
+        return self.read(found if limit is None else found[-limit:])
+
+    def read(self, records):
+        """Events for record numbers from find()"""
+        with self._lock:
+            offsets = [self._offsets[i] for i in records]
+        events = []
+        with open(self.path, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                events.append(self._decode(f.readline().decode("utf-8")))
+        return events
+
+    def counts(self, t0=None, t1=None):
+        """{kind: events in range} without reading the file"""
+        return {kind: len(self.find(kind, (), t0, t1)) for kind in KINDS}
+
+
+# -------------------- Main --------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search the device event log")
+    parser.add_argument("log", nargs="?", default=EVENT_FILE)
+    parser.add_argument("--kind", nargs="+", choices=KINDS)
+    parser.add_argument("--words", default="", help="keywords, all must match (prefixes allowed)")
+    parser.add_argument("--range", default="all", choices=RANGES)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    log = EventLog(args.log)
+    loaded = time.perf_counter()
+    events = log.query(args.kind and tuple(args.kind), args.words, range_start(args.range), limit=args.limit)
+    done = time.perf_counter()
+    for event in events:
+        print(f"{event.when:%Y-%m-%d %H:%M:%S}  {KIND_LABELS[event.kind]:<12} {event.text}")
+    print(f"\n🗂️ {len(events)} shown of {len(log)} events "
+          f"(index built in {(loaded - start) * 1000:.1f} ms, query {(done - loaded) * 1000:.2f} ms)")
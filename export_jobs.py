@@ -0,0 +1,171 @@
+###############################################################
+#   EXPORT JOBS
+#   Background CSV / Excel / Parquet export straight from the
+#   sensor store, in chunks, with progress and cancellation.
+###############################################################
+
+import csv
+import os
+import threading
+from datetime import datetime
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# -------------------- CONFIG --------------------
+EXPORT_HEADER = ["timestamp", "pH", "DO", "Temperature", "Pressure"]
+CHUNK_SIZE = 5000
+
+FORMAT_EXTENSIONS = {".csv": "csv", ".xlsx": "xlsx", ".parquet": "parquet"}
+
+
+def available_formats():
+    """Formats whose writer dependencies are installed"""
+    formats = ["csv"]
+    if openpyxl is not None:
+        formats.append("xlsx")
+    if pq is not None:
+        formats.append("parquet")
+    return formats
+
+
+def format_for_path(path):
+    return FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower(), "csv")
+
+
+# -------------------- Writers --------------------
+class _CsvWriter:
+    def __init__(self, path, header, decimals):
+        self._f = open(path, "w", newline="")
+        self._w = csv.writer(self._f)
+        self._w.writerow(header)
+        self._fmt = f"{{:.{decimals}f}}"
+
+    def write(self, rows):
+        fmt = self._fmt
+        self._w.writerows(
+            (datetime.fromtimestamp(r[0]).strftime("%Y-%m-%d %H:%M:%S"),
+             *("" if v is None else fmt.format(v) for v in r[1:]))
+            for r in rows)
+
+    def close(self):
+        self._f.close()
+
+
+class _XlsxWriter:
+    def __init__(self, path, header, decimals):
+        self._path = path
+        self._wb = openpyxl.Workbook(write_only=True)
+        self._ws = self._wb.create_sheet("Readings")
+        self._ws.append(header)
+
+    def write(self, rows):
+        for r in rows:
+            self._ws.append([datetime.fromtimestamp(r[0]), *r[1:]])
+
+    def close(self):
+        self._wb.save(self._path)
+
+
+class _ParquetWriter:
+    def __init__(self, path, header, decimals):
+        self._names = list(header)
+        self._schema = pa.schema([(self._names[0], pa.timestamp("s"))] +
+                                 [(name, pa.float64()) for name in self._names[1:]])
+        self._w = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        arrays = [pa.array([datetime.fromtimestamp(t) for t in columns[0]], pa.timestamp("s"))]
+        arrays += [pa.array(col, pa.float64()) for col in columns[1:]]
+        self._w.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._w.close()
+
+
+_WRITERS = {"csv": _CsvWriter, "xlsx": _XlsxWriter, "parquet": _ParquetWriter}
+
+
+# -------------------- Export Job --------------------
+class ExportJob:
+    """Streams a time range of the store to a file on a worker thread.
+
+    Poll `progress()` / `state` from the Tk thread; call `cancel()` to stop.
+    The file is written to a temporary name and only renamed into place
+    when the export completes.
+    """
+
+    def __init__(self, store, path, fmt=None, t0=None, t1=None,
+                 header=EXPORT_HEADER, decimals=2, chunk_size=CHUNK_SIZE):
+        self.store = store
+        self.path = path
+        self.fmt = fmt or format_for_path(path)
+        if self.fmt not in available_formats():
+            raise ValueError(f"Export format '{self.fmt}' needs an optional package "
+                             f"(available: {', '.join(available_formats())})")
+        self.t0, self.t1 = t0, t1
+        self.header = header
+        self.decimals = decimals
+        self.chunk_size = chunk_size
+        self.state = "pending"        # pending / running / done / cancelled / failed
+        self.error = None
+        self.written = 0
+        self.total = 0
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.total = self.store.count(self.t0, self.t1)
+        self.state = "running"
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def finished(self):
+        return self.state in ("done", "cancelled", "failed")
+
+    def progress(self):
+        """(rows written, rows expected)"""
+        return self.written, self.total
+
+    def _run(self):
+        tmp_path = self.path + ".part"
+        writer = None
+        try:
+            writer = _WRITERS[self.fmt](tmp_path, self.header, self.decimals)
+            for rows in self.store.iter_chunks(self.t0, self.t1, self.chunk_size):
+                if self._cancel.is_set():
+                    break
+                writer.write(rows)
+                self.written += len(rows)
+            writer.close()
+            writer = None
+            if self._cancel.is_set():
+                os.remove(tmp_path)
+                self.state = "cancelled"
+            else:
+                os.replace(tmp_path, self.path)
+                self.state = "done"
+        except Exception as e:
+            self.error = e
+            self.state = "failed"
+            try:
+                if writer is not None:
+                    writer.close()
+            except Exception:
+                pass
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -0,0 +1,215 @@
+###############################################################
+#   FIGURE EXPORT
+#   Off-thread PNG/PDF rendering of the 4-panel sensor figure.
+#   Rendering runs in a separate Python process on the Agg
+#   backend from a snapshot of the plotted arrays; finished
+#   renders are cached by content so repeat exports are a copy.
+###############################################################
+
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.artist import setp
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from sensor_store import CHANNELS, DAY
+
+# -------------------- CONFIG --------------------
+EXPORT_DPI = 300
+RENDER_CACHE_DIR = "render_cache"
+RENDER_CACHE_MAX_FILES = 64
+RENDER_TIMEOUT = 300
+FIGURE_STYLE_VERSION = 1   # bump when build_sensor_figure() changes to invalidate the cache
+
+
+# -------------------- Figure --------------------
+def build_sensor_figure(timestamps, ph_values, do_values, temp_values, pressure_values):
+    """2x2 pH / DO / Temperature / Pressure figure shared by the GUI and exports"""
+
+    # Create figure with subplots
+    fig = Figure(figsize=(12, 8), facecolor='#001F33')
+
+    # Create 4 subplots (2x2 grid)
+    ax1 = fig.add_subplot(2, 2, 1, facecolor='#0A1929')
+    ax2 = fig.add_subplot(2, 2, 2, facecolor='#0A1929', sharex=ax1)
+    ax3 = fig.add_subplot(2, 2, 3, facecolor='#0A1929', sharex=ax1)
+    ax4 = fig.add_subplot(2, 2, 4, facecolor='#0A1929', sharex=ax1)
+
+    # Plot 1: pH
+    ax1.plot(timestamps, ph_values, color='#00E1FF', linewidth=2, marker='o', markersize=4)
+    ax1.set_title('🌊 pH Level', color='white', fontsize=14, fontweight='bold')
+    ax1.set_ylabel('pH', color='white', fontsize=12)
+    ax1.tick_params(colors='white')
+    ax1.grid(True, alpha=0.3, color='white')
+    ax1.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+
+    # Plot 2: Dissolved Oxygen
+    ax2.plot(timestamps, do_values, color='#00FF88', linewidth=2, marker='s', markersize=4)
+    ax2.set_title('💧 Dissolved Oxygen', color='white', fontsize=14, fontweight='bold')
+    ax2.set_ylabel('DO (mg/L)', color='white', fontsize=12)
+    ax2.tick_params(colors='white')
+    ax2.grid(True, alpha=0.3, color='white')
+    ax2.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+
+    # Plot 3: Temperature
+    ax3.plot(timestamps, temp_values, color='#FF6B6B', linewidth=2, marker='^', markersize=4)
+    ax3.set_title('🔥 Temperature', color='white', fontsize=14, fontweight='bold')
+    ax3.set_ylabel('Temperature (°C)', color='white', fontsize=12)
+    ax3.set_xlabel('Time', color='white', fontsize=12)
+    ax3.tick_params(colors='white')
+    ax3.grid(True, alpha=0.3, color='white')
+    ax3.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+
+    # Plot 4: Pressure
+    ax4.plot(timestamps, pressure_values, color='#FFD700', linewidth=2, marker='d', markersize=4)
+    ax4.set_title('🌡️ Pressure', color='white', fontsize=14, fontweight='bold')
+    ax4.set_ylabel('Pressure (mbar)', color='white', fontsize=12)
+    ax4.set_xlabel('Time', color='white', fontsize=12)
+    ax4.tick_params(colors='white')
+    ax4.grid(True, alpha=0.3, color='white')
+    ax4.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+
+    # Rotate x-axis labels
+    for ax in [ax1, ax2, ax3, ax4]:
+        setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
+
+    fig.tight_layout(pad=3.0)
+
+    return fig
+
+
+# -------------------- Snapshots --------------------
+def snapshot_from_figure(fig):
+    """Copy the arrays currently plotted in a sensor figure"""
+    ts = [x.timestamp() for x in fig.axes[0].lines[0].get_xdata()]
+    snapshot = {"ts": np.asarray(ts, dtype=np.float64)}
+    for ax, name in zip(fig.axes, CHANNELS):
+        snapshot[name] = np.asarray(ax.lines[0].get_ydata(), dtype=np.float64)
+    return snapshot
+
+
+def snapshot_from_store(store, t0, t1, max_points=2000):
+    result = store.query_range(t0, t1, max_points)
+    snapshot = {"ts": np.asarray(result["ts"], dtype=np.float64)}
+    for name in CHANNELS:
+        snapshot[name] = np.asarray(result[name], dtype=np.float64)
+    return snapshot
+
+
+def snapshot_key(snapshot, fmt, dpi, title=""):
+    """Content hash identifying one rendered export"""
+    h = hashlib.sha1(f"{FIGURE_STYLE_VERSION}|{fmt}|{dpi}|{title}".encode())
+    for name in ("ts",) + CHANNELS:
+        h.update(np.ascontiguousarray(snapshot[name], dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+# -------------------- Rendering (worker process) --------------------
+def render_snapshot(snapshot, path, fmt="png", dpi=EXPORT_DPI, title=""):
+    """Render a snapshot straight to a file with the Agg canvas"""
+    timestamps = [datetime.fromtimestamp(t) for t in snapshot["ts"]]
+    fig = build_sensor_figure(timestamps, *(snapshot[name] for name in CHANNELS))
+    if title:
+        fig.suptitle(title, color='white', fontsize=16, fontweight='bold')
+    FigureCanvasAgg(fig)
+    fig.savefig(path, dpi=dpi, format=fmt, facecolor='#001F33', edgecolor='none')
+
+
+def _stderr_tail(stderr, lines=8):
+    """Last lines of a render process's stderr (the traceback's end names the error)"""
+    text = (stderr or b"").decode("utf-8", errors="replace").strip()
+    return "\n".join(text.splitlines()[-lines:]) or "(no error output)"
+
+
+# -------------------- Exporter --------------------
+class FigureExporter:
+    """Renders exports in child processes and serves repeats from a cache.
+
+    Child processes are started with `python figure_export.py ...` rather
+    than multiprocessing so the GUI script is never re-imported in them.
+    """
+
+    def __init__(self, cache_dir=RENDER_CACHE_DIR, max_workers=2):
+        self.cache_dir = cache_dir
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    def export(self, snapshot, path, dpi=EXPORT_DPI, title=""):
+        """Future resolving to (path, served_from_cache)"""
+        return self._pool.submit(self._export, snapshot, path, dpi, title)
+
+    def export_daily(self, store, out_dir, fmt="pdf", dpi=EXPORT_DPI, max_points=2000):
+        """One report figure per mission day; returns a list of futures"""
+        futures = []
+        for day_start in store.daily_summary()["ts"]:
+            day = datetime.fromtimestamp(day_start)
+            snapshot = snapshot_from_store(store, day_start, day_start + DAY - 1e-3, max_points)
+            if len(snapshot["ts"]) == 0:
+                continue
+            path = os.path.join(out_dir, f"sensor_report_{day.strftime('%Y%m%d')}.{fmt}")
+            futures.append(self.export(snapshot, path, dpi, title=day.strftime("%Y-%m-%d")))
+        return futures
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _export(self, snapshot, path, dpi, title):
+        fmt = os.path.splitext(path)[1].lstrip(".").lower() or "png"
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cached = os.path.join(self.cache_dir, f"{snapshot_key(snapshot, fmt, dpi, title)}.{fmt}")
+        if os.path.exists(cached):
+            shutil.copyfile(cached, path)
+            os.utime(cached)
+            return path, True
+
+        fd, snapshot_path = tempfile.mkstemp(suffix=".npz")
+        os.close(fd)
+        tmp_render = cached + ".part"
+        try:
+            np.savez(snapshot_path, **snapshot)
+            subprocess.run([sys.executable, os.path.abspath(__file__),
+                            snapshot_path, tmp_render, fmt, str(dpi), title],
+                           check=True, timeout=RENDER_TIMEOUT,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            os.replace(tmp_render, cached)
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"rendering {os.path.basename(path)} failed (exit {e.returncode}):\n"
+                               f"{_stderr_tail(e.stderr)}") from None
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"rendering {os.path.basename(path)} took longer than {RENDER_TIMEOUT} s") from None
+        finally:
+            os.remove(snapshot_path)
+            if os.path.exists(tmp_render):
+                os.remove(tmp_render)
+        shutil.copyfile(cached, path)
+        self._trim_cache()
+        return path, False
+
+    def _trim_cache(self):
+        entries = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                   if not name.endswith(".part")]
+        if len(entries) <= RENDER_CACHE_MAX_FILES:
+            return
+        entries.sort(key=os.path.getmtime)
+        for stale in entries[:len(entries) - RENDER_CACHE_MAX_FILES]:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+# -------------------- Worker Entry Point --------------------
+if __name__ == "__main__":
+    # figure_export.py <snapshot.npz> <output file> <format> <dpi> [title]
+    with np.load(sys.argv[1]) as data:
+        snap = {name: data[name] for name in data.files}
+    render_snapshot(snap, sys.argv[2], fmt=sys.argv[3], dpi=int(sys.argv[4]),
+                    title=sys.argv[5] if len(sys.argv) > 5 else "")
@@ -0,0 +1,187 @@
+###############################################################
+#   INGEST
+#   The part of reading ingestion shared by GUI_LIVE_graph and
+#   sensor_daemon: frame sequence tracking (transit loss and
+#   duplicates), storing SAVED readings, spotting Reading IDs
+#   that never arrived, and fetching those back from the SD card
+#   with DOWNLOAD_SD_RANGE - one range at a time, while live
+#   frames and $Params lines keep flowing.
+#
+#   Parsing stays with the callers (each has its own dialects
+#   and display); they hand over sequence numbers, Readings and
+#   received lines. Not thread-safe: call it from one thread
+#   (the Tk thread in the GUI, the reader thread in the daemon).
+###############################################################
+
+from calibration import reprocess
+from datalog import parse_records, current_run, is_record_line, record_raw_fields
+from instrumentation import metrics
+from reading_bus import Reading
+from sensor_logging import get_logger, RateLimiter
+from sequence_tracker import SequenceTracker, SavedReadingTracker
+from telemetry import raw_fields, FLAG_SAVED
+
+serial_log = get_logger("serial")
+sd_log = get_logger("sd")
+store_log = get_logger("store")
+
+frames_missing = metrics.counter("link.missing", "Readings lost in transit (sequence gaps)")
+frames_duplicate = metrics.counter("link.duplicates", "Readings received twice")
+link_loss_rate = metrics.gauge("link.loss_rate", "Fraction of readings lost since connect")
+backfill_requested = metrics.counter("backfill.requested", "SAVED readings requested from the SD card")
+backfill_stored = metrics.counter("backfill.stored", "SAVED readings recovered from the SD card")
+
+
+def frame_readings(frames, profile, stamp):
+    """Calibrated Readings of a run of binary $Params frames (all stamped `stamp`)"""
+    values = reprocess(raw_fields(frames), profile).tolist()
+    saved = ((frames["flags"] & FLAG_SAVED) != 0).tolist()
+    return [Reading(stamp, *v, saved=s, reading_id=rid if s else None)
+            for v, s, rid in zip(values, saved, frames["reading_id"].tolist())]
+
+
+class Ingest:
+    """Sequence tracking, SAVED-reading storage and SD backfill.
+
+    `publish(reading)` receives every reading to show (live ones, and the
+    recovered ones when publish_backfill is set); `send(data)` writes a
+    command to the logger and raises when the link is down (it must not be
+    queued for the reconnect - interrupted() re-issues the range); `ready()` says whether a range may be requested
+    now (link up, not replaying, no other download running); `notify(text,
+    tag)` gets the user-facing messages (optional).
+    """
+
+    def __init__(self, store, publish, send, ready, profile=None, notify=None, publish_backfill=True):
+        self.publish = publish
+        self.send = send
+        self.ready = ready
+        self.notify = notify or (lambda text, tag: None)
+        self.publish_backfill = publish_backfill
+        self._gap_limiter = RateLimiter()
+        self.reset(store, profile)
+
+    def reset(self, store=None, profile=None):
+        """New connection (or store / calibration profile): fresh trackers, nothing queued"""
+        if store is not None:
+            self.store = store
+        if profile is not None:
+            self.profile = profile
+        self.link_tracker = SequenceTracker()
+        self.saved_tracker = SavedReadingTracker(self.store.max_reading_id())
+        self.backfill_queue = []
+        self.backfill_in_flight = None     # (first, last) range being received
+        self.backfill_lines = None         # its record lines, while it arrives
+
+    @property
+    def backfill_active(self):
+        return self.backfill_lines is not None
+
+    # -------------------- Live Readings --------------------
+    def track(self, seqs):
+        """Feed frame sequence numbers; returns the keep mask (False = duplicate, drop it)"""
+        tracker = self.link_tracker
+        missed, keep = tracker.observe_many(seqs)
+        frames_duplicate.inc(int((~keep).sum()))
+        link_loss_rate.set(tracker.loss_rate)
+        if missed:
+            frames_missing.inc(missed)
+            serial_log.warning("Sequence gap: %d reading(s) lost", missed)
+            allowed, repeats = self._gap_limiter.allow("SEQ GAP")
+            if allowed:
+                note = f" (+{repeats} more gaps)" if repeats else ""
+                self.notify(f"⚠️ {missed} reading(s) lost in transit (loss {tracker.loss_rate:.2%}){note}",
+                            "yellow")
+        return keep
+
+    def accept(self, reading):
+        """Store a SAVED reading (queueing a backfill for skipped Reading IDs), then
+        publish it; False when it was already stored"""
+        if reading.saved:
+            try:
+                with metrics.timer("store.insert"):
+                    stored = self.store.insert_reading(reading.timestamp, *reading.values,
+                                                       reading_id=reading.reading_id, profile=self.profile)
+            except Exception as e:
+                store_log.error("Error writing to sensor store: %s", e)
+                stored = True
+            if not stored:
+                frames_duplicate.inc()
+                store_log.info("Reading #%s already stored, skipped", reading.reading_id)
+                return False
+            if reading.reading_id is not None:
+                self.request_backfill(self.saved_tracker.observe(reading.reading_id))
+        self.publish(reading)
+        return True
+
+    # -------------------- SD Backfill --------------------
+    def request_backfill(self, ranges):
+        """Queue Reading ID ranges to re-fetch from the SD card"""
+        for first, last in ranges:
+            self.backfill_queue.append((first, last))
+            backfill_requested.inc(last - first + 1)
+            sd_log.info("Backfill queued for Reading IDs %d-%d", first, last)
+        self.next_backfill()
+
+    def next_backfill(self):
+        """Request the next queued range unless one is running or the link is not ready"""
+        if self.backfill_active or not self.backfill_queue or not self.ready():
+            return
+        first, last = self.backfill_in_flight = self.backfill_queue.pop(0)
+        try:
+            self.send(f"DOWNLOAD_SD_RANGE {first} {last}\n".encode())
+        except Exception as e:
+            sd_log.error("Backfill request failed: %s", e)
+            self.backfill_queue.insert(0, self.backfill_in_flight)
+            self.backfill_in_flight = None
+            return
+        self.backfill_lines = []
+        self.notify(f"🔁 Backfilling SAVED readings #{first}-#{last} from SD card...", "yellow")
+
+    def interrupted(self):
+        """The link dropped: a range reply was cut off, so ask for it again first"""
+        if self.backfill_active:
+            self.backfill_queue.insert(0, self.backfill_in_flight)
+            self.backfill_in_flight = self.backfill_lines = None
+
+    def capture(self, line):
+        """True when `line` belongs to the range reply being received (and was taken).
+        Only SD_DOWNLOAD_* and Datalog record lines are; live $Params and status
+        lines keep their normal path."""
+        if not self.backfill_active or not (line.startswith("SD_DOWNLOAD") or is_record_line(line)):
+            return False
+        if line == "SD_DOWNLOAD_END":
+            self.finish_backfill()
+        elif line.startswith("SD_DOWNLOAD_ERROR"):
+            self.finish_backfill(line)
+        elif not line.startswith("SD_DOWNLOAD_PROGRESS"):
+            self.backfill_lines.append(line)
+        return True
+
+    def finish_backfill(self, error=None):
+        """Store the records of a finished range reply, then request the next range"""
+        lines, self.backfill_lines = self.backfill_lines, None
+        first, last = self.backfill_in_flight
+        self.backfill_in_flight = None
+        if error is not None:
+            self.backfill_queue.clear()
+            sd_log.error("Backfill %d-%d failed: %s", first, last, error)
+            self.notify(f"❌ Backfill failed: {error}", "red")
+            return
+
+        # A range reply also carries matching IDs from before a counter reset
+        records = current_run(parse_records(lines))
+        readings = [Reading(r["timestamp"], *self.profile.apply(record_raw_fields(r)),
+                            saved=True, reading_id=r["reading_id"], source="backfill") for r in records]
+        try:
+            stored = self.store.insert_many([(r.timestamp, *r.values, r.reading_id) for r in readings],
+                                            profile=self.profile)
+        except Exception as e:
+            stored = 0
+            store_log.error("Error writing backfilled readings: %s", e)
+        backfill_stored.inc(stored)
+        if stored and self.publish_backfill:
+            for reading in readings:
+                self.publish(reading)
+        sd_log.info("Backfill %d-%d: %d record(s) received, %d new", first, last, len(records), stored)
+        self.notify(f"✅ Backfill: {stored} missed reading(s) recovered from SD card", "green")
+        self.next_backfill()
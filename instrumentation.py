@@ -0,0 +1,257 @@
+###############################################################
+#   INSTRUMENTATION
+#   Low-overhead counters, histograms and timers for the serial
+#   -> parse -> Tk -> CSV/store -> graph pipeline, with JSON and
+#   Prometheus text dumps.
+###############################################################
+
+import bisect
+import json
+import threading
+import time
+from functools import wraps
+
+# -------------------- CONFIG --------------------
+# Histogram bucket upper bounds in seconds (50 us .. 10 s)
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# -------------------- Metric Types --------------------
+class Counter:
+    """Monotonic count (lines, bytes, errors...)"""
+
+    def __init__(self, name, help_text=""):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def reset(self):
+        with self._lock:
+            self.value = 0
+
+    def snapshot(self):
+        return {"type": "counter", "value": self.value}
+
+
+class Gauge:
+    """Last value of something that goes up and down (rates, queue depths...)"""
+
+    def __init__(self, name, help_text=""):
+        self.name = name
+        self.help = help_text
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def reset(self):
+        self.value = 0.0
+
+    def snapshot(self):
+        return {"type": "gauge", "value": self.value}
+
+
+class Histogram:
+    """Fixed-bucket distribution of observed values (usually seconds)"""
+
+    def __init__(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.sum = 0.0
+            self.min = self.max = None
+
+    def quantile(self, q):
+        """Bucket upper bound containing the q-th quantile (an upper estimate)"""
+        if self.count == 0:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self.counts)
+            count, total = self.count, self.sum
+            lo, hi = self.min, self.max
+        return {"type": "histogram", "count": count, "sum": total,
+                "min": lo, "max": hi,
+                "mean": total / count if count else None,
+                "p50": self.quantile(0.5), "p95": self.quantile(0.95),
+                "p99": self.quantile(0.99),
+                "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], counts))}
+
+
+class _Timer:
+    """Context manager recording elapsed wall time into a histogram"""
+    __slots__ = ("_hist", "_start")
+
+    def __init__(self, hist):
+        self._hist = hist
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._hist.observe(time.perf_counter() - self._start)
+        return False
+
+
+# -------------------- Registry --------------------
+class MetricsRegistry:
+    """Named metrics shared by every thread of one app"""
+
+    def __init__(self, prefix="sensor"):
+        self.prefix = prefix
+        self.started = time.time()
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = cls(name, help_text, **kwargs)
+                    self._metrics[name] = metric
+        return metric
+
+    def counter(self, name, help_text=""):
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name, help_text=""):
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def timer(self, name, help_text=""):
+        """`with metrics.timer("stage"):` records the block's duration"""
+        return _Timer(self.histogram(name, help_text))
+
+    def timed(self, name, help_text=""):
+        """Decorator form of timer()"""
+        hist = self.histogram(name, help_text)
+
+        def decorate(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    hist.observe(time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def reset(self):
+        """Zero every metric in place (callers keep their references)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+        self.started = time.time()
+
+    # -------------------- Dumps --------------------
+    def snapshot(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+        return {name: metrics[name].snapshot() for name in sorted(metrics)}
+
+    def to_json(self, path=None):
+        data = {"started": self.started, "uptime_s": time.time() - self.started,
+                "metrics": self.snapshot()}
+        text = json.dumps(data, indent=2)
+        if path:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def to_prometheus(self, path=None):
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            metrics = dict(self._metrics)
+        for name in sorted(metrics):
+            metric = metrics[name]
+            base = f"{self.prefix}_{name}".replace(".", "_").replace("-", "_")
+            if isinstance(metric, Counter):
+                full = f"{base}_total"
+                if metric.help:
+                    lines.append(f"# HELP {full} {metric.help}")
+                lines.append(f"# TYPE {full} counter")
+                lines.append(f"{full} {metric.value}")
+                continue
+            if isinstance(metric, Gauge):
+                if metric.help:
+                    lines.append(f"# HELP {base} {metric.help}")
+                lines.append(f"# TYPE {base} gauge")
+                lines.append(f"{base} {metric.value}")
+                continue
+            full = f"{base}_seconds"
+            if metric.help:
+                lines.append(f"# HELP {full} {metric.help}")
+            lines.append(f"# TYPE {full} histogram")
+            snap = metric.snapshot()
+            cumulative = 0
+            for bound, n in snap["buckets"].items():
+                cumulative += n
+                lines.append(f'{full}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f"{full}_sum {snap['sum']}")
+            lines.append(f"{full}_count {snap['count']}")
+        text = "\n".join(lines) + "\n"
+        if path:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def summary_rows(self):
+        """(name, count, mean ms, p95 ms, max ms) rows for the metrics panel"""
+        rows = []
+        for name, snap in self.snapshot().items():
+            if snap["type"] == "counter":
+                rows.append((name, snap["value"], None, None, None))
+            elif snap["type"] == "gauge":
+                rows.append((name, round(snap["value"], 4), None, None, None))
+            else:
+                ms = lambda v: None if v is None else v * 1000.0
+                rows.append((name, snap["count"], ms(snap["mean"]), ms(snap["p95"]), ms(snap["max"])))
+        return rows
+
+
+# Process-wide registry used by the GUIs
+metrics = MetricsRegistry()
@@ -3,6 +3,15 @@ from tkinter import ttk, messagebox, filedialog
 from PIL import Image, ImageTk, ImageEnhance
 import serial, threading, time, csv, serial.tools.list_ports
 from tkcalendar import Calendar  # pip install tkcalendar
+from collections import deque
+from calibration import CalibrationManager, device_id_for_port
+from telemetry import StreamDecoder
+from decimator import Decimator, METHODS
+from clock_sync import host_clock, format_stamp
+from ui_frames import frames
+
+SERIAL_TIMEOUT = 0.2   # s: longest the reader blocks before closing an idle interval
+MAX_STORED = 10000     # decimated samples kept for Download Data
 
 # -------------------- Find Teensy Port Automatically --------------------
 def find_teensy_port(baudrate=57600):
@@ -16,30 +25,78 @@ ser = None
 teensy_port = find_teensy_port()
 if teensy_port:
     try:
-        ser = serial.Serial(teensy_port, 57600, timeout=1)
+        ser = serial.Serial(teensy_port, 57600, timeout=SERIAL_TIMEOUT)
         print(f"✅ Connected to Teensy on port: {teensy_port}")
     except Exception as e:
         print(f"Error connecting to Teensy: {e}")
 
-sensor_data_list = []
+sensor_data_list = deque(maxlen=MAX_STORED)
+
+# Calibration profiles (loaded once, applied per reading)
+calibration = CalibrationManager()
+active_calibration = calibration.active(device_id_for_port(teensy_port))
 
 # -------------------- Default Variables --------------------
 sampling_interval = 1  # default 1 second
+sampling_method = "last"  # last / mean / median reading of each interval
 custom_datetime = None
 
+# One stored sample per sampling interval; the reader never sleeps it away
+decimator = Decimator(sampling_interval, sampling_method)
+
 # -------------------- Serial Reading --------------------
 def read_serial_data():
+    """Drain the port continuously: every line updates the display, the
+    decimator turns $Params readings into one stored sample per interval"""
     global ser
+    decoder = StreamDecoder()
     try:
         while True:
-            if ser and ser.in_waiting > 0:
-                line = ser.readline().decode('utf-8', errors='ignore').strip()
-                if line:
-                    update_display(line)
-            time.sleep(sampling_interval)
+            if ser is None:
+                time.sleep(0.1)
+                continue
+            raw = ser.read(ser.in_waiting or 1)   # blocks at most SERIAL_TIMEOUT
+            arrival = time.monotonic()
+            samples = []
+            for line in decoder.feed(raw) if raw else []:
+                if not isinstance(line, str):
+                    continue
+                values = parse_params(line)
+                if values is not None:
+                    samples += decimator.add(arrival, values)
+                frames.post(lambda l=line: update_display(l))
+            samples += decimator.poll(arrival)
+            for sample in samples:
+                frames.post(lambda s=sample: store_sample(s))
     except Exception as e:
         print(f"Serial Error: {e}")
-        messagebox.showerror("Serial Error", str(e))
+        frames.post(lambda message=str(e): messagebox.showerror("Serial Error", message))
+
+def parse_params(line):
+    """Calibrated (pH, DO, Temp, Pressure) of a $Params line, else None"""
+    if not line.startswith("$Params"):
+        return None
+    parts = [x.strip() for x in line.split(',')]
+    if len(parts) < 7:
+        return None
+    try:
+        return active_calibration.apply(parts[1:5])
+    except ValueError:
+        return None
+
+def store_sample(sample):
+    """One decimated sample -> Download Data list (Tk thread)"""
+    ph_val, do_val, temp_val, pressure_val = sample.values
+    stamp = format_stamp(host_clock.to_datetime(sample.arrival))
+    sensor_data_list.append({
+        "timestamp": stamp,
+        "pH": ph_val,
+        "DO": do_val,
+        "Temperature": temp_val,
+        "Pressure": pressure_val
+    })
+    frames.log(text_box, f"⏱️ [{stamp}] {decimator.method} of {sample.count}: pH {ph_val:.2f}  "
+                         f"DO {do_val:.2f}  Temp {temp_val:.2f}°C  Press {pressure_val:.2f} bar\n", "cyan")
 
 # -------------------- Update Sensor Data --------------------
 def update_display(line):
@@ -47,54 +104,42 @@ def update_display(line):
         if line.startswith("$Params"):
             parts = [x.strip() for x in line.split(',')]
             if len(parts) >= 7:
-                ph_val = float(parts[1]) / 100
-                do_val = float(parts[2]) / 10
-                temp_val = float(parts[3]) / 50
-                pressure_val = float(parts[4]) / 1000
-
-                # Update labels
-                ph_label.config(text=f"🌊 pH: {ph_val:.2f}")
-                do_label.config(text=f"💧 DO: {do_val:.2f}")
-                temp_label.config(text=f"🔥 Temperature: {temp_val:.2f}°C")
-                pressure_label.config(text=f"🌡️ Pressure: {pressure_val:.2f} bar")
-
-                # Save structured data for download
-                sensor_data_list.append({
-                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-                    "pH": ph_val,
-                    "DO": do_val,
-                    "Temperature": temp_val,
-                    "Pressure": pressure_val
-                })
+                ph_val, do_val, temp_val, pressure_val = active_calibration.apply(parts[1:5])
+
+                # Update labels (always the newest reading; the stored
+                # samples come from the decimator, see store_sample)
+                frames.set(ph_label, text=f"🌊 pH: {ph_val:.2f}")
+                frames.set(do_label, text=f"💧 DO: {do_val:.2f}")
+                frames.set(temp_label, text=f"🔥 Temperature: {temp_val:.2f}°C")
+                frames.set(pressure_label, text=f"🌡️ Pressure: {pressure_val:.2f} bar")
 
                 color = "cyan"
 
         elif line.startswith("$PH"):
             value = float(line.split(',')[1])
-            ph_label.config(text=f"🌊 pH: {value:.2f}")
+            frames.set(ph_label, text=f"🌊 pH: {value:.2f}")
             color = "blue"
 
         elif line.startswith("$DO"):
             value = float(line.split(',')[1])
-            do_label.config(text=f"💧 DO: {value:.2f}")
+            frames.set(do_label, text=f"💧 DO: {value:.2f}")
             color = "green"
 
         elif "$TEMP" in line or "Temp" in line:
             value = float(line.split(',')[1])
-            temp_label.config(text=f"🔥 Temperature: {value:.2f}°C")
+            frames.set(temp_label, text=f"🔥 Temperature: {value:.2f}°C")
             color = "red"
 
         elif "$PRESS" in line or "Pressure" in line:
             value = float(line.split(',')[1])
-            pressure_label.config(text=f"🌡️ Pressure: {value:.2f} bar")
+            frames.set(pressure_label, text=f"🌡️ Pressure: {value:.2f} bar")
             color = "goldenrod"
 
         else:
             color = "white"
 
         # Display on GUI text box
-        text_box.insert(tk.END, line + "\n", color)
-        text_box.see(tk.END)
+        frames.log(text_box, line + "\n", color)
 
     except Exception as e:
         print("⚠️ Parse error:", line, e)
@@ -102,13 +147,14 @@ def update_display(line):
 
 # -------------------- Connect Button --------------------
 def connect_teensy():
-    global ser
+    global ser, active_calibration
     port = find_teensy_port()
     if not port:
         messagebox.showwarning("Not Found", "⚠️ Teensy not detected! Connect and try again.")
         return
+    active_calibration = calibration.active(device_id_for_port(port))
     try:
-        ser = serial.Serial(port, 57600, timeout=1)
+        ser = serial.Serial(port, 57600, timeout=SERIAL_TIMEOUT)
         time.sleep(2)
         messagebox.showinfo("Connected", f"✅ Connected to Teensy on {port}")
         threading.Thread(target=read_serial_data, daemon=True).start()
@@ -179,14 +225,12 @@ title_label = tk.Label(root, text="🌊 Ocean Sensor Dashboard 🌊",
                        font=("times", 28, "bold"), fg="#B7DEE4", bg="#001F33")
 title_label.place(x=230, y=20)
 
-def glow_effect():
-    colors = ["#00E1FF", "#33F2FF", "#66FFFF", "#99F9FF", "#CCFFFF"]
-    i = 0
-    while True:
-        time.sleep(0.2)
-        title_label.config(fg=colors[i % len(colors)])
-        i += 1
-threading.Thread(target=glow_effect, daemon=True).start()
+GLOW_COLORS = ["#00E1FF", "#33F2FF", "#66FFFF", "#99F9FF", "#CCFFFF"]
+def glow_effect(i=0):
+    # Tk thread: one colour step per 200 ms, painted by the frame loop
+    frames.set(title_label, fg=GLOW_COLORS[i % len(GLOW_COLORS)])
+    root.after(200, glow_effect, i + 1)
+glow_effect()
 
 # -------------------- Live Clock --------------------
 clock_label = tk.Label(root, font=("Consolas", 12, "bold"), bg="#070C0E", fg="white")
@@ -245,17 +289,21 @@ def open_settings():
     tk.Entry(settings_win, textvariable=sampling_var, width=10, font=("times", 12)).place(x=150, y=20)
     unit_var = tk.StringVar(value="seconds")
     tk.OptionMenu(settings_win, unit_var, "seconds", "minutes").place(x=280, y=18)
+    method_var = tk.StringVar(value=sampling_method)
+    tk.OptionMenu(settings_win, method_var, *METHODS).place(x=370, y=18)
 
     def set_sampling_time():
-        global sampling_interval
+        global sampling_interval, sampling_method
         try:
             value = float(sampling_var.get())
             if unit_var.get() == "minutes":
                 value *= 60
-            sampling_interval = value
-            messagebox.showinfo("Saved", f"Sampling interval set to {sampling_var.get()} {unit_var.get()} ({sampling_interval} sec)")
+            decimator.configure(value, method_var.get())
+            sampling_interval, sampling_method = value, method_var.get()
+            messagebox.showinfo("Saved", f"Sampling interval set to {sampling_var.get()} {unit_var.get()} "
+                                         f"({sampling_interval} sec, {sampling_method} of each interval)")
         except ValueError:
-            messagebox.showerror("Invalid Input", "Enter valid number.")
+            messagebox.showerror("Invalid Input", "Enter a positive number.")
     tk.Button(settings_win, text="Set Sampling Time", bg='#0B0E0F', fg='black',
               font=("times", 12, "bold"), command=set_sampling_time).place(x=150, y=60)
 
@@ -317,7 +365,7 @@ text_box = tk.Text(text_frame, height=13, width=78, bg="#001F33",
                    yscrollcommand=scrollbar.set, relief="flat")
 text_box.pack(side=tk.LEFT)
 scrollbar.config(command=text_box.yview)
-for color in ["blue", "green", "red", "goldenrod", "white"]:
+for color in ["blue", "green", "red", "goldenrod", "white", "cyan"]:
     text_box.tag_config(color, foreground=color)
 
 
@@ -327,6 +375,7 @@ footer = tk.Label(root,
     font=("Segoe UI", 10, "italic"), fg="#0A0C0D", bg="#92B6CD")
 footer.place(x=220, y=665)
 
+frames.attach(root)
 root.mainloop()
 
 
@@ -0,0 +1,162 @@
+###############################################################
+#   PORT DISCOVERY
+#   Finds the intended Teensy logger by USB VID/PID/serial
+#   number, remembers it between runs, and on Linux resolves it
+#   straight from /dev/serial/by-id instead of rescanning every
+#   port on each connect / reconnect attempt.
+###############################################################
+
+import json
+import os
+import sys
+import time
+
+import serial.tools.list_ports
+
+from sensor_logging import get_logger
+
+# -------------------- CONFIG --------------------
+CACHE_FILE = "teensy_port.json"
+BY_ID_DIR = "/dev/serial/by-id"
+TEENSY_VID = 0x16C0
+# USB Serial, Serial+MIDI(+Audio), dual/triple serial, RawHID+Serial emulation
+TEENSY_PIDS = (0x0483, 0x0489, 0x048A, 0x0476, 0x0478, 0x0486)
+POLL_INTERVAL = 0.25
+
+serial_log = get_logger("serial")
+
+
+def _identity(info):
+    return {"vid": info.vid, "pid": info.pid, "serial_number": info.serial_number,
+            "device": info.device, "description": info.description}
+
+
+class PortDiscovery:
+    """Resolves "the logger" to a port path.
+
+    Order: the cached /dev/serial/by-id link (no enumeration at all), the
+    by-id directory listing, then one comports() scan matched on VID/PID and
+    the cached serial number. Once a logger with a USB serial number has been
+    connected, only that logger is returned. Generic USB-serial adapters are
+    only used when there is exactly one and no logger has been seen before.
+    """
+
+    def __init__(self, cache_path=CACHE_FILE, vid=TEENSY_VID, pids=TEENSY_PIDS):
+        self.cache_path = cache_path
+        self.vid = vid
+        self.pids = tuple(pids)
+        self.identity = self._load()
+
+    # -------------------- Cache --------------------
+    def _load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        try:
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump(self.identity, f, indent=2)
+        except OSError as e:
+            serial_log.warning("Could not write %s: %s", self.cache_path, e)
+
+    def remember(self, device):
+        """Store the identity of the port we actually connected to"""
+        identity = {"device": device}
+        for info in serial.tools.list_ports.comports():
+            if info.device == device:
+                identity = _identity(info)
+                break
+        link = self._by_id_link_for(device)
+        if link:
+            identity["by_id"] = link
+        if identity != self.identity:
+            self.identity = identity
+            self._save()
+            serial_log.info("💾 Remembered logger %s (serial %s)", device, identity.get("serial_number"))
+
+    def remember_dialect(self, name, baud):
+        """Firmware dialect detected on the remembered logger (see dialects.py)"""
+        if self.identity.get("dialect") != name or self.identity.get("baud") != baud:
+            self.identity.update(dialect=name, baud=baud)
+            self._save()
+
+    def forget(self):
+        self.identity = {}
+        try:
+            os.remove(self.cache_path)
+        except OSError:
+            pass
+
+    # -------------------- /dev/serial/by-id --------------------
+    @staticmethod
+    def _by_id_entries():
+        try:
+            return sorted(os.listdir(BY_ID_DIR))
+        except OSError:
+            return []
+
+    def _by_id_link_for(self, device):
+        real = os.path.realpath(device)
+        for name in self._by_id_entries():
+            link = os.path.join(BY_ID_DIR, name)
+            if os.path.realpath(link) == real:
+                return link
+        return None
+
+    def _from_by_id(self):
+        link = self.identity.get("by_id")
+        if link and os.path.exists(link):
+            return os.path.realpath(link)
+        serial_number = self.identity.get("serial_number")
+        for name in self._by_id_entries():
+            if (serial_number and serial_number in name) or (not serial_number and "Teensy" in name):
+                return os.path.realpath(os.path.join(BY_ID_DIR, name))
+        return None
+
+    # -------------------- Full Scan --------------------
+    def _scan(self):
+        ports = serial.tools.list_ports.comports()
+        teensies = [p for p in ports if p.vid == self.vid and (not self.pids or p.pid in self.pids)]
+        serial_number = self.identity.get("serial_number")
+        if serial_number:
+            # Pinned to one logger: never hop to another device (manual entry re-pins)
+            for p in ports:
+                if p.serial_number == serial_number:
+                    return p.device
+            return None
+        if teensies:
+            if len(teensies) > 1:
+                serial_log.warning("⚠️ %d Teensy devices found, using %s (connect once to pin one)",
+                                   len(teensies), teensies[0].device)
+            return teensies[0].device
+        named = [p for p in ports if "teensy" in (p.description or "").lower()]
+        if named:
+            return named[0].device
+        if not self.identity:
+            generic = [p for p in ports if any(k in (p.device or "").lower()
+                                               for k in ("usbmodem", "ttyacm", "usbserial"))]
+            if len(generic) == 1:
+                serial_log.info("  Using the only USB serial device: %s", generic[0].device)
+                return generic[0].device
+        return None
+
+    def find(self):
+        """Port path of the logger, or None"""
+        if sys.platform.startswith("linux") and os.path.isdir(BY_ID_DIR):
+            device = self._from_by_id()
+            if device or self.identity.get("serial_number") or self.identity.get("by_id"):
+                # udev lists every USB serial device here; if ours is missing it is unplugged
+                return device
+        return self._scan()
+
+    def wait_for_device(self, timeout, poll=POLL_INTERVAL):
+        """Block until the logger shows up (cheap by-id polling on Linux)"""
+        deadline = time.monotonic() + timeout
+        while True:
+            device = self.find()
+            if device or time.monotonic() >= deadline:
+                return device
+            time.sleep(poll)
@@ -0,0 +1,184 @@
+###############################################################
+#   READING BUS
+#   In-process publish/subscribe for calibrated readings.
+#   Each reading is published once as an immutable record; every
+#   consumer (display, CSV writer, graph windows, stats, alerts)
+#   gets its own bounded queue with a drop or backpressure policy
+#   so a slow consumer never stalls ingestion.
+###############################################################
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+
+from instrumentation import metrics
+from sensor_logging import get_logger
+
+# -------------------- CONFIG --------------------
+DEFAULT_QUEUE = 256
+DROP_OLDEST = "drop_oldest"   # keep the newest readings (displays, graphs)
+DROP_NEWEST = "drop_newest"   # keep what is queued, refuse new ones
+BLOCK = "block"               # backpressure: publisher waits up to block_timeout, then drops oldest
+POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+bus_log = get_logger("gui")
+published = metrics.counter("bus.published", "Readings published on the reading bus")
+
+
+# -------------------- Record --------------------
+@dataclass(frozen=True)
+class Reading:
+    """One calibrated reading, shared read-only by every subscriber"""
+    timestamp: datetime
+    ph: float
+    do: float
+    temp: float
+    pressure: float
+    saved: bool = False
+    reading_id: int = None        # SD Reading ID of SAVED readings
+    source: str = "live"          # "live", "backfill" or "burst" (recomputed from raw samples)
+    device_time: datetime = None  # logger RTC stamp (on the host clock once clock_sync maps it); None if not sent
+
+    @property
+    def values(self):
+        return self.ph, self.do, self.temp, self.pressure
+
+    def as_row(self):
+        """CSV row in the format every GUI writes"""
+        return {
+            "timestamp": self.timestamp.isoformat(sep=" ", timespec="milliseconds"),
+            "pH": f"{self.ph:.2f}",
+            "DO": f"{self.do:.2f}",
+            "Temperature": f"{self.temp:.2f}",
+            "Pressure": f"{self.pressure:.2f}",
+        }
+
+
+# -------------------- Subscription --------------------
+class Subscription:
+    """Bounded queue between the bus and one consumer.
+
+    Consumers either poll `drain()` (Tk `after` loops) or pass a handler to
+    ReadingBus.subscribe(), which then runs it on its own thread with
+    batches of readings.
+    """
+
+    def __init__(self, name, maxsize=DEFAULT_QUEUE, policy=DROP_OLDEST, block_timeout=1.0):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown bus policy: {policy}")
+        self.name = name
+        self.maxsize = maxsize
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.delivered = 0
+        self.dropped = metrics.counter(f"bus.dropped.{name}", f"Readings dropped for the {name} subscriber")
+        self.closed = False
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item):
+        """Publisher side; returns False when the item was dropped"""
+        with self._cond:
+            if self.closed:
+                return False
+            if len(self._items) >= self.maxsize:
+                if self.policy == BLOCK:
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._items) >= self.maxsize and not self.closed:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                if len(self._items) >= self.maxsize:
+                    self.dropped.inc()
+                    if self.policy == DROP_NEWEST:
+                        return False
+                    self._items.popleft()
+            self._items.append(item)
+            self.delivered += 1
+            self._cond.notify_all()
+        return True
+
+    def drain(self, max_items=None):
+        """Everything queued (or the oldest max_items), without waiting"""
+        with self._cond:
+            n = len(self._items) if max_items is None else min(max_items, len(self._items))
+            batch = [self._items.popleft() for _ in range(n)]
+            if batch:
+                self._cond.notify_all()
+        return batch
+
+    def get_batch(self, timeout=None, max_items=None):
+        """Wait for at least one reading (or timeout / close), then drain"""
+        with self._cond:
+            if not self._items and not self.closed:
+                self._cond.wait(timeout)
+        return self.drain(max_items)
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+# -------------------- Bus --------------------
+class ReadingBus:
+    """Fan-out of Reading records to any number of subscriptions"""
+
+    def __init__(self):
+        self._subs = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, name, maxsize=DEFAULT_QUEUE, policy=DROP_OLDEST, handler=None,
+                  block_timeout=1.0):
+        sub = Subscription(name, maxsize, policy, block_timeout)
+        with self._lock:
+            self._subs = self._subs + [sub]
+        if handler is not None:
+            threading.Thread(target=self._worker, args=(sub, handler), name=f"bus-{name}",
+                             daemon=True).start()
+        return sub
+
+    def __len__(self):
+        return len(self._subs)
+
+    def names(self):
+        """Names of the current subscriptions"""
+        return [s.name for s in self._subs]
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subs = [s for s in self._subs if s is not sub]
+        sub.close()
+
+    def publish(self, reading):
+        published.inc()
+        for sub in self._subs:    # copy-on-write list: no lock on the hot path
+            sub.put(reading)
+
+    def close(self):
+        with self._lock:
+            subs, self._subs = self._subs, []
+        for sub in subs:
+            sub.close()
+
+    def stats(self):
+        return [{"name": s.name, "policy": s.policy, "queued": len(s), "delivered": s.delivered,
+                 "dropped": s.dropped.value} for s in self._subs]
+
+    @staticmethod
+    def _worker(sub, handler):
+        while True:
+            batch = sub.get_batch(timeout=1.0)
+            if batch:
+                try:
+                    handler(batch)
+                except Exception as e:
+                    bus_log.error("❌ Bus subscriber %s failed: %s", sub.name, e)
+            elif sub.closed:
+                return
@@ -0,0 +1,287 @@
+###############################################################
+#   SAMPLING SCHEDULER
+#   Time-window interval sampling: "every 10 minutes between
+#   08:00 and 18:00". One thread keeps a heap of timers on the
+#   monotonic clock for any number of plans (windows, devices)
+#   and fires each job at its exact interval boundary - to send
+#   NOW to a sleeping logger, or to mark which incoming reading
+#   to keep (BoundarySelector). The serial reader never waits
+#   on it.
+#
+#   python sampling_scheduler.py --interval 0.5 --seconds 10   (jitter check)
+###############################################################
+
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, time as dtime, timedelta
+
+from clock_sync import host_clock
+from instrumentation import metrics
+from sensor_logging import get_logger
+
+# -------------------- CONFIG --------------------
+SPIN_MARGIN = 0.002           # s: busy-wait the last bit instead of trusting the OS timer
+MAX_WAIT = 30.0               # s: longest sleep before re-checking the wall clock
+WALL_TOLERANCE = 0.5          # s: boundary vs wall clock disagreement that re-plans a job
+
+serial_log = get_logger("serial")
+fire_lateness = metrics.histogram("scheduler.lateness", "Seconds a sampling boundary fired late",
+                                  buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.05, 0.1, 1.0))
+boundaries_missed = metrics.counter("scheduler.missed", "Sampling boundaries skipped (host asleep, overrun)")
+
+
+# -------------------- Plans --------------------
+@dataclass(frozen=True)
+class DailyWindow:
+    """Active from `start` to `end` (inclusive) every day; end < start wraps past midnight"""
+    start: dtime
+    end: dtime
+
+    def occurrences(self, around):
+        """(start, end) datetimes of the window instances that can contain `around`"""
+        for days in (-1, 0, 1):
+            day = around.date() + timedelta(days=days)
+            start = datetime.combine(day, self.start)
+            end = datetime.combine(day, self.end)
+            if end < start:
+                end += timedelta(days=1)
+            yield start, end
+
+
+ALL_DAY = DailyWindow(dtime(0, 0, 0), dtime(23, 59, 59))
+
+
+@dataclass(frozen=True)
+class SamplingPlan:
+    """Boundaries at window start + k * interval, for every window"""
+    interval_s: float
+    windows: tuple = (ALL_DAY,)
+
+    def __post_init__(self):
+        if self.interval_s <= 0:
+            raise ValueError("sampling interval must be positive")
+        if not self.windows:
+            raise ValueError("at least one time window is required")
+
+    def next_boundary(self, after):
+        """First boundary strictly after `after` (datetime), looking ahead two days"""
+        best = None
+        step = timedelta(seconds=self.interval_s)
+        for window in self.windows:
+            for day in (0, 1):
+                for start, end in window.occurrences(after + timedelta(days=day)):
+                    if end <= after:
+                        continue
+                    k = 0 if after < start else int((after - start) / step) + 1
+                    boundary = start + k * step
+                    if boundary <= end and (best is None or boundary < best):
+                        best = boundary
+        return best
+
+    def contains(self, when):
+        return any(start <= when <= end for window in self.windows for start, end in window.occurrences(when))
+
+
+# -------------------- Scheduler --------------------
+class Job:
+    """One scheduled plan; callback(boundary datetime, lateness seconds) runs on the scheduler thread"""
+
+    def __init__(self, name, plan, callback):
+        self.name = name
+        self.plan = plan
+        self.callback = callback
+        self.boundary = None      # next wall-clock boundary
+        self.due = None           # the same on the monotonic clock
+        self.fired = 0
+        self.missed = 0
+        self.max_lateness = 0.0
+        self.cancelled = False
+
+
+class SamplingScheduler:
+    """Timer heap on time.monotonic() for many sampling jobs.
+
+    Boundaries are computed on the wall clock (windows are times of day)
+    and converted to monotonic deadlines; the thread sleeps on a
+    Condition until SPIN_MARGIN before the earliest one and spins the
+    rest, so firing jitter is well under a millisecond on an idle host.
+    Callbacks must be quick (write a command, set a flag) - they delay
+    every later job. A boundary that is more than one interval late
+    (suspend, overload) is skipped, not fired in a burst.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._jobs = {}
+        self._thread = None
+        self._stop = False
+
+    # -------------------- Jobs --------------------
+    def add(self, name, plan, callback):
+        """Schedule `plan` (replacing a job of the same name); starts the thread"""
+        job = Job(name, plan, callback)
+        with self._cond:
+            old = self._jobs.pop(name, None)
+            if old is not None:
+                old.cancelled = True
+            self._jobs[name] = job
+            self._plan(job, host_clock.now())
+            self._cond.notify()
+        self.start()
+        serial_log.info("⏱️ Sampling job %s: every %.1f s, next at %s", name, plan.interval_s,
+                        job.boundary.strftime("%Y-%m-%d %H:%M:%S") if job.boundary else "never")
+        return job
+
+    def cancel(self, name):
+        with self._cond:
+            job = self._jobs.pop(name, None)
+            if job is not None:
+                job.cancelled = True
+                self._cond.notify()
+        return job
+
+    def jobs(self):
+        with self._cond:
+            return list(self._jobs.values())
+
+    def _plan(self, job, after):
+        """Push the job's next boundary (lock held)"""
+        job.boundary = job.plan.next_boundary(after)
+        if job.boundary is None:
+            job.due = None
+            return
+        job.due = time.monotonic() + (job.boundary - host_clock.now()).total_seconds()
+        heapq.heappush(self._heap, (job.due, next(self._seq), job))
+
+    # -------------------- Thread --------------------
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="sampling-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=2)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stop and not self._heap:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                due, _, job = self._heap[0]
+                if job.cancelled or due != job.due:
+                    heapq.heappop(self._heap)
+                    continue
+                remaining = due - time.monotonic()
+                if remaining > SPIN_MARGIN:
+                    self._cond.wait(min(remaining - SPIN_MARGIN, MAX_WAIT))
+                    # Woken early (new job / stop) or by the timeout: if the wall clock
+                    # stepped meanwhile, move the same boundary to its new deadline
+                    if job.due == due and not job.cancelled:
+                        wall_due = (job.boundary - host_clock.now()).total_seconds()
+                        if abs(wall_due - (due - time.monotonic())) > WALL_TOLERANCE:
+                            heapq.heappop(self._heap)
+                            self._plan(job, job.boundary - timedelta(microseconds=1))
+                    continue
+                heapq.heappop(self._heap)
+
+            while time.monotonic() < due:
+                pass
+            lateness = time.monotonic() - due
+
+            with self._cond:
+                if job.cancelled:
+                    continue
+                if lateness > job.plan.interval_s:
+                    job.missed += 1
+                    boundaries_missed.inc()
+                    serial_log.warning("⏱️ %s: boundary %s skipped (%.1f s late)", job.name,
+                                       job.boundary.strftime("%H:%M:%S"), lateness)
+                    self._plan(job, host_clock.now())
+                    continue
+                boundary = job.boundary
+                job.fired += 1
+                job.max_lateness = max(job.max_lateness, lateness)
+                self._plan(job, boundary)
+            fire_lateness.observe(lateness)
+            try:
+                job.callback(boundary, lateness)
+            except Exception as e:
+                serial_log.error("❌ Sampling job %s failed: %s", job.name, e)
+
+
+# -------------------- Reading Selection --------------------
+class BoundarySelector:
+    """Keeps the first reading that arrives after each boundary.
+
+    The scheduler calls `mark()` at a boundary; the reader thread calls
+    `offer(arrival)` per reading (monotonic arrival stamp) and keeps the
+    reading when it returns True. A boundary still open when the next one
+    is marked had no reading and counts as `missed`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open = None
+        self.selected = 0
+        self.missed = 0
+
+    def mark(self, at=None):
+        with self._lock:
+            if self._open is not None:
+                self.missed += 1
+            self._open = time.monotonic() if at is None else at
+
+    def offer(self, arrival):
+        with self._lock:
+            if self._open is None or arrival < self._open:
+                return False
+            self._open = None
+            self.selected += 1
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._open = None
+
+
+# -------------------- Main --------------------
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fire a sampling plan and report the jitter")
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--jobs", type=int, default=3, help="concurrent plans (one per simulated device)")
+    args = parser.parse_args()
+
+    scheduler = SamplingScheduler()
+    late = []
+    now = datetime.now()
+    window = DailyWindow(now.time(), (now + timedelta(seconds=args.seconds)).time())
+    for i in range(args.jobs):
+        plan = SamplingPlan(args.interval * (i + 1), (window,))
+        scheduler.add(f"device{i}", plan, lambda boundary, lateness: late.append(lateness))
+    time.sleep(args.seconds + 0.5)
+    scheduler.stop()
+
+    late.sort()
+    fired = sum(job.fired for job in scheduler.jobs())
+    print(f"⏱️ {fired} boundaries fired across {args.jobs} jobs, {sum(j.missed for j in scheduler.jobs())} missed")
+    if late:
+        print(f"   lateness median {late[len(late) // 2] * 1e6:.0f} us, "
+              f"p99 {late[int(len(late) * 0.99)] * 1e6:.0f} us, max {late[-1] * 1e6:.0f} us")
@@ -0,0 +1,451 @@
+###############################################################
+#   SENSOR DAEMON
+#   Headless logger for the field laptop: owns the Teensy serial
+#   port (SD_sketch_jan14a.ino), stores SAVED readings, backfills
+#   missed ones from the SD card, and serves viewers on localhost:
+#
+#     GET /api/latest                      newest reading (JSON)
+#     GET /api/history?from=&to=&points=   store range, decimated
+#     GET /api/status                      link / loss / viewer stats
+#     GET /metrics                         Prometheus text
+#     GET /ws                              WebSocket push of every reading
+#     GET /                                minimal live page
+#
+#   python sensor_daemon.py [--port /dev/ttyACM0] [--http-port 8765]
+#   python sensor_daemon.py --simulate     (pty simulator, no hardware)
+#   python sensor_daemon.py --record session.rec
+#   python sensor_daemon.py --replay session.rec --speed 100x
+#   python sensor_daemon.py --dialect usb_check   (skip firmware detection)
+###############################################################
+
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import select
+import signal
+import struct
+import threading
+import time
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import serial
+
+from calibration import CalibrationManager, device_id_for_port
+from clock_sync import host_clock
+from dialects import DialectDetector, DIALECTS, BY_NAME, SD_PARAMS, PROBE_COMMAND
+from ingest import Ingest, frame_readings
+from instrumentation import metrics
+from port_discovery import PortDiscovery
+from reading_bus import ReadingBus, DROP_OLDEST
+from sensor_logging import setup_logging, get_logger
+from sensor_store import SensorStore, CHANNELS, STORE_FILE, to_epoch
+from serial_link import SerialLink
+from telemetry import StreamDecoder, CMD_BINARY, ACK_PREFIX
+
+# -------------------- CONFIG --------------------
+BAUD = 115200
+SERIAL_TIMEOUT = 1.0
+HTTP_HOST = "127.0.0.1"
+HTTP_PORT = 8765
+VIEWER_QUEUE = 256            # readings buffered per WebSocket viewer before dropping the oldest
+VIEWER_PREFIX = "viewer_"     # bus subscription of each WebSocket viewer: viewer_1, viewer_2, ...
+WS_PING_INTERVAL = 15.0
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+serial_log = get_logger("serial")
+gui_log = get_logger("gui")      # viewers are this process's "UI"
+
+viewers_gauge = metrics.gauge("daemon.viewers", "Connected WebSocket viewers")
+
+
+# -------------------- Viewer Records --------------------
+def reading_json(reading):
+    """Wire format pushed to viewers and returned by /api/latest"""
+    record = {"ts": reading.timestamp.timestamp(),
+              "timestamp": reading.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+              "saved": reading.saved, "reading_id": reading.reading_id, "source": reading.source}
+    record.update(zip(CHANNELS, (round(float(v), 4) for v in reading.values)))
+    return record
+
+
+def viewer_count(bus):
+    """WebSocket viewers among the bus subscriptions"""
+    return sum(name.startswith(VIEWER_PREFIX) for name in bus.names())
+
+
+# -------------------- Ingestion --------------------
+class Ingestor:
+    """Serial -> decode -> calibrate -> store -> reading bus, on one reader thread"""
+
+    def __init__(self, store, bus, port=None, binary=True, remember_port=True, link=None, recorder=None,
+                 dialect=None):
+        self.store = store
+        self.bus = bus
+        self.binary = binary
+        self.remember_port = remember_port
+        self.discovery = PortDiscovery()
+        self.calibration = CalibrationManager()
+        self.port = port
+        self.link = link                   # prebuilt link (session_replay.ReplayLink) skips the port
+        self.recorder = recorder
+        self.decoder = StreamDecoder()
+        self.dialect = dialect             # dialects.Dialect; None = detect from the first lines
+        self.detector = DialectDetector()
+        self.parser = None
+        self.latest = None
+        # Recovered readings are stored but not pushed: viewers show the live stream
+        self.ingest = Ingest(store, self._publish, lambda data: self.link.write(data, queue=False), self._backfill_ready,
+                             publish_backfill=False)
+        self._arrival = time.monotonic()   # when the chunk being processed was read
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self.link is not None:
+            self.profile = self.calibration.active()
+            self.ingest.reset(profile=self.profile)
+            serial_log.info("🎞️ Replaying %s", self.link.port)
+        else:
+            port = self.port or self.discovery.wait_for_device(timeout=30)
+            if not port:
+                raise RuntimeError("No Teensy found (use --port)")
+            self.profile = self.calibration.active(device_id_for_port(port))
+            self.ingest.reset(profile=self.profile)
+            # Last detected dialect of this logger decides the baud; detection still runs
+            baud = self.dialect.baud if self.dialect else self.discovery.identity.get("baud", BAUD)
+            self.link = SerialLink(port, baud, timeout=SERIAL_TIMEOUT, find_port=self.discovery.find,
+                                   on_reconnect=self._on_reconnect, recorder=self.recorder).open()
+            if self.remember_port:
+                self.discovery.remember(port)
+            serial_log.info("✅ Connected to %s at %d baud", port, baud)
+        if self.dialect is not None:
+            self._bind(self.dialect)
+        else:
+            self.link.write(PROBE_COMMAND)
+        if self.binary and (self.dialect is None or self.dialect.binary):
+            self.link.write(CMD_BINARY)
+        self._thread = threading.Thread(target=self._run, name="ingest", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        if self.link:
+            self.link.close()
+
+    def _on_reconnect(self, port, seconds_down):
+        if self.binary and (self.dialect is None or self.dialect.binary):
+            self.link.write(CMD_BINARY)
+        self.ingest.interrupted()
+        self.ingest.next_backfill()
+
+    def _backfill_ready(self):
+        return self.link is not None and self.link.connected and not getattr(self.link, "replay", False)
+
+    def status(self):
+        link = self.link
+        return {
+            "port": link.port if link else None,
+            "dialect": self.dialect.name if self.dialect else None,
+            "link": link.state if link else "closed",
+            "reconnects": link.reconnects if link else 0,
+            "downtime_s": round(link.total_downtime(), 3) if link else 0.0,
+            "received": self.ingest.link_tracker.received,
+            "missing": self.ingest.link_tracker.missing,
+            "loss_rate": self.ingest.link_tracker.loss_rate,
+            "backfill_pending": len(self.ingest.backfill_queue),
+            "viewers": viewer_count(self.bus),
+        }
+
+    # ---------- reader thread ----------
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                raw = self.link.read_available()
+                self._arrival = time.monotonic()
+            except (serial.SerialException, OSError) as e:
+                serial_log.error("❌ Serial exception in read loop: %s", e)
+                partial = self.decoder.flush()
+                if partial:
+                    serial_log.warning("✂️ Discarded %d byte(s) cut off by the disconnect: %r",
+                                       len(partial), partial[:80])
+                continue
+            if not raw:
+                time.sleep(0.02)
+                continue
+            items = self.decoder.feed(raw)
+            for item in items:
+                try:
+                    if isinstance(item, str):
+                        self._on_line(item)
+                    else:
+                        self._on_frames(item)
+                except Exception as e:
+                    serial_log.error("❌ Could not process %r: %s", item if isinstance(item, str) else "frames", e)
+
+    def _bind(self, dialect):
+        """Use this firmware's parser from now on"""
+        self.dialect = dialect
+        self.parser = dialect.make_parser(self.profile)
+        serial_log.info("🧬 Firmware dialect: %s (%s, %d baud)", dialect.name, dialect.firmware, dialect.baud)
+        if self.remember_port and not getattr(self.link, "replay", False):
+            self.discovery.remember_dialect(dialect.name, dialect.baud)
+
+    def _on_line(self, line):
+        if self.ingest.capture(line):
+            return
+        if self.parser is None:
+            dialect = self.detector.feed(line) or (SD_PARAMS if self.detector.gave_up else None)
+            if dialect is None:
+                return
+            self._bind(dialect)
+        if line.startswith(ACK_PREFIX):
+            serial_log.info("Telemetry mode: %s", line[len(ACK_PREFIX):])
+            return
+        _, reading = self.parser.feed(line)
+        if reading is None:
+            return
+        reading = replace(reading, timestamp=host_clock.to_datetime(self._arrival))
+        seq = getattr(self.parser, "last_seq", None)
+        if seq is not None and not self.ingest.track([seq])[0]:
+            return
+        self.ingest.accept(reading)
+
+    def _on_frames(self, frames):
+        if self.parser is None:
+            self._bind(self.detector.feed_frames(frames))
+        frames = frames[self.ingest.track(frames["seq"])]
+        for reading in frame_readings(frames, self.profile, host_clock.to_datetime(self._arrival)):
+            self.ingest.accept(reading)
+
+    def _publish(self, reading):
+        self.latest = reading
+        self.bus.publish(reading)
+
+
+# -------------------- WebSocket --------------------
+def ws_accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+
+def ws_frame(payload, opcode=0x1):
+    """One unmasked server frame"""
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return header + payload
+
+
+def _recv_exact(sock, n):
+    data = b""
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError("viewer closed the socket")
+        data += chunk
+    return data
+
+
+def ws_read_frame(sock):
+    """(opcode, payload) of one masked client frame"""
+    b0, b1 = _recv_exact(sock, 2)
+    n = b1 & 0x7F
+    if n == 126:
+        n = struct.unpack("!H", _recv_exact(sock, 2))[0]
+    elif n == 127:
+        n = struct.unpack("!Q", _recv_exact(sock, 8))[0]
+    mask = _recv_exact(sock, 4) if b1 & 0x80 else b"\0\0\0\0"
+    payload = bytes(c ^ mask[i % 4] for i, c in enumerate(_recv_exact(sock, n)))
+    return b0 & 0x0F, payload
+
+
+# -------------------- HTTP --------------------
+LIVE_PAGE = """<!doctype html><meta charset="utf-8"><title>Ocean Sensor Live</title>
+<body style="background:#001F33;color:#B3F0FF;font:20px Consolas,monospace">
+<h2>🌊 Ocean Sensor - live</h2><pre id="v">waiting for data...</pre>
+<script>
+const ws = new WebSocket(`ws://${location.host}/ws`);
+ws.onmessage = e => { const r = JSON.parse(e.data);
+  document.getElementById("v").textContent =
+    `${r.timestamp} ${r.saved ? "SAVED #" + r.reading_id : "LIVE"}\\n` +
+    `pH ${r.pH.toFixed(2)}\\nDO ${r.DO.toFixed(2)} mg/L\\n` +
+    `Temp ${r.Temperature.toFixed(2)} °C\\nPressure ${r.Pressure.toFixed(2)} mbar`; };
+ws.onclose = () => document.getElementById("v").textContent += "\\n(disconnected)";
+</script>"""
+
+
+def _time_arg(value, default):
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return to_epoch(value.replace("T", " "))
+
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    """One thread per request (ThreadingHTTPServer); /ws keeps its thread"""
+
+    ingestor = None
+    store = None
+    bus = None
+    viewer_ids = itertools.count(1)
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        gui_log.debug("%s %s", self.address_string(), fmt % args)
+
+    def _send(self, code, body, content_type="application/json"):
+        if not isinstance(body, bytes):
+            body = (body if isinstance(body, str) else json.dumps(body)).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        args = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            if url.path == "/ws":
+                self._websocket()
+            elif url.path == "/api/latest":
+                latest = self.ingestor.latest
+                self._send(200, reading_json(latest) if latest else {})
+            elif url.path == "/api/history":
+                now = time.time()
+                t1 = _time_arg(args.get("to"), now)
+                t0 = _time_arg(args.get("from"), t1 - 86400)
+                points = min(int(args.get("points", 1000)), 10000)
+                self._send(200, self.store.query_range(t0, t1, points))
+            elif url.path == "/api/status":
+                self._send(200, self.ingestor.status())
+            elif url.path == "/metrics":
+                self._send(200, metrics.to_prometheus(), "text/plain; version=0.0.4")
+            elif url.path in ("/", "/index.html"):
+                self._send(200, LIVE_PAGE, "text/html; charset=utf-8")
+            else:
+                self._send(404, {"error": f"no route {url.path}"})
+        except ValueError as e:
+            self._send(400, {"error": str(e)})
+
+    def _websocket(self):
+        key = self.headers.get("Sec-WebSocket-Key")
+        if self.headers.get("Upgrade", "").lower() != "websocket" or not key:
+            self._send(400, {"error": "expected a WebSocket upgrade"})
+            return
+        self.send_response(101, "Switching Protocols")
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", ws_accept_key(key))
+        self.end_headers()
+        self.wfile.flush()
+        self.close_connection = True
+
+        sock = self.connection
+        # Own name per viewer, so each one has its own bus.dropped.viewer_<n> counter
+        sub = self.bus.subscribe(f"{VIEWER_PREFIX}{next(self.viewer_ids)}", maxsize=VIEWER_QUEUE, policy=DROP_OLDEST)
+        viewers_gauge.set(viewer_count(self.bus))
+        gui_log.info("👀 Viewer %s connected (%d watching)", sub.name, viewer_count(self.bus))
+        try:
+            if self.ingestor.latest:
+                sock.sendall(ws_frame(json.dumps(reading_json(self.ingestor.latest)).encode()))
+            last_ping = time.monotonic()
+            while True:
+                for reading in sub.get_batch(timeout=0.5):
+                    sock.sendall(ws_frame(json.dumps(reading_json(reading)).encode()))
+                if time.monotonic() - last_ping > WS_PING_INTERVAL:
+                    sock.sendall(ws_frame(b"", opcode=0x9))
+                    last_ping = time.monotonic()
+                if select.select([sock], [], [], 0)[0]:
+                    opcode, payload = ws_read_frame(sock)
+                    if opcode == 0x8:
+                        sock.sendall(ws_frame(payload[:2], opcode=0x8))
+                        break
+                    if opcode == 0x9:
+                        sock.sendall(ws_frame(payload, opcode=0xA))
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.bus.unsubscribe(sub)
+            viewers_gauge.set(viewer_count(self.bus))
+            gui_log.info("👋 Viewer %s left (%d watching, %d reading(s) dropped)", sub.name,
+                         viewer_count(self.bus), sub.dropped.value)
+
+
+class DaemonServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(ingestor, store, bus, host=HTTP_HOST, port=HTTP_PORT):
+    handler = type("Handler", (DaemonHandler,), {"ingestor": ingestor, "store": store, "bus": bus})
+    return DaemonServer((host, port), handler)
+
+
+# -------------------- Main --------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless Teensy logger with a local live feed")
+    parser.add_argument("--port", help="serial port (default: discovered / remembered logger)")
+    parser.add_argument("--http-host", default=HTTP_HOST)
+    parser.add_argument("--http-port", type=int, default=HTTP_PORT)
+    parser.add_argument("--text", action="store_true", help="do not request binary telemetry")
+    parser.add_argument("--simulate", action="store_true", help="run against teensy_simulator")
+    parser.add_argument("--store", help=f"reading store (default {STORE_FILE}; in-memory when replaying)")
+    parser.add_argument("--record", metavar="PATH", help="record the raw serial session to PATH")
+    parser.add_argument("--replay", metavar="PATH", help="serve a recorded session instead of a port")
+    parser.add_argument("--speed", default="1x", help="replay speed: 1x, 100x, max or a factor")
+    parser.add_argument("--dialect", choices=["auto"] + [d.name for d in DIALECTS], default="auto",
+                        help="firmware dialect (default: detect from the banner / first lines)")
+    args = parser.parse_args()
+
+    setup_logging("sensor_daemon")
+    sim = None
+    port = args.port
+    if args.simulate:
+        from teensy_simulator import TeensySimulator
+        sim = TeensySimulator(interval=1.0)
+        port = sim.start()
+
+    link = recorder = None
+    if args.replay:
+        from session_replay import ReplayLink, SPEEDS
+        link = ReplayLink(args.replay, SPEEDS.get(args.speed) if args.speed in SPEEDS else float(args.speed))
+    elif args.record:
+        from session_replay import SessionRecorder
+        recorder = SessionRecorder(args.record, port=port, baud=BAUD)
+
+    store = SensorStore(args.store or (":memory:" if args.replay else STORE_FILE))
+    bus = ReadingBus()
+    ingestor = Ingestor(store, bus, port=port, binary=not args.text,
+                        remember_port=not (args.simulate or args.replay), link=link, recorder=recorder,
+                        dialect=BY_NAME.get(args.dialect))
+    ingestor.start()
+    server = serve(ingestor, store, bus, args.http_host, args.http_port)
+    gui_log.info("🌐 Serving http://%s:%d/  (WebSocket: /ws)", args.http_host, args.http_port)
+
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        ingestor.stop()
+        store.close()
+        if recorder:
+            recorder.close()
+        if sim:
+            sim.stop()
@@ -0,0 +1,185 @@
+###############################################################
+#   SENSOR LOGGING
+#   Queue-based structured logging for the dashboards:
+#   per-category levels, rate-limited repeated errors and
+#   rotating log files. Disabled categories cost one level check.
+###############################################################
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+# -------------------- CONFIG --------------------
+LOG_DIR = "logs"
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 5
+RATE_LIMIT_WINDOW = 10.0     # seconds between repeats of the same warning/error
+
+ROOT_LOGGER = "sensor"
+# serial: port/connection   rx: every received line   parse: frame decoding
+# sd: SD download           store: SQLite/CSV writes   gui: UI actions
+CATEGORY_LEVELS = {
+    "serial": logging.INFO,
+    "rx": logging.WARNING,      # per-line echo only when asked for (rx=DEBUG)
+    "parse": logging.INFO,
+    "sd": logging.INFO,
+    "store": logging.INFO,
+    "gui": logging.INFO,
+}
+
+# Overrides, e.g.  SENSOR_LOG_LEVEL=DEBUG  SENSOR_LOG_LEVELS="rx=DEBUG,serial=WARNING"
+ENV_LEVEL = "SENSOR_LOG_LEVEL"
+ENV_CATEGORY_LEVELS = "SENSOR_LOG_LEVELS"
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def get_logger(category):
+    """Logger for one category (`sensor.<category>`)"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{category}")
+
+
+# -------------------- Rate Limiting --------------------
+class RateLimiter:
+    """Lets the first occurrence of a key through, then one per window"""
+
+    def __init__(self, window=RATE_LIMIT_WINDOW):
+        self.window = window
+        self._state = {}             # key -> [last emitted, suppressed since]
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        """(allowed, number of suppressed repeats since the last allowed one)"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[1] if state else 0
+                self._state[key] = [now, 0]
+                return True, suppressed
+            state[1] += 1
+            return False, state[1]
+
+
+class RateLimitFilter(logging.Filter):
+    """Drops repeated WARNING+ records that share a message template"""
+
+    def __init__(self, window=RATE_LIMIT_WINDOW):
+        super().__init__()
+        self.limiter = RateLimiter(window)
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING:
+            return True
+        allowed, suppressed = self.limiter.allow((record.name, record.levelno, record.msg))
+        if allowed and suppressed:
+            record.suppressed = suppressed
+        return allowed
+
+
+# -------------------- Formatters --------------------
+class ConsoleFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s [%(category)s] %(message)s", "%H:%M:%S")
+
+    def format(self, record):
+        record.category = record.name.rpartition(".")[2]
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f"  (+{suppressed} similar suppressed)"
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields are kept as keys"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "category": record.name.rpartition(".")[2],
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and key != "category":
+                entry[key] = value if isinstance(value, (int, float, str, bool, type(None))) else str(value)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+# -------------------- Setup --------------------
+def _parse_levels(text):
+    levels = {}
+    for item in (text or "").split(","):
+        if "=" in item:
+            category, level = item.split("=", 1)
+            levels[category.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(app_name, levels=None, log_dir=LOG_DIR, console=True, debug=False):
+    """Route `sensor.*` loggers through a queue to rotating files (+ console).
+
+    Call once at startup; later calls only update category levels. Producers
+    only enqueue records; formatting and file I/O run on a listener thread.
+    """
+    global _listener
+
+    root_logger = logging.getLogger(ROOT_LOGGER)
+    root_logger.setLevel(logging.DEBUG if debug else os.environ.get(ENV_LEVEL, "INFO").upper())
+
+    category_levels = dict(CATEGORY_LEVELS)
+    if debug:
+        category_levels = {name: logging.DEBUG for name in category_levels}
+    category_levels.update(levels or {})
+    category_levels.update(_parse_levels(os.environ.get(ENV_CATEGORY_LEVELS)))
+    for category, level in category_levels.items():
+        get_logger(category).setLevel(level)
+
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        handlers = []
+        os.makedirs(log_dir, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            os.path.join(log_dir, f"{app_name}.jsonl"), maxBytes=MAX_BYTES,
+            backupCount=BACKUP_COUNT, encoding="utf-8")
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+        if console:
+            stream_handler = logging.StreamHandler(sys.stdout)
+            stream_handler.setFormatter(ConsoleFormatter())
+            handlers.append(stream_handler)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter())
+        root_logger.addHandler(queue_handler)
+        root_logger.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
@@ -0,0 +1,564 @@
+###############################################################
+#   SENSOR STORE
+#   SQLite-backed reading history with time-windowed,
+#   screen-resolution queries for the graph windows and
+#   incrementally maintained 1 min / 1 h / 1 day rollups.
+#
+#   python sensor_store.py --check     (counter reset / duplicate / rollup / rederive self-check)
+###############################################################
+
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from calibration import rederive
+
+# -------------------- CONFIG --------------------
+STORE_FILE = "sensor_readings.db"
+CHANNELS = ("pH", "DO", "Temperature", "Pressure")
+_COLUMNS = ("ph", "do_mgl", "temp", "pressure")
+
+# Rollup resolutions in seconds (buckets align to local minute/hour/midnight)
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+ROLLUP_RESOLUTIONS = (MINUTE, HOUR, DAY)
+
+# A Reading ID this far below the epoch's highest, or back at the start of the
+# counter, and already stored, means counter.txt restarted (new counter epoch)
+EPOCH_RESET_JUMP = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    ts          REAL NOT NULL,
+    ph          REAL,
+    do_mgl      REAL,
+    temp        REAL,
+    pressure    REAL,
+    saved       INTEGER NOT NULL DEFAULT 1,
+    reading_id  INTEGER,
+    counter_epoch INTEGER NOT NULL DEFAULT 0,
+    calib_device TEXT,
+    calib_version INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_readings_ts ON readings(ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    resolution  INTEGER NOT NULL,
+    bucket      REAL NOT NULL,
+    n           INTEGER NOT NULL,
+    ph_n INTEGER NOT NULL DEFAULT 0, ph_min REAL, ph_max REAL, ph_sum REAL,
+    do_mgl_n INTEGER NOT NULL DEFAULT 0, do_mgl_min REAL, do_mgl_max REAL, do_mgl_sum REAL,
+    temp_n INTEGER NOT NULL DEFAULT 0, temp_min REAL, temp_max REAL, temp_sum REAL,
+    pressure_n INTEGER NOT NULL DEFAULT 0, pressure_min REAL, pressure_max REAL, pressure_sum REAL,
+    PRIMARY KEY (resolution, bucket)
+);
+"""
+
+# SD Reading IDs are unique within one run of the firmware counter (counter.txt),
+# so backfilled and live copies of a reading collapse. The counter restarts at 1
+# when counter.txt is lost (no SD card, new card, other logger): each run gets
+# its own counter_epoch and IDs are only unique inside it.
+_READING_ID_INDEX = ("CREATE UNIQUE INDEX IF NOT EXISTS idx_readings_epoch_reading_id "
+                     "ON readings(counter_epoch, reading_id) WHERE reading_id IS NOT NULL")
+_INSERT_READING = ("INSERT OR IGNORE INTO readings "
+                   "(ts, ph, do_mgl, temp, pressure, saved, reading_id, counter_epoch, calib_device, calib_version) "
+                   "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+# Per channel: non-NULL count, min, max, sum (a sensor may report nothing for a reading)
+_STAT_COLUMNS = ", ".join(f"{c}_n, {c}_min, {c}_max, {c}_sum" for c in _COLUMNS)
+
+# Merge a partial aggregate into an existing bucket. Two-argument MIN/MAX and +
+# are NULL if either side is, so a side that is NULL falls back to the other.
+_ROLLUP_UPSERT = (
+    f"INSERT INTO rollups (resolution, bucket, n, {_STAT_COLUMNS}) "
+    f"VALUES ({', '.join('?' * 19)}) "
+    "ON CONFLICT(resolution, bucket) DO UPDATE SET n = n + excluded.n, "
+    + ", ".join(f"{c}_n = {c}_n + excluded.{c}_n, "
+                f"{c}_min = COALESCE(MIN({c}_min, excluded.{c}_min), {c}_min, excluded.{c}_min), "
+                f"{c}_max = COALESCE(MAX({c}_max, excluded.{c}_max), {c}_max, excluded.{c}_max), "
+                f"{c}_sum = COALESCE({c}_sum + excluded.{c}_sum, {c}_sum, excluded.{c}_sum)" for c in _COLUMNS)
+)
+
+# Bulk rebuild straight from raw readings
+_ROLLUP_REBUILD = (
+    f"INSERT INTO rollups (resolution, bucket, n, {_STAT_COLUMNS}) "
+    "SELECT ?, bucket_start(ts, ?) AS b, COUNT(*), "
+    + ", ".join(f"COUNT({c}), MIN({c}), MAX({c}), SUM({c})" for c in _COLUMNS)
+    + " FROM readings GROUP BY b"
+)
+
+
+# -------------------- Time Helpers --------------------
+def to_epoch(value):
+    """datetime / 'YYYY-MM-DD HH:MM:SS[.mmm]' / number -> epoch seconds"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+def from_epoch(ts):
+    return datetime.fromtimestamp(ts)
+
+
+def bucket_start(ts, resolution):
+    """Start of the local-time bucket containing ts (DST-aware)"""
+    gmtoff = time.localtime(ts).tm_gmtoff
+    return ts - ((ts + gmtoff) % resolution)
+
+
+# -------------------- Store --------------------
+class SensorStore:
+    """Thread-safe reading store; the graph loader queries it off the Tk thread"""
+
+    def __init__(self, path=STORE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.create_function("bucket_start", 2, bucket_start, deterministic=True)
+        self._conn.executescript(_SCHEMA)
+        columns = [r[1] for r in self._conn.execute("PRAGMA table_info(readings)")]
+        if "reading_id" not in columns:
+            self._conn.execute("ALTER TABLE readings ADD COLUMN reading_id INTEGER")
+        if "counter_epoch" not in columns:
+            self._conn.execute("ALTER TABLE readings ADD COLUMN counter_epoch INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("DROP INDEX IF EXISTS idx_readings_reading_id")   # was unique on reading_id alone
+        if "calib_version" not in columns:
+            # Calibration profile each row was computed with (NULL: before this was recorded)
+            self._conn.execute("ALTER TABLE readings ADD COLUMN calib_device TEXT")
+            self._conn.execute("ALTER TABLE readings ADD COLUMN calib_version INTEGER")
+        self._conn.execute(_READING_ID_INDEX)
+        rollup_columns = [r[1] for r in self._conn.execute("PRAGMA table_info(rollups)")]
+        counted = "ph_n" in rollup_columns
+        if not counted:
+            for c in _COLUMNS:
+                self._conn.execute(f"ALTER TABLE rollups ADD COLUMN {c}_n INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+        self.epoch = self._conn.execute("SELECT COALESCE(MAX(counter_epoch), 0) FROM readings").fetchone()[0]
+        # Stores created before rollups (or per-channel counts) existed get them built once
+        if ((not counted or self._scalar("SELECT COUNT(*) FROM rollups") == 0)
+                and self._scalar("SELECT COUNT(*) FROM readings")):
+            self.rebuild_rollups()
+
+    def _scalar(self, sql, args=()):
+        with self._lock:
+            return self._conn.execute(sql, args).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------- writes ----------
+    def _epoch_max_id(self):
+        return self._conn.execute("SELECT MAX(reading_id) FROM readings WHERE counter_epoch = ?",
+                                  (self.epoch,)).fetchone()[0]
+
+    def _starts_epoch(self, reading_id, last, pending=()):
+        """Is `reading_id` the first of a new counter run? Only when it went back far
+        (or to the start of the counter) and is already taken in the current epoch -
+        a late or re-sent older reading is not a reset."""
+        if last is None or reading_id >= last:
+            return False
+        if last - reading_id < EPOCH_RESET_JUMP and reading_id > EPOCH_RESET_JUMP:
+            return False
+        return reading_id in pending or self._conn.execute(
+            "SELECT 1 FROM readings WHERE counter_epoch = ? AND reading_id = ?",
+            (self.epoch, reading_id)).fetchone() is not None
+
+    def insert_reading(self, timestamp, ph, do, temp, pressure, saved=True, reading_id=None, profile=None):
+        """Append one reading (timestamp: datetime, string or epoch seconds)
+        calibrated with `profile` (recorded for rederive()).
+
+        A Reading ID that restarts the counter (see _starts_epoch) begins a new
+        counter epoch. Returns False when the Reading ID is already stored in the
+        current epoch (duplicate).
+        """
+        with self._lock:
+            if reading_id is not None and self._starts_epoch(reading_id, self._epoch_max_id()):
+                self.epoch += 1
+            row = (to_epoch(timestamp), ph, do, temp, pressure, int(saved), reading_id, self.epoch,
+                   *_calib_key(profile))
+            inserted = self._conn.execute(_INSERT_READING, row).rowcount == 1
+            if inserted:
+                self._conn.executemany(_ROLLUP_UPSERT, _aggregate([row]))
+            self._conn.commit()
+        return inserted
+
+    def insert_many(self, rows, saved=True, log_order=False, profile=None):
+        """Bulk append (timestamp, ph, do, temp, pressure[, reading_id]) rows, all
+        calibrated with `profile`, in one transaction; rows whose Reading ID is
+        already stored are skipped.
+
+        Rows belong to the current counter epoch (SD backfill). With
+        log_order=True they are Datalog records in file order instead: a Reading
+        ID that restarts the counter (see _starts_epoch) begins a new epoch, so a
+        log spanning counter resets keeps every run.
+        """
+        data = []
+        calib = _calib_key(profile)
+        with self._lock:
+            last = self._epoch_max_id() if log_order else None
+            pending = set()           # IDs of this batch in the current epoch
+            for r in rows:
+                reading_id = r[5] if len(r) > 5 else None
+                if log_order and reading_id is not None:
+                    if self._starts_epoch(reading_id, last, pending):
+                        self.epoch += 1
+                        last = None
+                        pending.clear()
+                    last = reading_id if last is None else max(last, reading_id)
+                    pending.add(reading_id)
+                data.append((to_epoch(r[0]), r[1], r[2], r[3], r[4], int(saved), reading_id, self.epoch, *calib))
+            keys = [(r[7], r[6]) for r in data if r[6] is not None]
+            if keys:
+                seen = self._known_keys(keys)
+                unique = []
+                for r in data:
+                    if r[6] is not None:
+                        if (r[7], r[6]) in seen:
+                            continue
+                        seen.add((r[7], r[6]))
+                    unique.append(r)
+                data = unique
+            self._conn.executemany(_INSERT_READING, data)
+            self._conn.executemany(_ROLLUP_UPSERT, _aggregate(data))
+            self._conn.commit()
+        return len(data)
+
+    def _known_keys(self, keys):
+        """(counter_epoch, reading_id) pairs of `keys` already stored"""
+        known = set()
+        by_epoch = {}
+        for epoch, reading_id in keys:
+            by_epoch.setdefault(epoch, []).append(reading_id)
+        for epoch, ids in by_epoch.items():
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                known.update((epoch, r[0]) for r in self._conn.execute(
+                    f"SELECT reading_id FROM readings WHERE counter_epoch = ? "
+                    f"AND reading_id IN ({', '.join('?' * len(chunk))})", [epoch] + chunk))
+        return known
+
+    def rederive(self, manager, profile):
+        """Recompute the rows of profile.device_id stored under its other calibration
+        versions (old versions looked up in `manager`); returns the rows changed.
+        Rows of unknown version are left as they are."""
+        changed = 0
+        with self._lock:
+            versions = [r[0] for r in self._conn.execute(
+                "SELECT DISTINCT calib_version FROM readings WHERE calib_device = ? AND calib_version != ?",
+                (profile.device_id, profile.version))]
+            for version in versions:
+                old = manager.get(profile.device_id, version)
+                rows = self._conn.execute(
+                    "SELECT rowid, ph, do_mgl, temp, pressure FROM readings "
+                    "WHERE calib_device = ? AND calib_version = ?", (profile.device_id, version)).fetchall()
+                values = rederive(np.array([r[1:] for r in rows], dtype=np.float64), old, profile)
+                values = np.where(np.isnan(values), None, values).tolist()   # NULL stays NULL
+                self._conn.executemany(
+                    "UPDATE readings SET ph = ?, do_mgl = ?, temp = ?, pressure = ?, calib_version = ? "
+                    "WHERE rowid = ?", [(*v, profile.version, r[0]) for v, r in zip(values, rows)])
+                changed += len(rows)
+            self._conn.commit()
+        if changed:
+            self.rebuild_rollups()
+        return changed
+
+    def rebuild_rollups(self):
+        """Recompute every rollup table from raw readings in bulk"""
+        with self._lock:
+            self._conn.execute("DELETE FROM rollups")
+            for resolution in ROLLUP_RESOLUTIONS:
+                self._conn.execute(_ROLLUP_REBUILD, (resolution, resolution))
+            self._conn.commit()
+
+    # ---------- reads ----------
+    def bounds(self):
+        """(first_ts, last_ts) in epoch seconds, or None when empty"""
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(ts), MAX(ts) FROM readings").fetchone()
+        if row is None or row[0] is None:
+            return None
+        return row[0], row[1]
+
+    def max_reading_id(self):
+        """Highest SD Reading ID stored in the current counter epoch, or None"""
+        with self._lock:
+            return self._epoch_max_id()
+
+    def missing_reading_ids(self, first, last):
+        """Reading IDs in [first, last] of the current counter epoch that are not stored"""
+        with self._lock:
+            known = {r[0] for r in self._conn.execute(
+                "SELECT reading_id FROM readings WHERE counter_epoch = ? AND reading_id BETWEEN ? AND ?",
+                (self.epoch, first, last))}
+        return [i for i in range(first, last + 1) if i not in known]
+
+    def iter_chunks(self, t0=None, t1=None, chunk_size=5000):
+        """Yield lists of (ts, ph, do, temp, pressure) rows in time order.
+
+        Uses keyset pagination and takes the lock per chunk only, so a long
+        export never blocks live inserts for more than one chunk.
+        """
+        lo = float("-inf") if t0 is None else t0
+        hi = float("inf") if t1 is None else t1
+        last_ts, last_id = lo, -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid, ts, ph, do_mgl, temp, pressure FROM readings "
+                    "WHERE ts <= ? AND (ts > ? OR (ts = ? AND rowid > ?)) "
+                    "ORDER BY ts, rowid LIMIT ?",
+                    (hi, last_ts, last_ts, last_id, chunk_size)).fetchall()
+            if not rows:
+                return
+            last_id, last_ts = rows[-1][0], rows[-1][1]
+            yield [r[1:] for r in rows]
+            if len(rows) < chunk_size:
+                return
+
+    def count(self, t0=None, t1=None):
+        sql, args = "SELECT COUNT(*) FROM readings", ()
+        if t0 is not None and t1 is not None:
+            sql, args = sql + " WHERE ts BETWEEN ? AND ?", (t0, t1)
+        with self._lock:
+            return self._conn.execute(sql, args).fetchone()[0]
+
+    def query_range(self, t0, t1, max_points=1000):
+        """Readings in [t0, t1] at no more than max_points per channel.
+
+        Returns {"ts": [...], "pH": [...], "DO": [...], ...}. When the range
+        holds more rows than max_points, rows are averaged into equal-width
+        time buckets inside SQLite so only the visible resolution is returned;
+        wide ranges are served from the rollup tables instead of raw rows.
+        """
+        max_points = max(1, int(max_points))
+        with self._lock:
+            n = self._conn.execute(
+                "SELECT COUNT(*) FROM readings WHERE ts BETWEEN ? AND ?", (t0, t1)).fetchone()[0]
+            if n <= max_points:
+                rows = self._conn.execute(
+                    "SELECT ts, ph, do_mgl, temp, pressure FROM readings "
+                    "WHERE ts BETWEEN ? AND ? ORDER BY ts", (t0, t1)).fetchall()
+            else:
+                width = max((t1 - t0) / max_points, 1e-6)
+                resolution = max((r for r in ROLLUP_RESOLUTIONS if r <= width), default=None)
+                if resolution is None:
+                    rows = self._conn.execute(
+                        "SELECT AVG(ts), AVG(ph), AVG(do_mgl), AVG(temp), AVG(pressure) FROM readings "
+                        "WHERE ts BETWEEN ? AND ? "
+                        "GROUP BY CAST((ts - ?) / ? AS INTEGER) ORDER BY 1",
+                        (t0, t1, t0, width)).fetchall()
+                else:
+                    # Re-bucket the coarsest rollup that still fits inside one pixel
+                    rows = self._conn.execute(
+                        "SELECT AVG(bucket) + ? / 2.0, "
+                        + ", ".join(f"SUM({c}_sum) / SUM({c}_n)" for c in _COLUMNS)
+                        + " FROM rollups WHERE resolution = ? AND bucket BETWEEN ? AND ? "
+                        "GROUP BY CAST((bucket - ?) / ? AS INTEGER) ORDER BY 1",
+                        (resolution, resolution, t0, t1, t0, width)).fetchall()
+        columns = list(zip(*rows)) if rows else [(), (), (), (), ()]
+        result = {"ts": list(columns[0]), "rows_in_range": n}
+        for name, col in zip(CHANNELS, columns[1:]):
+            result[name] = list(col)
+        return result
+
+    def query_rollup(self, resolution, t0=None, t1=None):
+        """min/max/mean/count per channel per bucket at one rollup resolution.
+
+        Returns {"ts": [...], "count": [...], "pH_min": [...], "pH_max": [...],
+        "pH_mean": [...], ...} with ts = bucket start in epoch seconds.
+        """
+        if resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"Unknown rollup resolution: {resolution}")
+        sql = f"SELECT bucket, n, {_STAT_COLUMNS} FROM rollups WHERE resolution = ?"
+        args = [resolution]
+        if t0 is not None:
+            sql += " AND bucket >= ?"
+            args.append(bucket_start(t0, resolution))
+        if t1 is not None:
+            sql += " AND bucket <= ?"
+            args.append(t1)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY bucket", args).fetchall()
+        result = {"ts": [r[0] for r in rows], "count": [r[1] for r in rows]}
+        for i, name in enumerate(CHANNELS):
+            base = 2 + 4 * i
+            result[f"{name}_min"] = [r[base + 1] for r in rows]
+            result[f"{name}_max"] = [r[base + 2] for r in rows]
+            result[f"{name}_mean"] = [r[base + 3] / r[base] if r[base] and r[base + 3] is not None else None
+                                      for r in rows]
+        return result
+
+    def daily_summary(self, t0=None, t1=None):
+        """Per-day min/max/mean/count, read from the 1-day rollup"""
+        return self.query_rollup(DAY, t0, t1)
+
+
+def _calib_key(profile):
+    """(calib_device, calib_version) columns of a row calibrated with `profile`"""
+    return (None, None) if profile is None else (profile.device_id, profile.version)
+
+
+def _aggregate(rows):
+    """Fold raw reading rows into one partial-aggregate upsert row per bucket
+    (per channel: non-NULL count, min, max, sum)"""
+    buckets = {}
+    for row in rows:
+        ts, values = row[0], row[1:5]
+        for resolution in ROLLUP_RESOLUTIONS:
+            key = (resolution, bucket_start(ts, resolution))
+            agg = buckets.get(key)
+            if agg is None:
+                agg = buckets[key] = [0] + [0, None, None, None] * len(values)
+            agg[0] += 1
+            for i, value in enumerate(values):
+                j = 1 + 4 * i
+                if value is None:
+                    continue
+                agg[j] += 1
+                agg[j + 1] = value if agg[j + 1] is None else min(agg[j + 1], value)
+                agg[j + 2] = value if agg[j + 2] is None else max(agg[j + 2], value)
+                agg[j + 3] = value if agg[j + 3] is None else agg[j + 3] + value
+    return [key + tuple(agg) for key, agg in buckets.items()]
+
+
+# -------------------- Lazy Range Loader --------------------
+class LazyRangeLoader:
+    """Runs store range queries on a background thread.
+
+    Only the newest pending request is executed, so a burst of pan/zoom
+    events costs one query. Results are handed to `schedule` (usually
+    `lambda fn: root.after(0, fn)`) so widgets are touched on the Tk thread.
+    """
+
+    def __init__(self, store, on_result, schedule):
+        self.store = store
+        self.on_result = on_result
+        self.schedule = schedule
+        self._cond = threading.Condition()
+        self._pending = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def request(self, t0, t1, max_points):
+        with self._cond:
+            self._pending = (t0, t1, max_points)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                t0, t1, max_points = self._pending
+                self._pending = None
+            try:
+                result = self.store.query_range(t0, t1, max_points)
+            except Exception as e:
+                print(f"❌ Graph range query failed: {e}")
+                continue
+            with self._cond:
+                # A newer request supersedes this result
+                if self._pending is not None or self._closed:
+                    continue
+            self.schedule(lambda r=result, w=(t0, t1): self.on_result(w, r))
+
+
+# -------------------- Main --------------------
+def _check():
+    """Counter resets must never drop readings; real duplicates must collapse;
+    NULL sensor values must not poison rollups"""
+    store = SensorStore(":memory:")
+    for i, rid in enumerate((1, 2, 3)):
+        assert store.insert_reading(1000 + i, 7.0, 8.0, 18.0, 1013.0, reading_id=rid)
+    assert not store.insert_reading(1003, 7.0, 8.0, 18.0, 1013.0, reading_id=3), "duplicate stored"
+    # counter.txt lost: the logger starts again at 1
+    assert store.insert_reading(9000, 7.1, 8.1, 18.1, 1013.1, reading_id=1), "reading after reset dropped"
+    assert store.epoch == 1 and store.max_reading_id() == 1
+    assert not store.insert_reading(9000, 7.1, 8.1, 18.1, 1013.1, reading_id=1), "duplicate after reset stored"
+    # backfill of the new run: #1 already there, #2 new
+    assert store.insert_many([(9100, 7.2, 8.2, 18.2, 1013.2, 2), (9000, 7.1, 8.1, 18.1, 1013.1, 1)]) == 1
+    assert store.missing_reading_ids(1, 3) == [3]
+    assert store.count() == 5
+    store.close()
+
+    # A late or re-sent older reading is not a reset
+    store = SensorStore(":memory:")
+    for rid in (200, 201, 205):
+        assert store.insert_reading(rid, 7.0, 8.0, 18.0, 1013.0, reading_id=rid)
+    assert store.insert_reading(9000, 7.0, 8.0, 18.0, 1013.0, reading_id=203), "late reading dropped"
+    assert not store.insert_reading(9001, 7.0, 8.0, 18.0, 1013.0, reading_id=201), "re-sent reading stored"
+    assert store.epoch == 0 and store.count() == 4
+    store.close()
+
+    # A Datalog spanning a reset, loaded in file order in one go or in chunks
+    log = [(2000 + i, 7.0, 8.0, 18.0, 1013.0, rid) for i, rid in enumerate((1, 2, 3, 1, 2))]
+    for chunks in ([log], [log[:2], log[2:4], log[4:]]):
+        store = SensorStore(":memory:")
+        assert sum(store.insert_many(c, log_order=True) for c in chunks) == 5, "records after a reset dropped"
+        assert store.count() == 5 and store.epoch == 1
+        store.close()
+
+    # A reading without a pressure value must not null the bucket or skew its mean
+    store = SensorStore(":memory:")
+    store.insert_reading(3600 * 24, 7.0, 8.0, 18.0, None)
+    store.insert_reading(3600 * 24 + 1, 7.2, 8.0, 18.0, 1000.0)
+    store.insert_many([(3600 * 24 + 2, 7.4, 8.0, 18.0, 1010.0)])
+    for rollup in (store.query_rollup(MINUTE), store.query_rollup(DAY)):
+        assert rollup["count"] == [3] and rollup["pH_mean"] == [7.2]
+        assert (rollup["Pressure_min"], rollup["Pressure_max"], rollup["Pressure_mean"]) == ([1000.0], [1010.0], [1005.0])
+    incremental = store.query_rollup(HOUR)
+    store.rebuild_rollups()
+    assert store.query_rollup(HOUR) == incremental, "incremental rollups differ from a rebuild"
+    store.close()
+
+    # Rows remember their calibration version, so a later profile can re-derive them
+    import os
+    import tempfile
+    from calibration import CalibrationManager
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = CalibrationManager(os.path.join(tmp, "calibration_profiles.json"))
+        v0 = manager.active("dev")
+        store = SensorStore(":memory:")
+        store.insert_reading(4000, 7.0, 8.0, 18.0, None, reading_id=1, profile=v0)
+        v1 = manager.add_profile("dev", offset=(0.5, 0.0, 0.0, 0.0))
+        store.insert_many([(4001, 7.5, 8.0, 18.0, 1013.0, 2)], profile=v1)
+        store.insert_reading(4002, 7.0, 8.0, 18.0, 1013.0)          # unknown version: untouched
+        assert store.rederive(manager, v1) == 1
+        data = store.query_range(0, 5000, 10)
+        assert data["pH"] == [7.5, 7.5, 7.0] and data["Pressure"][0] is None, "rederive by version failed"
+        store.close()
+    print("✅ sensor_store: counter reset / duplicate / NULL rollup / rederive checks passed")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reading store checks")
+    parser.add_argument("--check", action="store_true", help="run the counter reset / duplicate / rollup / rederive self-check")
+    parser.add_argument("--store", default=STORE_FILE)
+    args = parser.parse_args()
+    if args.check:
+        _check()
+    else:
+        store = SensorStore(args.store)
+        span = store.bounds()
+        print(f"📂 {args.store}: {store.count()} readings, counter epoch {store.epoch}, "
+              f"last Reading ID {store.max_reading_id()}"
+              + (f", {from_epoch(span[0]):%Y-%m-%d %H:%M} - {from_epoch(span[1]):%Y-%m-%d %H:%M}" if span else ""))
+        store.close()
@@ -0,0 +1,110 @@
+###############################################################
+#   SEQUENCE TRACKER
+#   Gap / duplicate detection for live $Params readings:
+#   16-bit frame sequence numbers (loss rate) and SD Reading IDs
+#   of SAVED readings (ranges to backfill from the SD card).
+###############################################################
+
+from collections import deque
+
+import numpy as np
+
+# -------------------- CONFIG --------------------
+SEQ_MODULUS = 1 << 16
+DUPLICATE_WINDOW = 1024      # recent sequence numbers remembered for duplicate checks
+MAX_BACKFILL_SPAN = 500      # larger gaps are requested in pieces
+
+
+class SequenceTracker:
+    """Counts missing and duplicated frames from a wrapping sequence number"""
+
+    def __init__(self, modulus=SEQ_MODULUS, window=DUPLICATE_WINDOW):
+        self.modulus = modulus
+        self.expected = None
+        self.received = 0
+        self.missing = 0
+        self.duplicates = 0
+        self.resets = 0
+        self._recent = deque(maxlen=window)
+        self._recent_set = set()
+
+    def _remember(self, seq):
+        if len(self._recent) == self._recent.maxlen:
+            self._recent_set.discard(self._recent[0])
+        self._recent.append(seq)
+        self._recent_set.add(seq)
+
+    def observe(self, seq):
+        """Returns ("first" | "ok" | "gap" | "duplicate" | "reset", frames missed)"""
+        seq %= self.modulus
+        if self.expected is None:
+            kind, missed = "first", 0
+        else:
+            delta = (seq - self.expected) % self.modulus
+            if delta == 0:
+                kind, missed = "ok", 0
+            elif delta < self.modulus // 2:
+                kind, missed = "gap", delta
+            elif seq in self._recent_set:
+                self.duplicates += 1
+                return "duplicate", 0
+            else:
+                # Far behind and never seen: the device restarted its counter
+                self.resets += 1
+                kind, missed = "reset", 0
+        self.received += 1
+        self.missing += missed
+        self.expected = (seq + 1) % self.modulus
+        self._remember(seq)
+        return kind, missed
+
+    def observe_many(self, seqs):
+        """Vectorized observe() for a batch of frames; returns (frames missed,
+        keep mask - False for each duplicate frame)"""
+        seqs = np.asarray(seqs, dtype=np.int64) % self.modulus
+        keep = np.ones(len(seqs), dtype=bool)
+        if len(seqs) == 0:
+            return 0, keep
+        steps = np.diff(seqs) % self.modulus
+        if self.expected is None or int(seqs[0]) != self.expected or (steps != 1).any():
+            # Gap, duplicate or restart at or inside the batch: take the exact path
+            missed = 0
+            for i, s in enumerate(seqs.tolist()):
+                kind, n = self.observe(s)
+                keep[i] = kind != "duplicate"
+                missed += n
+            return missed, keep
+        # Continues exactly where the last batch ended: all new, none missed
+        self.received += len(seqs)
+        self.expected = (int(seqs[-1]) + 1) % self.modulus
+        for s in seqs[-self._recent.maxlen:].tolist():
+            self._remember(s)
+        return 0, keep
+
+    @property
+    def loss_rate(self):
+        total = self.received + self.missing
+        return self.missing / total if total else 0.0
+
+
+class SavedReadingTracker:
+    """Finds Reading IDs of SAVED readings that never reached the host"""
+
+    def __init__(self, last_id=None):
+        self.last_id = last_id       # highest Reading ID known to be stored
+        self.missing = 0
+
+    def observe(self, reading_id):
+        """Record a SAVED reading; returns [(first, last), ...] ranges to backfill"""
+        gaps = []
+        if self.last_id is not None and reading_id > self.last_id + 1:
+            gaps = split_range(self.last_id + 1, reading_id - 1)
+            self.missing += reading_id - 1 - self.last_id
+        if self.last_id is None or reading_id != self.last_id:
+            # (lower than before means counter.txt was reset on the SD card)
+            self.last_id = reading_id
+        return gaps
+
+
+def split_range(first, last, span=MAX_BACKFILL_SPAN):
+    return [(lo, min(lo + span - 1, last)) for lo in range(first, last + 1, span)]
@@ -0,0 +1,230 @@
+###############################################################
+#   SERIAL LINK
+#   Connection supervisor for the Teensy serial port: notices
+#   when the port dies (USB glitch, host wake from sleep), finds
+#   the re-enumerated device again with exponential backoff and
+#   carries on reading, keeping reconnect / downtime statistics.
+###############################################################
+
+import threading
+import time
+
+import serial
+
+from sensor_logging import get_logger
+
+# -------------------- CONFIG --------------------
+INITIAL_BACKOFF = 0.5         # seconds before the first reconnect attempt
+MAX_BACKOFF = 30.0            # cap for the doubling retry delay
+MAX_PENDING_WRITES = 64       # commands kept while the port is down
+
+serial_log = get_logger("serial")
+
+
+class SerialLink:
+    """Serial port wrapper that reconnects itself.
+
+    The reader thread calls `read_available()` in its loop. When the port
+    throws, the handle is dropped and later calls try to reopen it - first
+    on the same path, then on whatever `find_port()` returns, since the
+    Teensy often comes back as a different ttyACM/COM device. Attempts back
+    off exponentially up to MAX_BACKOFF. Commands written while the port is
+    down are queued and sent once it is back, unless written with
+    queue=False (then the write raises and the caller re-issues it). Nothing already received is
+    thrown away: the input buffer is not reset on reconnect.
+
+    `write`, `flush`, `close` and `is_open` mirror serial.Serial, so the
+    GUIs can keep using their `ser` global. `is_open` stays True while
+    reconnecting; `connected` says whether a port is actually open.
+    """
+
+    def __init__(self, port, baud, timeout=1.0, find_port=None,
+                 on_disconnect=None, on_reconnect=None,
+                 initial_backoff=INITIAL_BACKOFF, max_backoff=MAX_BACKOFF, opener=serial.Serial,
+                 recorder=None):
+        self.port = port
+        self.baud = baud
+        self.timeout = timeout
+        self.find_port = find_port
+        self.on_disconnect = on_disconnect    # called with the exception (reader thread)
+        self.on_reconnect = on_reconnect      # called with (port, seconds down) (reader thread)
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.opener = opener
+        self.recorder = recorder              # session_replay.SessionRecorder (raw traffic)
+
+        self.reconnects = 0
+        self.failed_attempts = 0
+        self.downtime = 0.0                   # total seconds without a port
+        self.down_since = None
+
+        self._ser = None
+        self._closed = False
+        self._backoff = initial_backoff
+        self._retry_at = 0.0
+        self._pending = []
+        self._lock = threading.Lock()
+
+    # -------------------- Lifecycle --------------------
+    def open(self):
+        """First connection; raises like serial.Serial so connect dialogs can report it"""
+        self._ser = self.opener(self.port, self.baud, timeout=self.timeout)
+        self._closed = False
+        return self
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._pending.clear()
+            if self.down_since is not None:
+                self.downtime += time.monotonic() - self.down_since
+                self.down_since = None
+            self._close_handle()
+
+    def _close_handle(self):
+        if self._ser is not None:
+            try:
+                self._ser.close()
+            except Exception:
+                pass
+        self._ser = None
+
+    @property
+    def is_open(self):
+        return not self._closed
+
+    @property
+    def connected(self):
+        return self._ser is not None and not self._closed
+
+    @property
+    def state(self):
+        if self._closed:
+            return "closed"
+        return "connected" if self._ser is not None else "reconnecting"
+
+    def current_downtime(self):
+        return time.monotonic() - self.down_since if self.down_since is not None else 0.0
+
+    def total_downtime(self):
+        return self.downtime + self.current_downtime()
+
+    def reset_input_buffer(self):
+        if self._ser is not None:
+            self._ser.reset_input_buffer()
+
+    def reset_output_buffer(self):
+        if self._ser is not None:
+            self._ser.reset_output_buffer()
+
+    # -------------------- Failure / Recovery --------------------
+    def _mark_down(self, error):
+        """Drop the dead handle; the next read_available() starts retrying"""
+        with self._lock:
+            if self._ser is None or self._closed:
+                return
+            self._close_handle()
+            self.down_since = time.monotonic()
+            self._backoff = self.initial_backoff
+            self._retry_at = self.down_since + self._backoff
+        serial_log.warning("🔌 Serial link lost (%s); reconnecting...", error)
+        if self.on_disconnect:
+            self.on_disconnect(error)
+
+    def _candidate_ports(self):
+        ports = [self.port]
+        if self.find_port:
+            try:
+                found = self.find_port()
+            except Exception as e:
+                serial_log.debug("Port scan failed: %s", e)
+                found = None
+            if found and found not in ports:
+                ports.append(found)
+        return ports
+
+    def _try_reconnect(self):
+        now = time.monotonic()
+        if now < self._retry_at:
+            return False
+        for port in self._candidate_ports():
+            try:
+                handle = self.opener(port, self.baud, timeout=self.timeout)
+            except (serial.SerialException, OSError, ValueError) as e:
+                serial_log.debug("Reconnect to %s failed: %s", port, e)
+                continue
+            with self._lock:
+                if self._closed:
+                    handle.close()
+                    return False
+                self._ser = handle
+                self.port = port
+                down = time.monotonic() - self.down_since
+                self.downtime += down
+                self.down_since = None
+                self.reconnects += 1
+                pending, self._pending = self._pending, []
+            serial_log.info("✅ Serial link back on %s after %.1f s", port, down)
+            for data in pending:
+                self.write(data)
+            if self.on_reconnect:
+                self.on_reconnect(port, down)
+            return True
+
+        self.failed_attempts += 1
+        self._backoff = min(self._backoff * 2, self.max_backoff)
+        self._retry_at = time.monotonic() + self._backoff
+        return False
+
+    # -------------------- I/O --------------------
+    def read_available(self):
+        """Everything the port has buffered (b"" when idle or down)"""
+        if self._closed:
+            return b""
+        ser = self._ser
+        if ser is None:
+            self._try_reconnect()
+            return b""
+        try:
+            waiting = ser.in_waiting
+            data = ser.read(waiting) if waiting > 0 else b""
+        except (serial.SerialException, OSError) as e:
+            self._mark_down(e)
+            raise
+        if data and self.recorder:
+            self.recorder.record(data)
+        return data
+
+    def write(self, data, queue=True):
+        with self._lock:
+            if self._closed:
+                raise serial.SerialException("Port is closed")
+            ser = self._ser
+            if ser is None:
+                if not queue:
+                    raise serial.SerialException("Port is reconnecting")
+                if len(self._pending) < MAX_PENDING_WRITES:
+                    self._pending.append(bytes(data))
+                return len(data)
+        if self.recorder:
+            self.recorder.record(bytes(data), direction=1)    # session_replay.TX
+        try:
+            return ser.write(data)
+        except (serial.SerialException, OSError) as e:
+            if queue:
+                with self._lock:
+                    if len(self._pending) < MAX_PENDING_WRITES:
+                        self._pending.append(bytes(data))
+            self._mark_down(e)
+            if not queue:
+                raise
+            return len(data)
+
+    def flush(self):
+        ser = self._ser
+        if ser is None:
+            return
+        try:
+            ser.flush()
+        except Exception as e:    # termios.error on POSIX, SerialException elsewhere
+            self._mark_down(e)
@@ -0,0 +1,344 @@
+###############################################################
+#   SESSION RECORD / REPLAY
+#   Records raw serial sessions (every chunk read from and
+#   written to the Teensy, with monotonic timestamps) and feeds
+#   them back through the normal ingestion pipeline at 1x, 100x
+#   or maximum speed - for debugging the dashboards without
+#   waiting 30 minutes per reading, as a regression fixture and
+#   as a throughput benchmark.
+#
+#   python session_replay.py record out.rec [--port P | --simulate] [--seconds 60]
+#   python session_replay.py bench session.rec
+#   python session_replay.py summary session.rec [--expect expected.json]
+###############################################################
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from calibration import default_profile, reprocess
+from sensor_logging import get_logger
+from telemetry import StreamDecoder, raw_fields, FLAG_SAVED
+
+# -------------------- File Format --------------------
+# MAGIC, one JSON metadata line, then records:
+#   offset f8 (seconds since start, monotonic) | direction u1 | length u4 | bytes
+MAGIC = b"SENSORREC1\n"
+RECORD = struct.Struct("<dBI")
+RX = 0      # device -> host
+TX = 1      # host -> device
+
+SPEEDS = {"1x": 1.0, "100x": 100.0, "max": 0.0}
+MAX_CHUNK = 64 * 1024          # bytes handed out per read at max speed
+
+serial_log = get_logger("serial")
+
+
+class SessionRecorder:
+    """Appends raw serial traffic to a session file (thread safe)"""
+
+    def __init__(self, path, **meta):
+        self.path = path
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self._file = open(path, "wb")
+        meta.setdefault("started", datetime.now().isoformat(timespec="seconds"))
+        self._file.write(MAGIC + json.dumps(meta).encode("utf-8") + b"\n")
+        self.chunks = 0
+        self.bytes = 0
+
+    def record(self, data, direction=RX):
+        if not data:
+            return
+        offset = time.monotonic() - self._start
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(RECORD.pack(offset, direction, len(data)))
+            self._file.write(data)
+            self.chunks += 1
+            self.bytes += len(data)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_session(path):
+    """(metadata dict, list of (offset, direction, bytes))"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a recorded session")
+        meta = json.loads(f.readline())
+        data = f.read()
+    records = []
+    pos = 0
+    while pos + RECORD.size <= len(data):
+        offset, direction, length = RECORD.unpack_from(data, pos)
+        pos += RECORD.size
+        records.append((offset, direction, data[pos:pos + length]))
+        pos += length
+    return meta, records
+
+
+# -------------------- Replay --------------------
+class ReplayLink:
+    """Stands in for SerialLink: plays a recorded session's RX chunks back.
+
+    speed 1.0 = real time, 100.0 = 100x, 0 = as fast as the reader loop takes
+    them. Writes (commands from the GUI) are logged and dropped - there is no
+    firmware to answer them; the recording already contains its replies.
+    """
+
+    replay = True     # pipelines skip requests that need live firmware (SD backfill)
+
+    def __init__(self, path, speed=1.0, loop=False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.meta, records = read_session(path)
+        self._rx = [(t, d) for t, direction, d in records if direction == RX]
+        self.port = f"replay:{os.path.basename(path)}"
+        self.reconnects = 0
+        self.finished = False
+        self._pos = 0
+        self._closed = False
+        self._t0 = None
+
+    @property
+    def duration(self):
+        return self._rx[-1][0] if self._rx else 0.0
+
+    # serial.Serial / SerialLink surface used by the GUIs
+    @property
+    def is_open(self):
+        return not self._closed
+
+    @property
+    def connected(self):
+        return not self._closed
+
+    @property
+    def state(self):
+        return "closed" if self._closed else ("finished" if self.finished else "replaying")
+
+    def total_downtime(self):
+        return 0.0
+
+    def open(self):
+        return self
+
+    def close(self):
+        self._closed = True
+
+    def reset_input_buffer(self):
+        pass
+
+    def reset_output_buffer(self):
+        pass
+
+    def write(self, data, queue=True):
+        serial_log.info("🎞️ Replay ignores command: %s", bytes(data).strip())
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def read_available(self):
+        if self._closed or self.finished:
+            return b""
+        if self._t0 is None:
+            self._t0 = time.monotonic()
+        chunks = []
+        size = 0
+        if self.speed:
+            now = (time.monotonic() - self._t0) * self.speed
+            while self._pos < len(self._rx) and self._rx[self._pos][0] <= now:
+                chunks.append(self._rx[self._pos][1])
+                self._pos += 1
+        else:
+            while self._pos < len(self._rx) and size < MAX_CHUNK:
+                chunks.append(self._rx[self._pos][1])
+                size += len(chunks[-1])
+                self._pos += 1
+        if self._pos >= len(self._rx):
+            if self.loop:
+                self._pos, self._t0 = 0, None
+            else:
+                self.finished = True
+        return b"".join(chunks)
+
+
+# -------------------- Offline Pipeline --------------------
+def run_pipeline(path, profile=None, store=None):
+    """Decode + calibrate (+ store) a whole session at max speed.
+
+    Returns (summary dict, per-stage seconds). The summary is stable for a
+    given recording and calibration, which makes it a regression fixture.
+    """
+    profile = profile or default_profile()
+    _, records = read_session(path)
+    decoder = StreamDecoder()
+    timings = {"decode": 0.0, "calibrate": 0.0, "store": 0.0}
+    lines = 0
+    values = []
+    saved = []
+    digest = hashlib.sha256()
+
+    for _, direction, data in records:
+        if direction != RX:
+            continue
+        start = time.perf_counter()
+        items = decoder.feed(data)
+        timings["decode"] += time.perf_counter() - start
+        for item in items:
+            start = time.perf_counter()
+            if isinstance(item, str):
+                lines += 1
+                if "$Params" not in item:
+                    timings["calibrate"] += time.perf_counter() - start
+                    continue
+                parts = item.split(",")
+                if len(parts) < 5:
+                    continue
+                batch = np.array([profile.apply(parts[1:5])])
+                is_saved = np.array([len(parts) >= 6 and "SAVED" in parts[5].upper()])
+            else:
+                batch = reprocess(raw_fields(item), profile)
+                is_saved = (item["flags"] & FLAG_SAVED) != 0
+            timings["calibrate"] += time.perf_counter() - start
+            values.append(batch)
+            saved.append(is_saved)
+
+    values = np.vstack(values) if values else np.empty((0, 4))
+    saved = np.concatenate(saved) if saved else np.empty(0, dtype=bool)
+    digest.update(np.round(values, 4).tobytes())
+    digest.update(saved.tobytes())
+
+    if store is not None and saved.any():
+        start = time.perf_counter()
+        now = time.time()
+        store.insert_many([(now + i, *row) for i, row in enumerate(values[saved].tolist())], profile=profile)
+        timings["store"] = time.perf_counter() - start
+
+    summary = {
+        "lines": lines,
+        "readings": int(len(values)),
+        "saved": int(saved.sum()),
+        "frames": decoder.frames,
+        "crc_errors": decoder.crc_errors,
+        "digest": digest.hexdigest()[:16],
+    }
+    return summary, timings
+
+
+def bench_plot(path, n_points=5000):
+    """Seconds to build and render one sensor figure from the session (Agg)"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from figure_export import build_sensor_figure
+    from sensor_store import SensorStore, CHANNELS, from_epoch
+    store = SensorStore(":memory:")
+    run_pipeline(path, store=store)
+    data = store.query_range(0, time.time() + 10 * 86400, n_points)
+    start = time.perf_counter()
+    fig = build_sensor_figure([from_epoch(t) for t in data["ts"]], *(data[c] for c in CHANNELS))
+    FigureCanvasAgg(fig).draw()
+    return time.perf_counter() - start, len(data["ts"])
+
+
+# -------------------- Recording Helper --------------------
+def record_port(path, port, baud, seconds, binary=False):
+    """Record a live (or simulated) port for `seconds`"""
+    from serial_link import SerialLink
+    from telemetry import CMD_BINARY
+    recorder = SessionRecorder(path, port=port, baud=baud)
+    link = SerialLink(port, baud, recorder=recorder).open()
+    try:
+        if binary:
+            link.write(CMD_BINARY)
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if not link.read_available():
+                time.sleep(0.02)
+    finally:
+        link.close()
+        recorder.close()
+    return recorder
+
+
+# -------------------- Main --------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record / replay raw Teensy serial sessions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record")
+    rec.add_argument("path")
+    rec.add_argument("--port")
+    rec.add_argument("--baud", type=int, default=115200)
+    rec.add_argument("--seconds", type=float, default=60)
+    rec.add_argument("--binary", action="store_true", help="request binary telemetry")
+    rec.add_argument("--simulate", action="store_true", help="record the pty simulator")
+    rec.add_argument("--interval", type=float, default=0.05, help="simulator heartbeat interval")
+    bench = sub.add_parser("bench")
+    bench.add_argument("path")
+    bench.add_argument("--repeat", type=int, default=3)
+    summ = sub.add_parser("summary")
+    summ.add_argument("path")
+    summ.add_argument("--expect", help="JSON summary the session must reproduce")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        sim = None
+        port = args.port
+        if args.simulate:
+            from teensy_simulator import TeensySimulator
+            sim = TeensySimulator(interval=args.interval, save_every=5)
+            port = sim.start()
+        if not port:
+            parser.error("--port or --simulate is required")
+        try:
+            recorder = record_port(args.path, port, args.baud, args.seconds, args.binary)
+        finally:
+            if sim:
+                sim.stop()
+        print(f"🎞️ Recorded {recorder.chunks} chunks / {recorder.bytes} bytes to {args.path}")
+
+    elif args.command == "bench":
+        from sensor_store import SensorStore
+        best = None
+        for _ in range(args.repeat):
+            store = SensorStore(":memory:")
+            summary, timings = run_pipeline(args.path, store=store)
+            store.close()
+            if best is None or sum(timings.values()) < sum(best.values()):
+                best = timings
+        n = max(summary["readings"], 1)
+        print(f"\n📊 {args.path}: {summary['readings']} readings ({summary['saved']} saved), "
+              f"{summary['lines']} text lines, {summary['frames']} binary frames")
+        for stage, seconds in best.items():
+            rate = n / seconds if seconds else float("inf")
+            print(f"  {stage:<10}: {seconds * 1000:9.2f} ms  {rate:14,.0f} readings/s")
+        try:
+            seconds, points = bench_plot(args.path)
+            print(f"  {'plot':<10}: {seconds * 1000:9.2f} ms  ({points} points, Agg render)")
+        except ImportError as e:
+            print(f"  plot      : skipped ({e})")
+        print()
+
+    elif args.command == "summary":
+        summary, _ = run_pipeline(args.path)
+        print(json.dumps(summary, indent=2))
+        if args.expect:
+            with open(args.expect, "r", encoding="utf-8") as f:
+                expected = json.load(f)
+            if expected != summary:
+                raise SystemExit(f"❌ Replay differs from {args.expect}")
+            print(f"✅ Replay matches {args.expect}")
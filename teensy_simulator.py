@@ -0,0 +1,364 @@
+###############################################################
+#   TEENSY SIMULATOR
+#   Pseudo-terminal stand-in for SD_sketch_jan14a.ino (and
+#   25_USB_CHECK.ino with --dialect usb_check) so the GUIs,
+#   benchmarks and tools can run without hardware.
+#
+#   python teensy_simulator.py [--interval 2] [--save-every 5] [--drop-rate 0.05]
+#   python teensy_simulator.py --dialect usb_check
+#   then connect a GUI (manual port entry) to the printed path.
+###############################################################
+
+import argparse
+import os
+import random
+import threading
+import time
+import tty
+from datetime import datetime, timedelta
+
+from bursts import encode_burst
+from telemetry import encode_frame
+
+# -------------------- CONFIG --------------------
+HEARTBEAT_INTERVAL = 2.0      # seconds between LIVE $Params lines
+SAVE_EVERY = 5                # every Nth heartbeat is a SAVED reading
+
+
+def scaled_reading(rng):
+    """Random raw $Params fields: pH*100, DO*10, Temp*50, Pressure*1000"""
+    return (int(rng.uniform(7.0, 8.4) * 100), int(rng.uniform(6.0, 9.5) * 10),
+            int(rng.uniform(8.0, 26.0) * 50), int(rng.uniform(1005.0, 1090.0) * 1000))
+
+
+def params_line(raw, saved, seq=0, reading_id=0):
+    return (f"$Params,{raw[0]},{raw[1]},{raw[2]},{raw[3]},{'SAVED' if saved else 'LIVE'},"
+            f"{seq},{reading_id}\n")
+
+
+class TeensySimulator:
+    """Speaks the SD sketch protocol on the slave side of a pty"""
+
+    def __init__(self, interval=HEARTBEAT_INTERVAL, save_every=SAVE_EVERY, seed=None, drop_rate=0.0):
+        self.interval = interval
+        self.save_every = save_every
+        self.drop_rate = drop_rate    # fraction of readings lost "on the wire"
+        self.rng = random.Random(seed)
+        self.binary = False
+        self.seq = 0
+        self.reading_counter = 0
+        self.datalog = ["=" * 80, "                    TEENSY 4.1 WATER QUALITY DATA LOG", "=" * 80, ""]
+        self.port = None
+        self._master = None
+        self._slave = None
+        self._write_lock = threading.Lock()
+        self._busy = threading.Lock()    # firmware is single threaded: no beats mid-download
+        self._stop = threading.Event()
+        self._threads = []
+
+    # -------------------- Lifecycle --------------------
+    def start(self, heartbeat=True):
+        """Open the pty and start serving; returns the device path"""
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._threads = [threading.Thread(target=self._command_loop, daemon=True)]
+        if heartbeat:
+            self._threads.append(threading.Thread(target=self._heartbeat_loop, daemon=True))
+        for t in self._threads:
+            t.start()
+        return self.port
+
+    def stop(self):
+        self._stop.set()
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except (OSError, TypeError):
+                pass
+
+    # -------------------- Output --------------------
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        with self._write_lock:
+            view = memoryview(data)
+            while view and not self._stop.is_set():
+                try:
+                    written = os.write(self._master, view)
+                except OSError:
+                    return
+                view = view[written:]
+
+    def send_reading(self, raw, saved):
+        if self.rng.random() >= self.drop_rate:
+            if self.binary:
+                self.write(encode_frame(self.seq, time.time(), raw, saved, self.reading_counter))
+            else:
+                self.write(params_line(raw, saved, self.seq, self.reading_counter))
+        self.seq = (self.seq + 1) & 0xFFFF
+
+    def perform_reading(self):
+        """READING # block, SAVED $Params and a Datalog.txt record"""
+        self.reading_counter += 1
+        now = datetime.now()
+        raw = scaled_reading(self.rng)
+        self.write("\n════════════════════════════════════════\n"
+                   f"READING #{self.reading_counter}\n"
+                   f"Time: {now.strftime('%d/%m/%Y %H:%M:%S')}\n"
+                   "════════════════════════════════════════\n\n")
+        self.send_reading(raw, saved=True)
+        self.datalog += [
+            "-" * 80,
+            f"Reading ID: {self.reading_counter}",
+            f"Date & Time: {now.strftime('%d/%m/%Y at %H:%M:%S')}",
+            "Runtime: 0 days, 0 hours",
+            "",
+            f"pH Value: {raw[0] / 100:.2f}",
+            f"Temperature: {raw[2] / 50:.2f} °C [Sensor: OK]",
+            f"Pressure: {raw[3] / 1000:.2f} mbar [Sensor: OK]",
+            f"DO Concentration: {raw[1] * 100} ug/L ({raw[1] / 10:.2f} mg/L)",
+            "Reading Duration: 850 ms",
+            "",
+        ]
+        self.write("✓ Data saved to Datalog.txt\n✓ Data sent to GUI\n")
+
+    def burst(self, count, binary=None, saved_every=0):
+        """Write `count` readings back to back (benchmarks)"""
+        binary = self.binary if binary is None else binary
+        now = time.time()
+        chunks = []
+        for i in range(count):
+            raw = scaled_reading(self.rng)
+            saved = bool(saved_every) and i % saved_every == 0
+            chunks.append(encode_frame(self.seq, now, raw, saved, self.reading_counter) if binary
+                          else params_line(raw, saved, self.seq, self.reading_counter).encode())
+            self.seq = (self.seq + 1) & 0xFFFF
+            if len(chunks) == 512:
+                self.write(b"".join(chunks))
+                chunks = []
+        if chunks:
+            self.write(b"".join(chunks))
+
+    # -------------------- Commands --------------------
+    def handle_command(self, command):
+        with self._busy:
+            self._handle_command(command)
+
+    def _handle_command(self, command):
+        if command == "TELEMETRY BINARY":
+            self.binary = True
+            self.write("TELEMETRY_MODE:BINARY\n")
+        elif command == "TELEMETRY TEXT":
+            self.binary = False
+            self.write("TELEMETRY_MODE:TEXT\n")
+        elif command == "DOWNLOAD_SD":
+            self.download_sd()
+        elif command.startswith("DOWNLOAD_SD_RANGE"):
+            try:
+                first, last = (int(v) for v in command.split()[1:3])
+            except ValueError:
+                self.write("SD_DOWNLOAD_ERROR: usage DOWNLOAD_SD_RANGE <first> <last>\n")
+                return
+            self.download_sd_range(first, last)
+
+    def download_sd(self):
+        body = "\n".join(self.datalog) + "\n"
+        self.write("SD_DOWNLOAD_PROGRESS: Starting SD card download...\n"
+                   f"SD_DOWNLOAD_PROGRESS: File size = {len(body.encode())} bytes\n")
+        lines = self.datalog
+        for i, line in enumerate(lines, 1):
+            self.write(line + "\n")
+            if i % 100 == 0:
+                self.write(f"SD_DOWNLOAD_PROGRESS: Sent {i} lines ({i * 100 // len(lines)}%)\n")
+        self.write(f"SD_DOWNLOAD_PROGRESS: Transfer complete - {len(lines)} lines sent\n"
+                   "SD_DOWNLOAD_END\n")
+
+    def download_sd_range(self, first, last):
+        self.write(f"SD_DOWNLOAD_PROGRESS: Range {first}-{last}\n")
+        sent = 0
+        in_range = False
+        for line in self.datalog:
+            if line.startswith("--------"):
+                in_range = False
+                continue
+            if line.startswith("Reading ID: "):
+                in_range = first <= int(line[12:]) <= last
+                if in_range:
+                    self.write("-" * 80 + "\n")
+                    sent += 1
+            if in_range:
+                self.write(line + "\n")
+        self.write(f"SD_DOWNLOAD_PROGRESS: Transfer complete - {sent} records sent\n"
+                   "SD_DOWNLOAD_END\n")
+
+    def _command_loop(self):
+        pending = b""
+        while not self._stop.is_set():
+            try:
+                data = os.read(self._master, 1024)
+            except OSError:
+                return
+            if not data:
+                continue
+            pending += data
+            while b"\n" in pending:
+                raw, pending = pending.split(b"\n", 1)
+                self.handle_command(raw.decode("utf-8", errors="ignore").strip())
+
+    def _heartbeat_loop(self):
+        beats = 0
+        while not self._stop.wait(self.interval):
+            beats += 1
+            with self._busy:
+                if self.save_every and beats % self.save_every == 0:
+                    self.perform_reading()
+                else:
+                    self.send_reading(scaled_reading(self.rng), saved=False)
+
+
+# -------------------- 25_USB_CHECK --------------------
+USB_CHECK_HELP = "Commands: N=<num> T=<ms> RAW=0|1 NOW SEND STATUS SETTIME TIME=YYYY-MM-DD HH:MM:SS\n"
+MAX_SAMPLES = 100
+COMPILE_TIME = datetime(2026, 1, 14, 9, 0, 0)
+
+
+class UsbCheckSimulator(TeensySimulator):
+    """Speaks the 25_USB_CHECK.ino console protocol: reading blocks every
+    save_every intervals and the N= T= RAW= NOW SEND STATUS SETTIME TIME= commands
+    (RAW=1 adds a $BURST line of raw samples after each block)"""
+
+    def __init__(self, interval=HEARTBEAT_INTERVAL, save_every=SAVE_EVERY, seed=None, drop_rate=0.0):
+        super().__init__(interval, save_every, seed, drop_rate)
+        self.n_samples = 5
+        self.sampling_interval = 100      # ms between samples
+        self.sd_available = True
+        self.raw_bursts = False
+        self.rtc_offset = timedelta(0)
+        self.last_sample = time.monotonic()
+        self.datalog = []
+
+    def rtc_now(self):
+        return (datetime.now() + self.rtc_offset).replace(microsecond=0)
+
+    def perform_reading(self):
+        self.reading_counter += 1
+        now = self.rtc_now()
+        raw = scaled_reading(self.rng)
+        ph, do_ugl, temp, press = raw[0] / 100, raw[1] * 100, raw[2] / 50, raw[3] / 1000
+        stamp = f"{now.day}/{now.month}/{now.year} {now.hour}:{now.minute}:{now.second}"
+        self.write("🔴\n========================================\n"
+                   f"Timestamp: {stamp}\n"
+                   "----------------------------------------\n"
+                   f"PH Raw ADC: {512 + ph:.1f}\nPH Voltage: {ph / 3.5:.3f} V\nPH Value:   {ph:.2f}\n"
+                   "----------------------------------------\n"
+                   f"DO mV:      {do_ugl // 10}\nDO Value:   {do_ugl} ug/L\n"
+                   "----------------------------------------\n"
+                   f"Temp:       {temp:.2f} °C\nPressure:   {press:.2f} mbar\n"
+                   "========================================\n\n")
+        if self.raw_bursts:
+            self.write(self.burst_line(now, ph, do_ugl // 10, temp, press) + "\n")
+        if self.sd_available:
+            self.datalog += ["🔴", "=== Water Quality Reading ===", f"Timestamp: {stamp}",
+                             "-----------------------------", f"PH Value: {ph:.2f}",
+                             f"DO Value: {do_ugl} ug/L", f"Temperature: {temp:.2f} °C",
+                             f"Pressure: {press:.2f} mbar", "=============================", ""]
+            self.write("[SD] Data saved to datalog.txt\n")
+        self.last_sample = time.monotonic()
+
+    def burst_line(self, now, ph, do_mv, temp, press):
+        """$BURST line: n noisy samples around the reading, in the firmware's raw units"""
+        n = self.n_samples
+        ph_adc = (ph - 0.19) / 3.5 / 3.3 * 1024
+        do_adc = do_mv * 1024 / 3300
+        device_time = int((now - datetime(1970, 1, 1)).total_seconds())
+        return encode_burst(device_time, self.sampling_interval,
+                            [min(max(round(self.rng.gauss(ph_adc, 1.5)), 0), 1023) for _ in range(n)],
+                            [min(max(round(self.rng.gauss(do_adc, 2.0)), 0), 1023) for _ in range(n)],
+                            [self.rng.gauss(temp, 0.01) for _ in range(n)],
+                            [self.rng.gauss(press, 0.05) for _ in range(n)])
+
+    def _handle_command(self, command):
+        if command.startswith("N="):
+            self.n_samples = min(max(_to_int(command[2:]), 1), MAX_SAMPLES)
+            self.write(f"N_samples = {self.n_samples}\n")
+        elif command.startswith("T="):
+            self.sampling_interval = min(max(_to_int(command[2:]), 1), 60000)
+            self.write(f"samplingInterval = {self.sampling_interval}\n")
+        elif command.startswith("RAW="):
+            self.raw_bursts = _to_int(command[4:]) != 0
+            self.write(f"raw_bursts = {int(self.raw_bursts)}\n")
+        elif command.upper() == "SEND":
+            if not self.sd_available:
+                self.write("[Error] SD not available\n")
+                return
+            self.write("[START FILE]\n" + "".join(line + "\n" for line in self.datalog) + "\n[END FILE]\n")
+        elif command.upper() == "STATUS":
+            next_in = max(0, int(self.interval * self.save_every - (time.monotonic() - self.last_sample)))
+            self.write(f"N={self.n_samples} T={self.sampling_interval} SD={'YES' if self.sd_available else 'NO'}\n"
+                       f"Time: {self.rtc_now().isoformat()}\n"
+                       f"Next reading in: {next_in} seconds\n")
+        elif command.upper() == "NOW":
+            self.write("[Manual] Taking reading now...\n")
+            self.write(f"Sampling {self.n_samples} times...\n")
+            time.sleep((self.n_samples - 1) * self.sampling_interval / 1000)
+            self.perform_reading()
+        elif command.upper() == "SETTIME":
+            self.rtc_offset = COMPILE_TIME - datetime.now()
+            self.write(f"RTC set to compile time: {self.rtc_now().isoformat()}\n")
+        elif command.startswith("TIME="):
+            try:
+                target = datetime.strptime(command[5:].strip(), "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                target = datetime(2000, 1, 1)     # the firmware's toInt() parsing gives garbage
+            self.rtc_offset = target - datetime.now()
+            self.write(f"RTC set to: {self.rtc_now().isoformat()}\n")
+        elif command:
+            self.write(USB_CHECK_HELP)
+
+    def _heartbeat_loop(self):
+        beats = 0
+        while not self._stop.wait(self.interval):
+            beats += 1
+            if self.save_every and beats % self.save_every == 0:
+                with self._busy:
+                    self.perform_reading()
+
+
+def _to_int(text):
+    """Arduino String.toInt(): leading integer or 0"""
+    digits = ""
+    for ch in text.strip():
+        if not (ch.isdigit() or (ch == "-" and not digits)):
+            break
+        digits += ch
+    try:
+        return int(digits)
+    except ValueError:
+        return 0
+
+
+SIMULATORS = {"sd_params": TeensySimulator, "usb_check": UsbCheckSimulator}
+
+
+# -------------------- Main --------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulated Teensy on a pseudo-terminal")
+    parser.add_argument("--interval", type=float, default=HEARTBEAT_INTERVAL)
+    parser.add_argument("--save-every", type=int, default=SAVE_EVERY)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--drop-rate", type=float, default=0.0,
+                        help="fraction of $Params readings to drop (gap/backfill testing)")
+    parser.add_argument("--dialect", choices=sorted(SIMULATORS), default="sd_params",
+                        help="firmware to imitate (see dialects.py)")
+    args = parser.parse_args()
+
+    sim = SIMULATORS[args.dialect](args.interval, args.save_every, args.seed, args.drop_rate)
+    port = sim.start()
+    print(f"🧪 Simulated Teensy ({args.dialect}) on {port}  (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        sim.stop()
@@ -0,0 +1,180 @@
+###############################################################
+#   TELEMETRY
+#   Compact binary $Params frames (SD_sketch_jan14a.ino):
+#   frame layout, encoder, and a batch decoder that splits one
+#   mixed serial byte stream into binary frames and text lines.
+###############################################################
+
+import binascii
+import struct
+
+import numpy as np
+
+# -------------------- Frame Layout --------------------
+# 26 bytes, little endian:
+#   sync A5 5A | version u8 | flags u8 | seq u16 | reading id u32
+#   | device time u32 (unix s) | pH*100 i16 | DO*10 i16 | Temp*50 i16
+#   | Pressure*1000 i32 | CRC16 u16
+# CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF) over version..pressure.
+SYNC = b"\xA5\x5A"
+FRAME_VERSION = 2
+FLAG_SAVED = 0x01
+
+FRAME = struct.Struct("<2sBBHIIhhhiH")
+FRAME_SIZE = FRAME.size
+FRAME_DTYPE = np.dtype([
+    ("sync", "S2"), ("version", "u1"), ("flags", "u1"), ("seq", "<u2"),
+    ("reading_id", "<u4"), ("device_time", "<u4"), ("ph", "<i2"), ("do", "<i2"), ("temp", "<i2"),
+    ("pressure", "<i4"), ("crc", "<u2"),
+])
+assert FRAME_DTYPE.itemsize == FRAME_SIZE
+RAW_FIELDS = ("ph", "do", "temp", "pressure")
+CRC_SPAN = slice(2, FRAME_SIZE - 2)
+CRC_INIT = 0xFFFF
+
+# -------------------- Negotiation --------------------
+# Host sends a request line; firmware answers with TELEMETRY_MODE:<mode>.
+# Firmware that does not know the command ignores it and stays on text.
+CMD_BINARY = b"TELEMETRY BINARY\n"
+CMD_TEXT = b"TELEMETRY TEXT\n"
+ACK_PREFIX = "TELEMETRY_MODE:"
+
+MAX_PARTIAL_LINE = 64 * 1024
+
+
+def crc16(data, crc=CRC_INIT):
+    return binascii.crc_hqx(data, crc)
+
+
+def _crc_tables():
+    byte_table = np.zeros(256, dtype=np.uint16)
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        byte_table[i] = crc & 0xFFFF
+    # 16-bit table: the register after shifting two more bytes through it,
+    # so the CRC advances a whole big-endian word per lookup
+    word_table = np.arange(65536, dtype=np.uint16)
+    for _ in range(2):
+        word_table = (word_table << 8) ^ byte_table[word_table >> 8]
+    return word_table
+
+
+_CRC_WORD_TABLE = _crc_tables()
+
+
+def crc16_rows(rows):
+    """CRC of every row of an (N, 2k) uint8 array, one 16-bit column at a time"""
+    words = rows.view(">u2")
+    crc = np.full(rows.shape[0], CRC_INIT, dtype=np.uint16)
+    for j in range(words.shape[1]):
+        crc = _CRC_WORD_TABLE[crc ^ words[:, j]]
+    return crc
+
+
+# -------------------- Encoding --------------------
+def encode_frame(seq, device_time, raw, saved=False, reading_id=0):
+    """Pack one reading (raw = scaled ints pH*100, DO*10, Temp*50, Pressure*1000)"""
+    flags = FLAG_SAVED if saved else 0
+    body = FRAME.pack(SYNC, FRAME_VERSION, flags, seq & 0xFFFF, reading_id & 0xFFFFFFFF,
+                      int(device_time) & 0xFFFFFFFF, *(int(v) for v in raw), 0)
+    return body[:-2] + struct.pack("<H", crc16(body[CRC_SPAN]))
+
+
+def raw_fields(frames):
+    """(N, 4) array of raw $Params integers, ready for calibration.reprocess()"""
+    return np.column_stack([frames[name] for name in RAW_FIELDS])
+
+
+# -------------------- Decoding --------------------
+class StreamDecoder:
+    """Incremental decoder for a serial stream mixing text lines and frames.
+
+    `feed(data)` returns the items completed so far, in arrival order: a str
+    for each text line and a FRAME_DTYPE array for each run of back-to-back
+    frames. Runs are validated and copied out of the receive buffer in one
+    NumPy pass, with no per-frame Python work.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self.frames = 0
+        self.crc_errors = 0
+        self.garbage_lines = 0
+        self.truncated = 0        # partial lines / frames discarded by flush()
+
+    def feed(self, data):
+        buf = self._buf
+        buf.extend(data)
+        items = []
+        pos = 0
+        n = len(buf)
+        while pos < n:
+            sync = buf.find(SYNC, pos)
+            text_end = n if sync < 0 else sync
+
+            # ---- text before the next frame ----
+            if text_end > pos:
+                nl = buf.rfind(b"\n", pos, text_end)
+                if nl >= 0:
+                    self._split_lines(memoryview(buf)[pos:nl], items)
+                    pos = nl + 1
+                if sync < 0:
+                    break
+                if pos < sync:
+                    # firmware finishes a line before sending a frame; keep any tail
+                    self._split_lines(memoryview(buf)[pos:sync], items)
+                    pos = sync
+
+            # ---- run of frames starting at sync ----
+            count = (n - sync) // FRAME_SIZE
+            if count == 0:
+                break                              # partial frame, wait for more bytes
+
+            rows = np.frombuffer(buf, dtype=np.uint8, count=count * FRAME_SIZE,
+                                 offset=sync).reshape(count, FRAME_SIZE)
+            synced = (rows[:, 0] == 0xA5) & (rows[:, 1] == 0x5A)
+            if not synced.all():
+                count = int(np.argmin(synced))     # run ends where text resumes
+                rows = rows[:count]
+            frames = rows.view(FRAME_DTYPE).reshape(count)
+            ok = (frames["version"] == FRAME_VERSION) & (crc16_rows(rows[:, CRC_SPAN]) == frames["crc"])
+            good = count if ok.all() else int(np.argmin(ok))
+            if good:
+                items.append(frames[:good].copy())
+                self.frames += good
+            del rows, frames, ok, synced
+            pos = sync + good * FRAME_SIZE
+            if good < count:
+                # Corrupt frame: drop it whole. (A5 5A never appears in the
+                # firmware's text, so a false sync is not worth resyncing for.)
+                self.crc_errors += 1
+                pos += FRAME_SIZE
+
+        if pos == 0 and len(buf) > MAX_PARTIAL_LINE:
+            self._split_lines(memoryview(buf), items)
+            pos = len(buf)
+        del buf[:pos]
+        return items
+
+    def flush(self):
+        """Discard whatever is still buffered (the port went away mid-line or
+        mid-frame), so it is neither glued onto the next line nor parsed as a
+        complete one. Returns the discarded bytes, for logging only."""
+        partial = bytes(self._buf)
+        if partial:
+            self.truncated += 1
+            del self._buf[:]
+        return partial
+
+    def _split_lines(self, view, items):
+        for raw in bytes(view).split(b"\n"):
+            line = raw.decode("utf-8", errors="ignore").strip()
+            if not line:
+                continue
+            if line.isprintable():
+                items.append(line)
+            else:
+                # Remains of a corrupt frame; firmware text never has control bytes
+                self.garbage_lines += 1
@@ -0,0 +1,126 @@
+###############################################################
+#   UI FRAMES
+#   One repaint loop on the Tk thread for the sensor GUIs.
+#   Any thread records what should change - label options,
+#   text box lines, temporary status messages, work to run on
+#   the Tk thread - and every FRAME_MS the loop applies it:
+#   each dirty widget is configured once (last value wins),
+#   each text box gets one insert + one see(), and posted work
+#   runs within a time budget. Reader threads never call Tk.
+###############################################################
+
+import threading
+import time
+import tkinter as tk
+from collections import deque
+
+from instrumentation import metrics
+from sensor_logging import get_logger
+
+# -------------------- CONFIG --------------------
+FRAME_MS = 33                 # ~30 repaints per second at most
+WORK_BUDGET_S = 0.015         # posted work per frame; the rest waits for the next frame
+MAX_TEXT_LINES = 5000         # older text box lines are dropped
+
+ui_log = get_logger("serial")
+frame_time = metrics.histogram("ui.frame", "Tk time spent per UI frame")
+widgets_painted = metrics.counter("ui.widgets_painted", "Widget repaints applied by the frame loop")
+updates_coalesced = metrics.counter("ui.updates_coalesced", "Widget updates merged into a later one")
+work_backlog = metrics.gauge("ui.work_backlog", "Posted Tk-thread calls still waiting after a frame")
+
+
+class FrameScheduler:
+    """Dirty-set repaint loop. All recording methods are thread-safe.
+
+    `set(widget, **options)`       widget.config(...) at the next frame
+    `log(text_widget, text, tag)`  append to a Text widget (order kept)
+    `flash(widget, ms, restore, **options)`  set now, restore after `ms`
+    `post(fn)`                     run fn() on the Tk thread
+    """
+
+    def __init__(self, frame_ms=FRAME_MS):
+        self.frame_ms = frame_ms
+        self._root = None
+        self._lock = threading.Lock()
+        self._dirty = {}          # widget -> merged config options
+        self._text = {}           # text widget -> [text, tag, text, tag, ...]
+        self._restore = {}        # widget -> (deadline, options)
+        self._work = deque()
+
+    def attach(self, root):
+        """Start the loop on `root` (call once, from the Tk thread)"""
+        if self._root is None:
+            self._root = root
+            root.after(self.frame_ms, self._frame)
+
+    # -------------------- Recording --------------------
+    def set(self, widget, **options):
+        with self._lock:
+            self._restore.pop(widget, None)
+            pending = self._dirty.setdefault(widget, {})
+            if pending:
+                updates_coalesced.inc()
+            pending.update(options)
+
+    def flash(self, widget, ms, restore, **options):
+        """Temporary state (e.g. "Reading Saved"): a later set() on the widget cancels the restore"""
+        self.set(widget, **options)
+        with self._lock:
+            self._restore[widget] = (time.monotonic() + ms / 1000, restore)
+
+    def log(self, widget, text, tag=None):
+        with self._lock:
+            self._text.setdefault(widget, []).extend((text, tag or ()))
+
+    def post(self, fn):
+        self._work.append(fn)
+
+    # -------------------- Frame --------------------
+    def _frame(self):
+        start = time.perf_counter()
+        try:
+            self._run_work(start)
+            self._paint()
+        finally:
+            frame_time.observe(time.perf_counter() - start)
+            self._root.after(self.frame_ms, self._frame)
+
+    def _run_work(self, start):
+        work = self._work
+        while work and time.perf_counter() - start < WORK_BUDGET_S:
+            fn = work.popleft()
+            try:
+                fn()
+            except Exception as e:
+                ui_log.error("❌ UI update failed: %s", e)
+        work_backlog.set(len(work))
+
+    def _paint(self):
+        now = time.monotonic()
+        with self._lock:
+            for widget, (deadline, options) in list(self._restore.items()):
+                if deadline <= now:
+                    del self._restore[widget]
+                    self._dirty.setdefault(widget, {}).update(options)
+            dirty, self._dirty = self._dirty, {}
+            text, self._text = self._text, {}
+
+        for widget, options in dirty.items():
+            try:
+                widget.config(**options)
+                widgets_painted.inc()
+            except tk.TclError:
+                pass                        # window closed meanwhile
+        for widget, chunks in text.items():
+            try:
+                widget.insert(tk.END, *chunks)
+                lines = int(widget.index("end-1c").split(".")[0])
+                if lines > MAX_TEXT_LINES:
+                    widget.delete("1.0", f"{lines - MAX_TEXT_LINES + 1}.0")
+                widget.see(tk.END)
+                widgets_painted.inc()
+            except tk.TclError:
+                pass
+
+
+frames = FrameScheduler()